@@ -0,0 +1,351 @@
+import atexit
+import contextlib
+import glob
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from cache import CachedCounter, LRUCache
+from storage import ALL_USERS
+
+# Event kinds recorded by the app (page views carry the page name as detail)
+REGISTER = "register"
+LOGIN = "login"
+LOGIN_FAILED = "login_failed"  # recorded under ALL_USERS with the attempted username as detail
+LOGOUT = "logout"
+PAGE_VIEW = "page_view"
+
+
+def utc_now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def format_timestamp(moment):
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def time_ago(timestamp, now=None):
+    """'5 minutes ago' style label for a stored 'YYYY-MM-DD HH:MM:SS' UTC timestamp"""
+    seconds = int(((now or utc_now()) - datetime.fromisoformat(timestamp)).total_seconds())
+    for unit, size in (("day", 86400), ("hour", 3600), ("minute", 60)):
+        if seconds >= size:
+            count = seconds // size
+            return f"{count} {unit}{'s' if count > 1 else ''} ago"
+    return "just now"
+
+
+def _process_alive(pid):
+    if os.name != "posix":
+        # No cheap liveness probe: leave other processes' files alone
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def dense_series(rows, start, periods, unit, kinds):
+    """Sum (bucket, kind, detail, count) rollup rows into one dense NumPy column per kind.
+
+    Returns (buckets, {kind: counts}) where buckets is a datetime64 array of
+    `periods` consecutive `unit` ("D" or "h") steps from `start`.
+    """
+    import numpy as np  # only the pages with charts pay for the import
+
+    buckets = np.datetime64(start, unit) + np.arange(periods)
+    columns = {kind: np.zeros(periods, dtype=np.int64) for kind in kinds}
+    if rows:
+        stamps, row_kinds, _, counts = zip(*rows)
+        offsets = (np.array(stamps, dtype=f"datetime64[{unit}]") - buckets[0]).astype(np.int64)
+        row_kinds = np.array(row_kinds)
+        counts = np.array(counts, dtype=np.int64)
+        in_range = (offsets >= 0) & (offsets < periods)
+        for kind, column in columns.items():
+            mask = in_range & (row_kinds == kind)
+            np.add.at(column, offsets[mask], counts[mask])
+    return buckets, columns
+
+
+class ActivityLog:
+    """Per-user activity events, written behind and read back through precomputed rollups.
+
+    record() only puts the event on a bounded in-memory queue; a background
+    writer drains it in multi-row batches once `batch_size` events are waiting
+    or `flush_interval` seconds after the first one, so a rerun never waits on
+    an INSERT. When the queue is full, record() blocks for up to `put_timeout`
+    (backpressure) and then spills the event. Batches that fail to write are
+    appended to this process's `<spill_path>.<pid>` file and replayed once the
+    database accepts writes again; files left by processes that have exited
+    (including half-replayed ones) are taken over at startup. Without a spill
+    path the events are dropped.
+    A user's own queued events are merged into their reads until written, so
+    the Home page reflects a login straight away.
+
+    Every batch bumps the matching hourly and daily rollup rows (per user and
+    site-wide) in the same transaction, so the pages read a handful of
+    aggregate rows instead of scanning raw events. The site-wide summary is
+    shared by all sessions and refreshed at most once per `site_summary_ttl`.
+    """
+
+    def __init__(self, repository, site_summary_ttl=30, window_days=30, batch_size=200, flush_interval=1.0,
+                 max_queue=10000, put_timeout=0.05, spill_path=None, history_ttl=3600, history_max_entries=10000):
+        self.repository = repository
+        self.window_days = window_days
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.spill_path = spill_path
+        # Only this process appends to its own file, so no two processes ever replay the same events
+        self._spill_file = f"{spill_path}.{os.getpid()}" if spill_path else None
+        self._site_summary = CachedCounter(self._load_site_summary, ttl=site_summary_ttl)
+        # (user_id, first day of the summary window) -> totals of the days before it, which no longer change
+        self._history = LRUCache(self._load_history, ttl=history_ttl, max_entries=history_max_entries)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._spill_lock = threading.Lock()
+        # user_id -> that user's events still in the queue (read-your-writes for recent()/user_summary())
+        self._unwritten = {}
+        self._unwritten_lock = threading.Lock()
+        # Leftovers from exited processes are replayed after the first successful write
+        self._claimed = self._claim_leftovers() if spill_path else []
+        self._spill_pending = bool(self._claimed)
+        self._stats = {"recorded": 0, "written": 0, "batches": 0, "spilled": 0, "replayed": 0, "dropped": 0,
+                       "corrupt": 0, "errors": 0}
+        self._writer = threading.Thread(target=self._run, name="activity-writer", daemon=True)
+        self._writer.start()
+        # Write (or spill) whatever is still buffered when the process exits normally
+        atexit.register(self.flush)
+
+    def record(self, user_id, kind, detail=""):
+        """Queue one event for the background writer (never raises into the page)"""
+        if user_id is None:
+            return
+        event = (user_id, kind, detail[:64], format_timestamp(utc_now()))
+        self._stats["recorded"] += 1
+        if user_id != ALL_USERS:
+            with self._unwritten_lock:
+                self._unwritten.setdefault(user_id, []).append(event)
+        try:
+            self._queue.put(event, timeout=self.put_timeout)
+        except queue.Full:
+            self._spill([event])
+            self._forget([event])
+
+    def flush(self):
+        """Block until every event queued so far has been written (or spilled)"""
+        self._queue.join()
+
+    def recent(self, user_id, limit=5):
+        """(kind, detail, created_at) of the user's latest events, newest first"""
+        queued = [(kind, detail, created_at) for _, kind, detail, created_at in reversed(self._queued_for(user_id))]
+        return (queued + list(self.repository.recent_events(user_id, limit)))[:limit]
+
+    def user_summary(self, user_id, days=7):
+        """All-time and last-`days` totals for the user; only the last `days` of rollups are read per call"""
+        since = (utc_now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        history = self._history.get((user_id, since))
+        summary = {"sessions": history["sessions"], "page_views": history["page_views"],
+                   "active_days": set(history["active_days"]), "pages": set(history["pages"]),
+                   "sessions_recent": 0, "page_views_recent": 0, "active_days_recent": set()}
+        rows = self.repository.daily_rollups(user_id, since)
+        rows += [(created_at[:10], kind, detail, 1) for _, kind, detail, created_at in self._queued_for(user_id)]
+        for day, kind, detail, count in rows:
+            summary["active_days"].add(day)
+            summary["active_days_recent"].add(day)
+            if kind == LOGIN:
+                summary["sessions"] += count
+                summary["sessions_recent"] += count
+            elif kind == PAGE_VIEW:
+                summary["page_views"] += count
+                summary["page_views_recent"] += count
+                summary["pages"].add(detail)
+        for key in ("active_days", "active_days_recent", "pages"):
+            summary[key] = len(summary[key])
+        return summary
+
+    def site_summary(self):
+        """Site-wide KPIs and chart columns (cached, shared by every session)"""
+        return self._site_summary.get()
+
+    def stats(self):
+        return dict(self._stats, queued=self._queue.qsize())
+
+    def _queued_for(self, user_id):
+        with self._unwritten_lock:
+            return list(self._unwritten.get(user_id, ()))
+
+    def _forget(self, events):
+        with self._unwritten_lock:
+            for event in events:
+                pending = self._unwritten.get(event[0])
+                if pending and event in pending:
+                    pending.remove(event)
+                    if not pending:
+                        del self._unwritten[event[0]]
+
+    # Background writer
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception:
+                # Keep the writer alive whatever happens: flush() (also run at exit) waits on it
+                self._stats["errors"] += 1
+            finally:
+                self._forget(batch)
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch):
+        try:
+            self.repository.record_events(batch)
+        except Exception:
+            self._spill(batch)
+            return
+        self._stats["written"] += len(batch)
+        self._stats["batches"] += 1
+        if self._spill_pending:
+            self._replay_spill()
+
+    def _spill(self, events):
+        if not self.spill_path:
+            self._stats["dropped"] += len(events)
+            return
+        with self._spill_lock:
+            try:
+                with open(self._spill_file, "a", encoding="utf-8") as f:
+                    f.writelines(json.dumps(event) + "\n" for event in events)
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError:
+                self._stats["dropped"] += len(events)
+                return
+            self._spill_pending = True
+        self._stats["spilled"] += len(events)
+
+    def _claim_leftovers(self):
+        """Rename spill files of exited processes (and older-format ones) to names only this process uses"""
+        claimed = []
+        for path in sorted(glob.glob(glob.escape(self.spill_path) + "*")):
+            suffix = path[len(self.spill_path):]
+            owner = suffix[1:].split(".")[0] if suffix.startswith(".") else ""
+            if owner.isdigit():
+                pid = int(owner)
+                if pid != os.getpid() and _process_alive(pid):
+                    continue
+            elif suffix not in ("", ".replaying"):
+                continue
+            target = f"{self._spill_file}.recovered-{uuid.uuid4().hex[:8]}"
+            try:
+                # Atomic: when two processes start together only one of them gets each file
+                os.rename(path, target)
+            except OSError:
+                continue
+            claimed.append(target)
+        return claimed
+
+    def _replay_spill(self):
+        # Only the writer thread replays; the lock keeps spills from appending mid-swap
+        with self._spill_lock:
+            replaying = f"{self._spill_file}.replaying"
+            with contextlib.suppress(FileNotFoundError):
+                os.replace(self._spill_file, replaying)
+            self._spill_pending = False
+            self._claimed.append(replaying)
+        while self._claimed:
+            path = self._claimed.pop(0)
+            if not self._replay_file(path):
+                # Database down again: the rest waits for the next good write
+                with self._spill_lock:
+                    self._spill_pending = True
+                return
+
+    def _replay_file(self, path):
+        """Write one spill file's events and delete it; False if the database refused them"""
+        events = []
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        event = tuple(json.loads(line))
+                    except (ValueError, TypeError):
+                        event = None
+                    if event is not None and len(event) == 4:
+                        events.append(event)
+                    elif line.strip():
+                        # e.g. a line torn by a crash mid-append
+                        self._stats["corrupt"] += 1
+        except FileNotFoundError:
+            return True
+        replayed = True
+        for start in range(0, len(events), self.batch_size):
+            chunk = events[start:start + self.batch_size]
+            try:
+                self.repository.record_events(chunk)
+            except Exception:
+                # Put back what is left (after any newer spills) and try again after the next good write
+                self._spill(events[start:])
+                replayed = False
+                break
+            self._stats["replayed"] += len(chunk)
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+        return replayed
+
+    def _load_history(self, key):
+        user_id, since = key
+        history = {"sessions": 0, "page_views": 0, "active_days": set(), "pages": set()}
+        for day, kind, detail, count in self.repository.daily_rollups(user_id, "1970-01-01", since):
+            history["active_days"].add(day)
+            if kind == LOGIN:
+                history["sessions"] += count
+            elif kind == PAGE_VIEW:
+                history["page_views"] += count
+                history["pages"].add(detail)
+        return history
+
+    def _load_site_summary(self):
+        now = utc_now()
+        today = now.date()
+        window = self.window_days
+        current_start = today - timedelta(days=window - 1)
+        previous_start = current_start - timedelta(days=window)
+
+        daily = self.repository.daily_rollups(ALL_USERS, previous_start.isoformat())
+        days, columns = dense_series(daily, previous_start.isoformat(), 2 * window, "D", (PAGE_VIEW, REGISTER, LOGIN))
+        totals = {kind: (int(column[window:].sum()), int(column[:window].sum())) for kind, column in columns.items()}
+
+        pages = {}
+        for day, kind, detail, count in daily:
+            if kind == PAGE_VIEW and day >= current_start.isoformat():
+                pages[detail] = pages.get(detail, 0) + count
+
+        hour_start = (now - timedelta(hours=23)).strftime("%Y-%m-%d %H:00:00")
+        hourly = self.repository.hourly_rollups(ALL_USERS, hour_start)
+        hours, hour_columns = dense_series(hourly, hour_start, 24, "h", (PAGE_VIEW, LOGIN))
+
+        return {
+            # kind -> (this window, previous window)
+            "totals": totals,
+            "active_users": self.repository.count_active_users(LOGIN, current_start.isoformat()),
+            "week": (days[-7:], columns[PAGE_VIEW][-7:], columns[LOGIN][-7:]),
+            "hours": (hours, hour_columns[PAGE_VIEW], hour_columns[LOGIN]),
+            "pages": (list(pages), list(pages.values())),
+        }
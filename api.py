@@ -0,0 +1,307 @@
+"""JSON auth API for machine clients, served by the same AuthCore as the Streamlit app.
+
+    POST /register       {"username", "email", "password", "confirm_password"?, "first_name"?, "last_name"?}
+                         -> 201 {"user_id"}
+    POST /login          {"username", "password"}   -> 200 {"token", "user_id", "username", "expires_in"}
+    POST /token/refresh  {"token"} or "Authorization: Bearer <token>"  -> 200, same body as /login
+    GET  /users/count    -> 200 {"count"}
+    GET  /export?format=ndjson|csv  with "Authorization: Bearer <token>" or &ticket=<export ticket>
+                         -> 200, the user's data streamed as a file download
+
+Failures are {"error": <code>, "message": ...} with a matching status code.
+A plain ASGI app (no framework); each worker process uses its own
+process's shared AuthCore:
+
+    python api.py                      # API_HOST / API_PORT / API_WORKERS from config.py
+    uvicorn api:app --workers 4        # or any other ASGI server
+
+With more than one worker (or next to the Streamlit app) set SESSION_SECRET
+and SESSION_STORE_URL so a token issued by one process is accepted by all;
+`python api.py` refuses to start several workers without them.
+Each worker's user index learns about accounts registered by the others on
+its next incremental sync, so such a login can be refused for up to
+USER_INDEX_SYNC_INTERVAL seconds.
+"""
+import asyncio
+import json
+import os
+import socket
+from urllib.parse import parse_qs
+
+import config
+from auth_core import AuthError, resolve_client, shared_core
+from export import FORMATS, iter_export
+from storage import StorageError
+
+# AuthError code -> HTTP status
+STATUS = {
+    "invalid": 400,
+    "missing_credentials": 400,
+    "invalid_credentials": 401,
+    "invalid_token": 401,
+    "duplicate_username": 409,
+    "duplicate_email": 409,
+    "duplicate": 409,
+    "rate_limited": 429,
+    "busy": 503,
+    "storage": 503,
+}
+MAX_BODY_BYTES = 64 * 1024
+
+# One per worker process (shared with anything else imported into it)
+core = shared_core()
+
+
+class HTTPError(Exception):
+    def __init__(self, status, code, message):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+class Download:
+    """A file response streamed from a blocking generator of byte chunks (`first` already read from it)"""
+
+    def __init__(self, filename, content_type, first, chunks):
+        self.filename = filename
+        self.content_type = content_type
+        self.first = first
+        self.chunks = chunks
+
+
+async def read_json(receive):
+    body = bytearray()
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if len(body) > MAX_BODY_BYTES:
+            raise HTTPError(413, "too_large", "Request body too large")
+        if not message.get("more_body"):
+            break
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError:
+        raise HTTPError(400, "bad_request", "Body must be JSON")
+    if not isinstance(data, dict):
+        raise HTTPError(400, "bad_request", "Body must be a JSON object")
+    return data
+
+
+def text_field(data, name, default=None):
+    value = data.get(name, default)
+    if not isinstance(value, str):
+        raise HTTPError(400, "bad_request", f"'{name}' must be a string")
+    return value
+
+
+def header(scope, name):
+    name = name.encode("latin-1")
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def bearer_token(scope):
+    authorization = header(scope, "authorization") or ""
+    return authorization[7:].strip() if authorization.lower().startswith("bearer ") else None
+
+
+def client_address(scope):
+    return resolve_client(header(scope, "x-forwarded-for"), scope["client"][0] if scope.get("client") else None)
+
+
+def session_body(token, session):
+    return {
+        "token": token,
+        "user_id": session["user_id"],
+        "username": session["username"],
+        "expires_in": config.SESSION_TTL,
+    }
+
+
+# Handlers: (scope, body) -> (status, payload). Core calls block, so they run on worker threads.
+
+async def register(scope, body):
+    user_id = await asyncio.to_thread(
+        core.register,
+        text_field(body, "username"),
+        text_field(body, "email"),
+        text_field(body, "password"),
+        text_field(body, "confirm_password", body.get("password")),
+        client_address(scope),
+        text_field(body, "first_name", ""),
+        text_field(body, "last_name", "")
+    )
+    return 201, {"user_id": user_id}
+
+
+def _log_in(username, password, client):
+    user_id = core.login(username, password, client)
+    return core.start_session(username, user_id), {"user_id": user_id, "username": username}
+
+
+async def login(scope, body):
+    token, session = await asyncio.to_thread(
+        _log_in, text_field(body, "username"), text_field(body, "password"), client_address(scope)
+    )
+    return 200, session_body(token, session)
+
+
+async def refresh_token(scope, body):
+    token = body.get("token")
+    if token is None:
+        token = bearer_token(scope)
+    if not isinstance(token, str):
+        raise HTTPError(401, "invalid_token", "Missing session token")
+    token, session = await asyncio.to_thread(core.refresh_session, token)
+    return 200, session_body(token, session)
+
+
+async def user_count(scope, body):
+    return 200, {"count": await asyncio.to_thread(core.user_count)}
+
+
+def export_user(token, ticket):
+    if ticket is not None:
+        return core.resolve_export_ticket(ticket)
+    session = core.resolve_session(token) if token else None
+    return None if session is None else session["user_id"]
+
+
+async def export(scope, body):
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    fmt = query.get("format", ["ndjson"])[0]
+    if fmt not in FORMATS:
+        raise HTTPError(400, "invalid", f"Unknown export format '{fmt}'")
+    user_id = await asyncio.to_thread(export_user, bearer_token(scope), query.get("ticket", [None])[0])
+    if user_id is None:
+        raise HTTPError(401, "invalid_token", "Session expired or invalid")
+    chunks = iter_export(fmt, user_id, core.profiles, core.settings, core.repository)
+    try:
+        # Read up front so a database error is still a proper 503 rather than a cut-off download
+        first = await asyncio.to_thread(next, chunks, b"")
+    except StorageError as e:
+        raise HTTPError(503, "storage", f"Database error: {e}")
+    extension, content_type = FORMATS[fmt]
+    return 200, Download(f"user-{user_id}-data.{extension}", content_type, first, chunks)
+
+
+ROUTES = {
+    ("POST", "/register"): register,
+    ("POST", "/login"): login,
+    ("POST", "/token/refresh"): refresh_token,
+    ("GET", "/users/count"): user_count,
+    ("GET", "/export"): export,
+}
+
+
+async def respond(send, status, payload):
+    body = json.dumps(payload).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def stream(send, status, download):
+    """Send a Download chunk by chunk; memory use stays at one chunk whatever the file size"""
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", download.content_type.encode("latin-1")),
+            (b"content-disposition", f'attachment; filename="{download.filename}"'.encode("latin-1")),
+        ],
+    })
+    chunk = download.first
+    try:
+        while chunk:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            chunk = await asyncio.to_thread(next, download.chunks, b"")
+    finally:
+        # Releases the database connection if the client went away mid-download
+        download.chunks.close()
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            try:
+                # Schema, Bloom index and auth service up before the first request
+                await asyncio.to_thread(lambda: (core.ensure_schema(), core.user_index, core.auth_service))
+            except Exception as e:
+                await send({"type": "lifespan.startup.failed", "message": str(e)})
+                return
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await asyncio.to_thread(core.close)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+    handler = ROUTES.get((scope["method"], scope["path"]))
+    try:
+        if handler is None:
+            if any(path == scope["path"] for _, path in ROUTES):
+                raise HTTPError(405, "method_not_allowed", "Method not allowed")
+            raise HTTPError(404, "not_found", "Not found")
+        body = await read_json(receive) if scope["method"] == "POST" else {}
+        status, payload = await handler(scope, body)
+    except AuthError as e:
+        status, payload = STATUS.get(e.code, 400), {"error": e.code, "message": str(e)}
+    except HTTPError as e:
+        status, payload = e.status, {"error": e.code, "message": str(e)}
+    if isinstance(payload, Download):
+        await stream(send, status, payload)
+    else:
+        await respond(send, status, payload)
+
+
+def listen_socket(host, port):
+    """Shared listening socket for the workers.
+
+    uvicorn binds it with proto 0, which asyncio takes as "not TCP" and so
+    leaves Nagle on for every accepted connection: each response's body then
+    waits ~40ms on the client's delayed ACK.
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    return sock
+
+
+def main():
+    if config.API_WORKERS > 1 and not (config.SESSION_SECRET and config.SESSION_STORE_URL):
+        raise SystemExit(
+            "API_WORKERS > 1 needs SESSION_SECRET and SESSION_STORE_URL: without them every worker signs "
+            "and stores its own sessions, so a token only works on the worker that issued it"
+        )
+    import uvicorn  # optional dependency, only needed to serve the API
+    from uvicorn.supervisors import Multiprocess
+
+    # Each worker has its own hashing pool: split the cores between them unless configured
+    os.environ.setdefault("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 1) // config.API_WORKERS)))
+    server_config = uvicorn.Config(
+        "api:app", host=config.API_HOST, port=config.API_PORT, workers=config.API_WORKERS, log_level="warning"
+    )
+    if server_config.workers > 1:
+        Multiprocess(server_config, sockets=[listen_socket(config.API_HOST, config.API_PORT)]).run()
+    else:
+        uvicorn.Server(server_config).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+import hashlib
+import hmac
+import secrets
+import threading
+from concurrent.futures.process import BrokenProcessPool
+
+import config
+from activity import ActivityLog, LOGIN, LOGIN_FAILED, LOGOUT, REGISTER
+from auth_service import AuthService
+from bloom import UserIndex
+from cache import CachedCounter, LRUCache
+from passwords import HashingBusy, HashingPool
+from ratelimit import RedisTokenBucketLimiter, TokenBucketLimiter
+from replicas import ReplicaRouter
+from sessions import MemorySessionStore, RedisSessionStore, SessionManager
+from storage import ALL_USERS, DuplicateUserError, MySQLUserRepository, SQLiteUserRepository, StorageError
+from user_settings import SettingsStore
+from validation import validate
+
+
+class AuthError(Exception):
+    """An auth request that was turned down; `code` says why and str(e) is the message for the user"""
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+# Codes for requests the caller can fix (the UI shows these as warnings)
+INPUT_ERRORS = {"invalid", "missing_credentials"}
+
+
+def resolve_client(forwarded_for, peer):
+    """Address per-client rate limits key on: the socket peer, or behind TRUSTED_PROXIES proxies the
+    X-Forwarded-For entry the outermost one appended (anything left of it is client-supplied)"""
+    if config.TRUSTED_PROXIES and forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+        if hops:
+            return hops[-min(config.TRUSTED_PROXIES, len(hops))]
+    return peer or "unknown"
+
+
+def parse_host(host):
+    """Split "host[:port]" (default port DB_PORT)"""
+    name, _, port = host.partition(":")
+    return name, int(port) if port else config.DB_PORT
+
+
+class AuthCore:
+    """Register/login/session flows and the process-wide objects behind them, with no UI.
+
+    Configured from config.py. Entry points get theirs from shared_core(), so
+    everything in one process (a Streamlit server and all its sessions, an API
+    worker) shares a single connection pool and set of caches. Separate
+    processes share only the database, plus Redis when SESSION_STORE_URL /
+    RATE_LIMIT_STORE_URL are set. Each resource (pools, caches, the auth
+    service...) is created on first use.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._resources = {}
+        self._schema_version = None
+        # Keys the recent-login password hashes; never leaves this process
+        self._login_key = secrets.token_bytes(32)
+
+    def _resource(self, name, factory):
+        resource = self._resources.get(name)
+        if resource is None:
+            # Reentrant: factories pull in the resources they depend on
+            with self._lock:
+                resource = self._resources.get(name)
+                if resource is None:
+                    resource = self._resources[name] = factory()
+        return resource
+
+    # Resources
+
+    @property
+    def repository(self):
+        return self._resource("repository", self._create_repository)
+
+    def _create_repository(self):
+        if config.DB_BACKEND == "sqlite":
+            primary = self._sqlite_repository(config.SQLITE_PATH)
+            replicas = [self._sqlite_repository(path) for path in config.SQLITE_REPLICA_PATHS]
+        else:
+            primary = self._mysql_repository(config.DB_HOST, config.DB_PORT)
+            replicas = [self._mysql_repository(*parse_host(host)) for host in config.DB_REPLICAS]
+        if not replicas:
+            return primary
+        return ReplicaRouter(
+            primary,
+            replicas,
+            max_lag=config.DB_REPLICA_MAX_LAG,
+            check_interval=config.DB_REPLICA_CHECK_INTERVAL,
+            sticky_for=config.DB_READ_YOUR_WRITES
+        )
+
+    def _sqlite_repository(self, path):
+        return SQLiteUserRepository(path, pool_size=config.DB_POOL_SIZE, pool_timeout=config.DB_POOL_TIMEOUT)
+
+    def _mysql_repository(self, host, port):
+        # Imported on first use: the MySQL driver is the slowest import here and sqlite never needs it
+        from db import ConnectionPool
+
+        pool = ConnectionPool(
+            size=config.DB_POOL_SIZE,
+            timeout=config.DB_POOL_TIMEOUT,
+            idle_timeout=config.DB_POOL_IDLE_TIMEOUT,
+            ping_interval=config.DB_POOL_PING_INTERVAL,
+            host=host,
+            port=port,
+            user=config.DB_USER,
+            password=config.DB_PASSWORD,
+            database=config.DB_NAME
+        )
+        return MySQLUserRepository(pool)
+
+    @property
+    def hashing_pool(self):
+        return self._resource("hashing_pool", lambda: HashingPool(
+            workers=config.PASSWORD_HASH_WORKERS,
+            max_pending=config.PASSWORD_HASH_MAX_PENDING,
+            n=config.PASSWORD_HASH_N,
+            r=config.PASSWORD_HASH_R,
+            p=config.PASSWORD_HASH_P
+        ))
+
+    @property
+    def auth_service(self):
+        return self._resource("auth_service", lambda: AuthService(
+            self.repository,
+            self.hashing_pool,
+            batch_window=config.AUTH_BATCH_WINDOW,
+            max_batch=config.AUTH_MAX_BATCH
+        ))
+
+    @property
+    def user_index(self):
+        return self._resource("user_index", self._create_user_index)
+
+    def _create_user_index(self):
+        index = UserIndex(
+            self.repository,
+            capacity=config.USER_INDEX_CAPACITY,
+            error_rate=config.USER_INDEX_ERROR_RATE,
+            rebuild_interval=config.USER_INDEX_REBUILD_INTERVAL,
+            sync_interval=config.USER_INDEX_SYNC_INTERVAL
+        )
+        index.start_rebuild()
+        return index
+
+    @property
+    def rate_limiters(self):
+        return self._resource("rate_limiters", self._create_rate_limiters)
+
+    def _create_rate_limiters(self):
+        limiters = {}
+        for name, (per_minute, burst) in config.RATE_LIMITS.items():
+            if config.RATE_LIMIT_STORE_URL:
+                limiters[name] = RedisTokenBucketLimiter(
+                    config.RATE_LIMIT_STORE_URL, per_minute / 60, burst, prefix=f"ratelimit:{name}:"
+                )
+            else:
+                limiters[name] = TokenBucketLimiter(per_minute / 60, burst, max_keys=config.RATE_LIMIT_MAX_KEYS)
+        return limiters
+
+    @property
+    def sessions(self):
+        return self._resource("sessions", self._create_sessions)
+
+    def _create_sessions(self):
+        if config.SESSION_STORE_URL:
+            store = RedisSessionStore(config.SESSION_STORE_URL, ttl=config.SESSION_TTL)
+        else:
+            store = MemorySessionStore(ttl=config.SESSION_TTL, max_entries=config.SESSION_MAX_ENTRIES)
+        # Without a configured secret, tokens only stay valid for the life of this process
+        return SessionManager(store, config.SESSION_SECRET or secrets.token_bytes(32))
+
+    @property
+    def user_count_cache(self):
+        return self._resource("user_count_cache", lambda: CachedCounter(
+            self.repository.count_users, ttl=config.USER_COUNT_TTL
+        ))
+
+    @property
+    def profiles(self):
+        """Read-through cache of user_id -> get_profile() row (invalidate a user after editing their row)"""
+        return self._resource("profiles", lambda: LRUCache(
+            self.repository.get_profile, ttl=config.PROFILE_CACHE_TTL, max_entries=config.PROFILE_CACHE_MAX_ENTRIES
+        ))
+
+    @property
+    def recent_logins(self):
+        """casefolded username -> (user id, keyed hash of the password) of recent successful logins"""
+        return self._resource("recent_logins", lambda: LRUCache(
+            None, ttl=config.RECENT_LOGIN_TTL, max_entries=config.RECENT_LOGIN_MAX_ENTRIES
+        ))
+
+    @property
+    def settings(self):
+        return self._resource("settings", lambda: SettingsStore(
+            self.repository, debounce=config.SETTINGS_WRITE_DEBOUNCE, max_delay=config.SETTINGS_WRITE_MAX_DELAY
+        ))
+
+    @property
+    def activity(self):
+        return self._resource("activity", lambda: ActivityLog(
+            self.repository,
+            site_summary_ttl=config.ACTIVITY_SUMMARY_TTL,
+            history_ttl=config.ACTIVITY_HISTORY_TTL,
+            window_days=config.ACTIVITY_WINDOW_DAYS,
+            batch_size=config.ACTIVITY_BATCH_SIZE,
+            flush_interval=config.ACTIVITY_FLUSH_INTERVAL,
+            max_queue=config.ACTIVITY_MAX_QUEUE,
+            put_timeout=config.ACTIVITY_PUT_TIMEOUT,
+            spill_path=config.ACTIVITY_SPILL_PATH or None
+        ))
+
+    def ensure_schema(self):
+        """Bring the schema up to date once per process; errors propagate and the next call retries"""
+        if self._schema_version is None:
+            with self._lock:
+                if self._schema_version is None:
+                    self._schema_version = self.repository.migrate()
+        return self._schema_version
+
+    def close(self):
+        """Stop the hashing worker processes, if they were started (e.g. when an API worker shuts down)"""
+        pool = self._resources.pop("hashing_pool", None)
+        self._resources.pop("auth_service", None)
+        if pool is not None:
+            pool.shutdown()
+
+    def stats(self):
+        """Stats of every resource created so far, by resource name"""
+        stats = {}
+        for name, resource in list(self._resources.items()):
+            if hasattr(resource, "stats"):
+                stats[name] = resource.stats()
+        return stats
+
+    # Auth flows
+
+    def rate_limited(self, *checks):
+        """True if any (limit name, key) check is out of tokens"""
+        if not config.RATE_LIMITS_ENABLED:
+            return False
+        limiters = self.rate_limiters
+        # Check every bucket so each one is charged for the attempt
+        return not all([limiters[name].allow(key) for name, key in checks])
+
+    def register(self, username, email, password, confirm_password, client, first_name="", last_name=""):
+        """Create an account and return its id (raises AuthError)"""
+        first_name, last_name = first_name.strip(), last_name.strip()
+        errors = validate({
+            "username": username,
+            "email": email,
+            "password": password,
+            "confirm_password": confirm_password,
+            "first_name": first_name,
+            "last_name": last_name
+        })
+        if errors:
+            raise AuthError("invalid", errors[0].message)
+
+        if self.rate_limited(("register_client", client)):
+            raise AuthError("rate_limited", "Too many attempts, please wait a minute and try again")
+
+        service = self.auth_service
+        try:
+            user_id = service.call(
+                service.register(username, email, password, first_name, last_name), timeout=config.AUTH_TIMEOUT
+            )
+        except (HashingBusy, BrokenProcessPool, TimeoutError):
+            raise AuthError("busy", "Server is busy, please try again in a moment")
+        except DuplicateUserError as e:
+            if e.field == "username":
+                raise AuthError("duplicate_username", "Username already exists")
+            if e.field == "email":
+                raise AuthError("duplicate_email", "Email already registered")
+            raise AuthError("duplicate", f"Registration error: {e}")
+        except StorageError as e:
+            raise AuthError("storage", f"Database error: {e}")
+
+        self.user_count_cache.incr()
+        self.user_index.add(username, email)
+        self.activity.record(user_id, REGISTER)
+        return user_id
+
+    def login(self, username, password, client):
+        """Check credentials and return the user id (raises AuthError)"""
+        if not username or not password:
+            raise AuthError("missing_credentials", "Please enter username and password")
+
+        if self.rate_limited(("login_user", username.casefold()), ("login_client", client)):
+            raise AuthError("rate_limited", "Too many attempts, please wait a minute and try again")
+
+        user_id = self._recent_login(username, password)
+        if user_id is not None:
+            return user_id
+
+        # Unknown usernames are rejected without a database round-trip
+        if not self.user_index.might_have_username(username):
+            self.activity.record(ALL_USERS, LOGIN_FAILED, username)
+            raise AuthError("invalid_credentials", "Invalid username or password")
+
+        service = self.auth_service
+        try:
+            user_id = service.call(service.authenticate(username, password), timeout=config.AUTH_TIMEOUT)
+        except (HashingBusy, BrokenProcessPool, TimeoutError):
+            raise AuthError("busy", "Server is busy, please try again in a moment")
+        except StorageError as e:
+            raise AuthError("storage", f"Login error: {e}")
+
+        if user_id is None:
+            self.activity.record(ALL_USERS, LOGIN_FAILED, username)
+            raise AuthError("invalid_credentials", "Invalid username or password")
+        if config.RECENT_LOGIN_TTL:
+            self.recent_logins.put(username.casefold(), (user_id, self._password_digest(password)))
+        return user_id
+
+    def _recent_login(self, username, password):
+        """User id if this username logged in with this password within RECENT_LOGIN_TTL, else None"""
+        if not config.RECENT_LOGIN_TTL:
+            return None
+        entry = self.recent_logins.peek(username.casefold())
+        if entry is None or not hmac.compare_digest(entry[1], self._password_digest(password)):
+            return None
+        return entry[0]
+
+    def _password_digest(self, password):
+        return hmac.new(self._login_key, password.encode("utf-8"), hashlib.sha256).digest()
+
+    def profile(self, user_id):
+        """(username, email, created_at, first_name, last_name) for a user, from the shared profile cache"""
+        return self.profiles.get(user_id)
+
+    def user_count(self):
+        """Total registered users (cached; 0 if the database is unreachable)"""
+        try:
+            return self.user_count_cache.get()
+        except StorageError:
+            return 0
+
+    # Sessions
+
+    def start_session(self, username, user_id):
+        """Open a session for a logged-in user and return its token"""
+        token = self.sessions.create(username, user_id)
+        self.activity.record(user_id, LOGIN)
+        return token
+
+    def resolve_session(self, token):
+        """Session data for a valid token (sliding its expiry), else None"""
+        return self.sessions.resolve(token)
+
+    def refresh_session(self, token):
+        """Rotate a valid token; returns (new token, session data) (raises AuthError)"""
+        refreshed = self.sessions.refresh(token)
+        if refreshed is None:
+            raise AuthError("invalid_token", "Session expired or invalid")
+        return refreshed
+
+    def export_ticket(self, user_id):
+        """Credential for one "Download My Data" link to the API (expires after EXPORT_TICKET_TTL)"""
+        return self.sessions.issue_ticket(user_id, "export", config.EXPORT_TICKET_TTL)
+
+    def resolve_export_ticket(self, ticket):
+        """User id an export ticket was issued for, or None if it is forged or expired"""
+        return self.sessions.verify_ticket(ticket, "export")
+
+    def end_session(self, token, user_id):
+        """Log out: record it and revoke the token"""
+        self.activity.record(user_id, LOGOUT)
+        if token is not None:
+            self.sessions.revoke(token)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_core():
+    """The AuthCore every entry point (login.py, task.py, api.py) running in this process uses"""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = AuthCore()
+    return _shared
+
+
+def reset_shared_core():
+    """Drop this process's core so the next shared_core() starts from scratch (pools, caches, schema check)"""
+    global _shared
+    with _shared_lock:
+        core, _shared = _shared, None
+    if core is not None:
+        core.close()
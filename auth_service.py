@@ -0,0 +1,105 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AuthService:
+    """Asyncio auth backend running on its own event loop thread.
+
+    Concurrent credential lookups from many sessions are coalesced into one
+    `SELECT ... WHERE username IN (...)` per batch window, so pending logins
+    cost a future each rather than a thread and a connection each. Storage
+    repositories are synchronous, so each batch query runs on a small executor
+    sized to the repository's concurrency.
+    """
+
+    def __init__(self, repository, hashing_pool, batch_window=0.005, max_batch=200):
+        self.repository = repository
+        self.hashing = hashing_pool
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self._db_executor = ThreadPoolExecutor(max_workers=repository.max_concurrency, thread_name_prefix="auth-db")
+        # casefolded username -> futures waiting on that row (only touched on the loop thread)
+        self._pending = {}
+        self._flush_handle = None
+        self._stats = {"lookups": 0, "batches": 0}
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="auth-service", daemon=True)
+        self._thread.start()
+
+    # Blocking entry point for Streamlit script threads
+
+    def call(self, coro, timeout=None):
+        """Run a coroutine on the service loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    # Async API
+
+    async def lookup(self, username):
+        """Return (id, password_hash) for a username, or None; batched with concurrent lookups"""
+        # The users table compares usernames case-insensitively, so match rows the same way
+        key = username.casefold()
+        future = self.loop.create_future()
+        self._pending.setdefault(key, []).append(future)
+        self._stats["lookups"] += 1
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = self.loop.call_later(self.batch_window, self._flush)
+        return await future
+
+    async def authenticate(self, username, password):
+        """Return the user id for valid credentials, else None; upgrades outdated hashes"""
+        row = await self.lookup(username)
+        if row is None:
+            return None
+        user_id, stored_hash = row
+        if not await asyncio.wrap_future(self.hashing.submit_verify(password, stored_hash)):
+            return None
+        if self.hashing.needs_rehash(stored_hash):
+            new_hash = await asyncio.wrap_future(self.hashing.submit_hash(password))
+            await self.loop.run_in_executor(self._db_executor, self._update_hash, user_id, new_hash)
+        return user_id
+
+    async def register(self, username, email, password, first_name="", last_name=""):
+        """Hash the password and insert the user; returns its id (raises storage.DuplicateUserError if taken)"""
+        password_hash = await asyncio.wrap_future(self.hashing.submit_hash(password))
+        return await self.loop.run_in_executor(
+            self._db_executor, self.repository.insert_user, username, email, password_hash, first_name, last_name
+        )
+
+    def stats(self):
+        """Lookup/batch counters (average batch size = lookups / batches)"""
+        return dict(self._stats)
+
+    # Batching
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            self._stats["batches"] += 1
+            self.loop.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch):
+        try:
+            rows = await self.loop.run_in_executor(self._db_executor, self.repository.find_credentials, list(batch))
+        except Exception as e:
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        for key, futures in batch.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(rows.get(key))
+
+    def _update_hash(self, user_id, password_hash):
+        # Best effort: a failed upgrade must not fail the login
+        try:
+            self.repository.update_password(user_id, password_hash)
+        except Exception:
+            pass
@@ -0,0 +1,17 @@
+"""Streamlit pieces shared by the app scripts (login.py and task.py can't import each other)"""
+import streamlit as st
+
+from auth_core import INPUT_ERRORS, resolve_client
+
+
+def get_client_address():
+    """This browser's address as seen by the rate limits (see TRUSTED_PROXIES)"""
+    return resolve_client(st.context.headers.get("X-Forwarded-For"), getattr(st.context, "ip_address", None))
+
+
+def show_auth_error(error):
+    """Render an AuthError from the core the way the apps report problems"""
+    if error.code in INPUT_ERRORS:
+        st.warning(f"⚠️ {error}")
+    else:
+        st.error(f"❌ {error}")
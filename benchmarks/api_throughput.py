@@ -0,0 +1,193 @@
+"""Requests/s of the JSON auth API (api.py) next to logins/s through the Streamlit UI.
+
+Serves api.py with uvicorn on a throwaway SQLite database, registers --users
+accounts, then drives POST /login, POST /token/refresh and GET /users/count
+from --concurrency keep-alive clients. The UI figure is the same login done
+through login.py's form in headless AppTest sessions, one per login.
+
+    python benchmarks/api_throughput.py --concurrency 32 --ops 2000
+    python benchmarks/api_throughput.py --workers 4 --session-store-url redis://localhost:6379/0
+
+Several --workers share SESSION_SECRET and need a Redis session store.
+
+Rate limits are off and the scrypt cost is lowered (--hash-n) so the numbers
+reflect the serving path, not the KDF.
+"""
+import argparse
+import http.client
+import json
+import os
+import secrets
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/users/count")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("API did not come up")
+
+
+class Client:
+    """One keep-alive connection (so one server worker) per benchmark thread"""
+
+    def __init__(self, port):
+        self.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        self.conn.connect()
+        # Headers and body go out in separate writes; don't let Nagle hold the second one back
+        self.conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.token = None
+
+    def call(self, method, path, body=None):
+        payload = json.dumps(body).encode() if body is not None else None
+        self.conn.request(method, path, body=payload, headers={"Content-Type": "application/json"})
+        response = self.conn.getresponse()
+        return response.status, json.loads(response.read())
+
+
+def run(name, clients, operation, count):
+    """Run operation(client, i) for i in range(count), spread over the clients' threads"""
+
+    def worker(offset):
+        client, latencies = clients[offset], []
+        for i in range(offset, count, len(clients)):
+            started = time.perf_counter()
+            status = operation(client, i)
+            latencies.append(time.perf_counter() - started)
+            assert status < 300, f"{name}: HTTP {status}"
+        return latencies
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(clients)) as pool:
+        latencies = [t for chunk in pool.map(worker, range(len(clients))) for t in chunk]
+    elapsed = time.perf_counter() - started
+    return name, len(latencies), len(latencies) / elapsed, statistics.median(latencies) * 1000
+
+
+def api_scenarios(port, users, count, concurrency):
+    import config
+
+    prefix = f"api{int(time.time())}"
+    clients = [Client(port) for _ in range(concurrency)]
+
+    def register(client, i):
+        return client.call("POST", "/register", {
+            "username": f"{prefix}_{i}", "email": f"{prefix}_{i}@example.com", "password": "secret-pass"
+        })[0]
+
+    def log_in(client, i):
+        status, body = client.call("POST", "/login", {"username": f"{prefix}_{i % users}", "password": "secret-pass"})
+        client.token = body.get("token")
+        return status
+
+    def refresh(client, i):
+        # Each connection rotates the token it was issued, so this works without a shared session store
+        status, body = client.call("POST", "/token/refresh", {"token": client.token})
+        client.token = body.get("token")
+        return status
+
+    results = [run("api.register", clients, register, users)]
+    # Other workers' user indexes pick up the new accounts on their next incremental sync;
+    # reconnect afterwards as the idle connections may have been closed by then
+    time.sleep(config.USER_INDEX_SYNC_INTERVAL + 1)
+    clients = [Client(port) for _ in range(concurrency)]
+    return results + [
+        run("api.login", clients, log_in, count),
+        run("api.token_refresh", clients, refresh, count),
+        run("api.users_count", clients, lambda client, i: client.call("GET", "/users/count")[0], count),
+    ]
+
+
+def ui_logins(count):
+    from streamlit.testing.v1 import AppTest
+
+    import login
+
+    login.init_database()
+    prefix = f"ui{int(time.time())}"
+    for i in range(count):
+        login.register_user(f"{prefix}_{i}", f"{prefix}_{i}@example.com", "secret-pass", "secret-pass")
+
+    latencies = []
+    started = time.perf_counter()
+    for i in range(count):
+        began = time.perf_counter()
+        app = AppTest.from_file(os.path.join(ROOT, "login.py"), default_timeout=60)
+        app.run()
+        app.text_input[0].input(f"{prefix}_{i}")
+        app.text_input[1].input("secret-pass")
+        app.button[0].click().run()
+        assert app.session_state.logged_in
+        latencies.append(time.perf_counter() - began)
+    elapsed = time.perf_counter() - started
+    return "ui.login", count, count / elapsed, statistics.median(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--session-store-url", default=os.environ.get("SESSION_STORE_URL"),
+                        help="redis:// session store shared by the workers (required with --workers > 1)")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent keep-alive clients")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--ops", type=int, default=1000, help="requests per API scenario")
+    parser.add_argument("--ui-ops", type=int, default=20, help="headless UI logins (0 to skip)")
+    parser.add_argument("--hash-n", type=int, default=2 ** 10, help="scrypt N used for the run")
+    args = parser.parse_args()
+    if args.workers > 1 and not args.session_store_url:
+        parser.error("--workers > 1 needs --session-store-url")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        port = free_port()
+        os.environ.update(
+            DB_BACKEND="sqlite",
+            SQLITE_PATH=os.path.join(tmp, "bench.sqlite3"),
+            ACTIVITY_SPILL_PATH="",
+            PASSWORD_HASH_N=str(args.hash_n),
+            RATE_LIMITS_ENABLED="0",
+            AUTH_MIN_RESPONSE_TIME="0",
+            SESSION_SECRET=secrets.token_hex(32),
+        )
+        if args.session_store_url:
+            os.environ["SESSION_STORE_URL"] = args.session_store_url
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "api.py")], cwd=ROOT,
+            env=dict(os.environ, API_PORT=str(port), API_WORKERS=str(args.workers))
+        )
+        try:
+            wait_ready(port)
+            results = api_scenarios(port, args.users, args.ops, args.concurrency)
+        finally:
+            server.terminate()
+            server.wait()
+        if args.ui_ops:
+            results.append(ui_logins(args.ui_ops))
+
+    print(f"{'scenario':<20}{'ops':>7}{'ops/s':>10}{'p50 ms':>9}")
+    for name, ops, throughput, p50 in results:
+        print(f"{name:<20}{ops:>7}{throughput:>10.1f}{p50:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
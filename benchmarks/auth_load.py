@@ -0,0 +1,222 @@
+"""Load test for the auth flows against a local SQLite stand-in.
+
+Two scenarios, both reporting throughput, p50/p95/p99 latency, repository
+round-trips and connections opened:
+
+  functions  login.register_user / login_user / get_user_count called directly
+             from --concurrency threads
+  app        the Register and Login forms of main() driven through Streamlit's
+             AppTest, one headless session per iteration (plus an idle rerun)
+
+Every scenario runs --repeat times and each figure reported is the median
+across those runs, which smooths run-to-run noise.
+
+Results can be saved as a baseline and later compared against it; a slower p95
+(beyond --tolerance and --min-slowdown-ms) or more round-trips per operation
+fails the run. Sub-millisecond concurrent scenarios are gated on p50 instead:
+their p95 is the time spent queued behind the other --concurrency threads on
+few cores (bimodal, and different every run), not the code under test.
+
+    python benchmarks/auth_load.py --save-baseline benchmarks/baseline.json
+    python benchmarks/auth_load.py --compare benchmarks/baseline.json
+
+benchmarks/baseline.json is committed; its "machine" field says where it was
+recorded. Round-trip counts carry over between machines, latencies don't:
+re-save the baseline on your own hardware before trusting a p95 comparison.
+
+Rate limits and the minimum response time are switched off and the scrypt
+cost is lowered (--hash-n) so the numbers reflect the app path, not the KDF.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOGIN_SCRIPT = os.path.join(ROOT, "login.py")
+
+
+def configure(db_path, hash_n):
+    # Must happen before login.py is imported or run; its settings are read at import
+    os.environ.update(
+        DB_BACKEND="sqlite",
+        SQLITE_PATH=db_path,
+        PASSWORD_HASH_N=str(hash_n),
+        RATE_LIMITS_ENABLED="0",
+        AUTH_MIN_RESPONSE_TIME="0",
+    )
+    sys.path.insert(0, ROOT)
+
+
+def summarize(name, latencies, elapsed, queries, connections, gate="p95_ms"):
+    ordered = sorted(latencies)
+    cuts = statistics.quantiles(ordered, n=100, method="inclusive") if len(ordered) > 1 else ordered * 99
+    return {
+        "name": name,
+        "ops": len(ordered),
+        "throughput": len(ordered) / elapsed if elapsed else 0.0,
+        "p50_ms": cuts[49] * 1000,
+        "p95_ms": cuts[94] * 1000,
+        "p99_ms": cuts[98] * 1000,
+        "queries_per_op": queries / len(ordered),
+        "connections": connections,
+        "gate": gate,
+    }
+
+
+def measure(name, operation, count, concurrency=1, gate="p95_ms"):
+    """Run operation(i) for i in range(count) and collect latency and DB counters; `gate` is the latency compared"""
+    import storage
+
+    def timed(i):
+        started = time.perf_counter()
+        operation(i)
+        return time.perf_counter() - started
+
+    queries = storage.COUNTERS["queries"]
+    connections = storage.COUNTERS["connections"]
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as workers:
+            latencies = list(workers.map(timed, range(count)))
+    else:
+        latencies = [timed(i) for i in range(count)]
+    elapsed = time.perf_counter() - started
+    return summarize(
+        name, latencies, elapsed,
+        storage.COUNTERS["queries"] - queries,
+        storage.COUNTERS["connections"] - connections,
+        gate,
+    )
+
+
+def function_scenarios(count, concurrency, run=0):
+    import login
+
+    login.init_database()
+    prefix = f"fn{int(time.time())}r{run}"
+    results = [
+        measure("fn.register_user", lambda i: login.register_user(
+            f"{prefix}_{i}", f"{prefix}_{i}@example.com", "secret-pass", "secret-pass"), count, concurrency),
+        measure("fn.login_user", lambda i: login.login_user(f"{prefix}_{i}", "secret-pass"), count, concurrency),
+        measure("fn.login_user_unknown", lambda i: login.login_user(f"nobody_{prefix}_{i}", "secret-pass"),
+                count, concurrency, gate="p50_ms"),
+        measure("fn.get_user_count", lambda i: login.get_user_count(), count * 10, concurrency, gate="p50_ms"),
+    ]
+    return results
+
+
+def app_scenarios(count, run=0):
+    from streamlit.testing.v1 import AppTest
+
+    prefix = f"app{int(time.time())}r{run}"
+
+    def new_session():
+        app = AppTest.from_file(LOGIN_SCRIPT, default_timeout=60)
+        app.run()
+        return app
+
+    def register(i):
+        app = new_session()
+        app.sidebar.radio[0].set_value("📝 Register").run()
+        for field, value in zip(app.text_input, [f"{prefix}_{i}", f"{prefix}_{i}@example.com", "secret-pass", "secret-pass"]):
+            field.input(value)
+        app.button[0].click().run()
+        assert not app.exception, app.exception
+
+    def log_in(i):
+        app = new_session()
+        app.text_input[0].input(f"{prefix}_{i}")
+        app.text_input[1].input("secret-pass")
+        app.button[0].click().run()
+        assert app.session_state.logged_in, [e.value for e in app.error]
+
+    idle = new_session()
+    return [
+        measure("app.register", register, count),
+        measure("app.login", log_in, count),
+        measure("app.idle_rerun", lambda i: idle.run(), count),
+    ]
+
+
+def median_results(runs):
+    """Per scenario, the median of every figure across repeated runs"""
+    merged = []
+    for entries in zip(*runs):
+        merged.append({
+            key: entries[0][key] if key in ("name", "gate") else statistics.median(entry[key] for entry in entries)
+            for key in entries[0]
+        })
+    return merged
+
+
+def compare(results, baseline_path, tolerance, min_slowdown_ms, query_slack):
+    with open(baseline_path) as f:
+        baseline = {entry["name"]: entry for entry in json.load(f)["results"]}
+    failures = []
+    for result in results:
+        base = baseline.get(result["name"])
+        if base is None:
+            continue
+        gate = result["gate"]
+        allowed = max(base[gate] * (1 + tolerance), base[gate] + min_slowdown_ms)
+        if result[gate] > allowed:
+            failures.append(f"{result['name']}: {gate[:3]} {result[gate]:.2f}ms vs baseline {base[gate]:.2f}ms")
+        if result["queries_per_op"] > base["queries_per_op"] + query_slack:
+            failures.append(
+                f"{result['name']}: {result['queries_per_op']:.2f} queries/op vs baseline {base['queries_per_op']:.2f}"
+            )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=200, help="operations per function scenario")
+    parser.add_argument("--app-ops", type=int, default=20, help="headless sessions per app scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--hash-n", type=int, default=2 ** 10, help="scrypt N used for the run")
+    parser.add_argument("--skip-app", action="store_true", help="only run the function scenarios")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scenario; figures are medians across runs")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--compare", metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 (or p50) slowdown vs baseline")
+    parser.add_argument("--min-slowdown-ms", type=float, default=1.0,
+                        help="slowdowns smaller than this are treated as noise")
+    parser.add_argument("--query-slack", type=float, default=0.25,
+                        help="allowed extra queries/op (concurrent lookups coalesce differently run to run)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure(os.path.join(tmp, "bench.sqlite3"), args.hash_n)
+        runs = []
+        for run in range(args.repeat):
+            results = function_scenarios(args.ops, args.concurrency, run)
+            if not args.skip_app:
+                results += app_scenarios(args.app_ops, run)
+            runs.append(results)
+        results = median_results(runs)
+
+    print(f"{'scenario':<24}{'ops':>6}{'ops/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'q/op':>7}{'conns':>7}")
+    for r in results:
+        print(f"{r['name']:<24}{r['ops']:>6}{r['throughput']:>10.1f}{r['p50_ms']:>9.2f}"
+              f"{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['queries_per_op']:>7.2f}{r['connections']:>7}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            machine = f"{platform.platform()}, {os.cpu_count()} CPUs, Python {platform.python_version()}"
+            json.dump({"hash_n": args.hash_n, "repeat": args.repeat, "machine": machine, "results": results}, f, indent=2)
+    if args.compare:
+        failures = compare(results, args.compare, args.tolerance, args.min_slowdown_ms, args.query_slack)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Throughput and peak memory of the streaming "Download My Data" export.
+
+Fills a throwaway SQLite database with one user and N activity events per
+size, then drains export.iter_export() for each format, reporting MB/s,
+events/s and the peak Python heap growth (tracemalloc) while streaming. Peak
+memory should stay flat as the history grows; export_bytes() (the Streamlit
+button's buffered fallback when EXPORT_URL isn't set) is measured too for comparison.
+
+    python benchmarks/export_throughput.py --sizes 10000 100000 500000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import LRUCache  # noqa: E402
+from export import FORMATS, export_bytes, iter_export  # noqa: E402
+from storage import SQLiteUserRepository  # noqa: E402
+from user_settings import SettingsStore  # noqa: E402
+
+
+def populate(repository, events, batch=10000):
+    user_id = repository.insert_user("exporter", "exporter@example.com", "x")
+    pages = ["home", "profile", "dashboard", "settings"]
+    for start in range(0, events, batch):
+        repository.record_events([
+            (user_id, "page_view", pages[i % len(pages)], f"2026-01-{1 + i % 28:02d} {i % 24:02d}:00:00")
+            for i in range(start, min(events, start + batch))
+        ])
+    return user_id
+
+
+def measure(consume):
+    # Timed run first: tracemalloc slows allocation-heavy code several times over
+    started = time.perf_counter()
+    size = consume()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    consume()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'events':>8} {'format':>7} {'mode':>7} {'MB':>8} {'MB/s':>8} {'events/s':>11} {'peak KiB':>10}")
+    for events in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            repository = SQLiteUserRepository(os.path.join(tmp, "export.sqlite3"))
+            repository.migrate()
+            user_id = populate(repository, events)
+            profiles = LRUCache(repository.get_profile)
+            settings = SettingsStore(repository)
+
+            for fmt in FORMATS:
+                def stream():
+                    return sum(len(chunk) for chunk in iter_export(fmt, user_id, profiles, settings, repository))
+
+                def buffered():
+                    return len(export_bytes(iter_export(fmt, user_id, profiles, settings, repository)))
+
+                for mode, consume in (("stream", stream), ("buffer", buffered)):
+                    size, elapsed, peak = measure(consume)
+                    print(f"{events:>8} {fmt:>7} {mode:>7} {size / 1e6:>8.2f} {size / 1e6 / elapsed:>8.1f} "
+                          f"{events / elapsed:>11.0f} {peak / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
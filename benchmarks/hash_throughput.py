@@ -0,0 +1,54 @@
+"""Report password verifications/sec (total and per core) at several scrypt cost settings.
+
+    python benchmarks/hash_throughput.py --seconds 3 --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passwords import HashingPool, hash_password  # noqa: E402
+
+COST_SETTINGS = [2 ** 12, 2 ** 13, 2 ** 14, 2 ** 15, 2 ** 16]
+
+
+def measure(pool, stored, seconds):
+    """Drive the pool from one client thread per worker until `seconds` elapse"""
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        count = 0
+        while time.perf_counter() < deadline:
+            assert pool.verify("correct horse", stored)
+            count += 1
+        return count
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=pool.workers) as clients:
+        done = sum(clients.map(lambda _: client(), range(pool.workers)))
+    return done / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--r", type=int, default=8)
+    parser.add_argument("--p", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'n':>8} {'r':>3} {'p':>3} {'verif/s':>10} {'verif/s/core':>13}")
+    for n in COST_SETTINGS:
+        stored = hash_password("correct horse", n=n, r=args.r, p=args.p)
+        pool = HashingPool(workers=args.workers, max_pending=args.workers, n=n, r=args.r, p=args.p)
+        pool.verify("correct horse", stored)  # start the worker processes
+        rate = measure(pool, stored, args.seconds)
+        pool.shutdown()
+        print(f"{n:>8} {args.r:>3} {args.p:>3} {rate:>10.1f} {rate / args.workers:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
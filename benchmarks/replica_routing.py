@@ -0,0 +1,119 @@
+"""Where reads land with read replicas configured (replicas.ReplicaRouter).
+
+Registers --users accounts through AuthCore and logs each one in straight
+away (read-your-writes), then reads every profile and the user count
+--rounds times, printing the router's counters after each phase.
+
+By default the primary is a throwaway SQLite file and the replicas are copies
+of it refreshed every --copy-interval seconds, so they trail the primary like
+real replicas. To run against real servers instead (e.g. two local MySQL
+instances with replication set up), export DB_HOST/DB_PORT and DB_REPLICAS
+and pass --backend mysql.
+
+    python benchmarks/replica_routing.py --replicas 2 --users 200
+    DB_PORT=3306 DB_REPLICAS=127.0.0.1:3307 python benchmarks/replica_routing.py --backend mysql
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROUTING_STATS = ("primary_reads", "replica_reads", "sticky_reads", "rechecks", "failovers", "healthy_replicas")
+
+
+def copy_once(primary_path, replica_paths):
+    source = sqlite3.connect(primary_path)
+    for path in replica_paths:
+        target = sqlite3.connect(path)
+        source.backup(target)
+        target.close()
+    source.close()
+
+
+def copy_forever(primary_path, replica_paths, interval, stop):
+    """Poor man's replication: snapshot the primary into each replica file every `interval` seconds"""
+    while not stop.wait(interval):
+        copy_once(primary_path, replica_paths)
+
+
+def report(phase, core, started):
+    stats = core.repository.stats()
+    counters = " ".join(f"{name}={stats.get(name, 0)}" for name in ROUTING_STATS)
+    print(f"{phase:<10} {time.perf_counter() - started:>7.2f}s  {counters}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["sqlite", "mysql"], default="sqlite")
+    parser.add_argument("--replicas", type=int, default=2, help="sqlite replica copies")
+    parser.add_argument("--copy-interval", type=float, default=1.0, help="seconds between sqlite replica refreshes")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5, help="passes of profile + count reads")
+    parser.add_argument("--hash-n", type=int, default=2 ** 10, help="scrypt N used for the run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update(
+            DB_BACKEND=args.backend,
+            PASSWORD_HASH_N=str(args.hash_n),
+            RATE_LIMITS_ENABLED="0",
+            ACTIVITY_SPILL_PATH="",
+        )
+        stop = threading.Event()
+        if args.backend == "sqlite":
+            primary_path = os.path.join(tmp, "primary.sqlite3")
+            replica_paths = [os.path.join(tmp, f"replica{i}.sqlite3") for i in range(args.replicas)]
+            os.environ.update(SQLITE_PATH=primary_path, SQLITE_REPLICA_PATHS=",".join(replica_paths))
+
+        sys.path.insert(0, ROOT)
+        import config
+        from auth_core import AuthCore
+
+        core = AuthCore()
+        core.ensure_schema()
+        if args.backend == "sqlite":
+            copy_once(primary_path, replica_paths)
+            threading.Thread(
+                target=copy_forever, args=(primary_path, replica_paths, args.copy_interval, stop), daemon=True
+            ).start()
+        # Let the monitor's first probe mark the replicas healthy
+        time.sleep(config.DB_REPLICA_CHECK_INTERVAL + 0.5)
+
+        prefix = f"rr{int(time.time())}"
+        started = time.perf_counter()
+        user_ids = []
+        failed_logins = 0
+        for i in range(args.users):
+            username = f"{prefix}_{i}"
+            user_ids.append(core.register(username, f"{username}@example.com", "secret-pass", "secret-pass", "bench"))
+            try:
+                core.login(username, "secret-pass", "bench")
+            except Exception:
+                failed_logins += 1
+        report("register", core, started)
+        print(f"{'':<10} logins right after registering: {args.users - failed_logins}/{args.users} succeeded")
+
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            for user_id in user_ids:
+                core.repository.get_profile(user_id)
+            core.repository.count_users()
+        report("reads", core, started)
+
+        # Once the sticky window (counted from the last write-behind activity flush) has passed,
+        # the same reads move to the replicas
+        time.sleep(config.DB_READ_YOUR_WRITES + config.ACTIVITY_FLUSH_INTERVAL + 1)
+        started = time.perf_counter()
+        for user_id in user_ids:
+            core.repository.get_profile(user_id)
+        report("later", core, started)
+        stop.set()
+        core.activity.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Measure MySQL round-trips and new connections per rerun of login.py.
+
+Drives the app headlessly with Streamlit's AppTest and samples the server's
+global `Questions` / `Connections` counters around a batch of reruns, so run
+it against an otherwise idle MySQL instance.
+
+    python benchmarks/rerun_roundtrips.py --reruns 50
+    python benchmarks/rerun_roundtrips.py --reruns 50 --no-cache   # clear process caches each rerun
+"""
+import argparse
+import os
+import sys
+
+import mysql.connector
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import config  # noqa: E402
+from auth_core import reset_shared_core  # noqa: E402
+
+
+def server_counters(conn):
+    cursor = conn.cursor()
+    cursor.execute("SHOW GLOBAL STATUS WHERE Variable_name IN ('Questions', 'Connections')")
+    counters = {name: int(value) for name, value in cursor.fetchall()}
+    cursor.close()
+    return counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=50)
+    parser.add_argument("--no-cache", action="store_true",
+                        help="drop the process's caches and auth core before every rerun (connect + DDL each time)")
+    args = parser.parse_args()
+
+    monitor = mysql.connector.connect(
+        host=config.DB_HOST, user=config.DB_USER, password=config.DB_PASSWORD, database=config.DB_NAME
+    )
+    app = AppTest.from_file(os.path.join(ROOT, "login.py"), default_timeout=30)
+    app.run()  # warm-up: first run bootstraps the schema and fills the pool
+
+    before = server_counters(monitor)
+    for _ in range(args.reruns):
+        if args.no_cache:
+            # Session state is kept; only process-wide caches (pool, schema bootstrap) are dropped
+            st.cache_resource.clear()
+            reset_shared_core()
+        app.run()
+    after = server_counters(monitor)
+
+    # The monitoring SHOW itself counts as one question per sample
+    questions = after["Questions"] - before["Questions"] - 1
+    connections = after["Connections"] - before["Connections"]
+    print(f"reruns:               {args.reruns}")
+    print(f"round-trips / rerun:  {questions / args.reruns:.2f}")
+    print(f"connections / rerun:  {connections / args.reruns:.2f}")
+    monitor.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Cold-start cost of the Streamlit app: import time and first-render time.
+
+Each sample runs in a fresh interpreter (so nothing is in sys.modules or the
+st.cache_resource caches) against a throwaway SQLite database and reports:
+
+  import.streamlit   importing streamlit itself (the floor we can't change)
+  import.app         the app's own modules on top of streamlit
+  render.first       AppTest's first run of login.py (cold caches, schema check)
+  render.rerun       a second run of the same session (warm caches)
+
+Results can be saved as a baseline and compared later; a median more than
+--tolerance slower than the baseline fails the run.
+
+    python benchmarks/startup_time.py --samples 5 --save-baseline benchmarks/startup.json
+    python benchmarks/startup_time.py --compare benchmarks/startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints one JSON object of timings (seconds)
+PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+import streamlit
+imported_streamlit = time.perf_counter()
+import activity, auth_core, cache, metrics, storage, templating, user_settings
+imported_app = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({script!r}, default_timeout=60)
+began = time.perf_counter()
+app.run()
+first = time.perf_counter()
+app.run()
+rerun = time.perf_counter()
+assert not app.exception, app.exception
+print(json.dumps({{
+    "import.streamlit": imported_streamlit - started,
+    "import.app": imported_app - imported_streamlit,
+    "render.first": first - began,
+    "render.rerun": rerun - first,
+}}))
+"""
+
+
+def sample(db_path):
+    env = dict(
+        os.environ,
+        DB_BACKEND="sqlite",
+        SQLITE_PATH=db_path,
+        ACTIVITY_SPILL_PATH="",
+    )
+    code = PROBE.format(root=ROOT, script=os.path.join(ROOT, "login.py"))
+    output = subprocess.run(
+        [sys.executable, "-c", code], env=env, cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=5, help="fresh interpreters to time")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--compare", metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed median slowdown vs baseline")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = [sample(os.path.join(tmp, "startup.sqlite3")) for _ in range(args.samples)]
+
+    results = {
+        name: {"median_ms": statistics.median(run[name] for run in runs) * 1000,
+               "min_ms": min(run[name] for run in runs) * 1000}
+        for name in runs[0]
+    }
+    print(f"{'phase':<20}{'median ms':>11}{'min ms':>9}")
+    for name, result in results.items():
+        print(f"{name:<20}{result['median_ms']:>11.1f}{result['min_ms']:>9.1f}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        failures = [
+            f"{name}: {result['median_ms']:.1f}ms vs baseline {baseline[name]['median_ms']:.1f}ms"
+            for name, result in results.items()
+            if name in baseline and result["median_ms"] > baseline[name]["median_ms"] * (1 + args.tolerance)
+        ]
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""Micro-benchmark for validation.py: records validated per second, one at a time vs. column-wise.
+
+validate_batch() picks whichever of the two is faster for the batch size
+(see validation.FRAME_MIN_RECORDS).
+
+    python benchmarks/validation_throughput.py --records 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+from validation import FRAME_MIN_RECORDS, validate, validate_batch, validate_frame  # noqa: E402
+
+
+def make_records(count, seed=0):
+    """Mostly valid registrations with a sprinkling of each failure type"""
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        record = {
+            "username": f"student{i}",
+            "email": f"student{i}@school.edu",
+            "password": "s3cret-pass",
+            "confirm_password": "s3cret-pass",
+        }
+        roll = rng.random()
+        if roll < 0.05:
+            record["email"] = "not-an-email"
+        elif roll < 0.08:
+            record["username"] = "ab"
+        elif roll < 0.10:
+            record["confirm_password"] = "typo"
+        records.append(record)
+    return records
+
+
+def rate(fn, count):
+    started = time.perf_counter()
+    fn()
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=100_000)
+    args = parser.parse_args()
+
+    records = make_records(args.records)
+    validate_frame(pd.DataFrame.from_records(records[:10]))  # warm up pandas outside the timed region
+
+    single = rate(lambda: [validate(record) for record in records], len(records))
+    frame = rate(lambda: validate_frame(pd.DataFrame.from_records(records)), len(records))
+    batched = rate(lambda: validate_batch(records), len(records))
+    print(f"records:            {args.records}")
+    print(f"validate():         {single:>12,.0f} records/sec")
+    print(f"validate_frame():   {frame:>12,.0f} records/sec")
+    print(f"validate_batch():   {batched:>12,.0f} records/sec  (column-wise from {FRAME_MIN_RECORDS:,} records)")
+
+
+if __name__ == "__main__":
+    main()
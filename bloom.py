@@ -0,0 +1,188 @@
+import hashlib
+import math
+import threading
+import time
+import unicodedata
+
+
+def normalize(value):
+    """Fold a username/email the way the users table's accent- and case-insensitive collation compares it"""
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold().rstrip(" ")
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter: no false negatives, ~`error_rate` false positives at `capacity` items"""
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _positions(self, item):
+        # Double hashing (Kirsch-Mitzenmacher) from one 128-bit digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, item):
+        positions = self._positions(item)
+        # Byte-level read-modify-write: concurrent adds must not drop each other's bits
+        with self._lock:
+            for pos in positions:
+                self._bits[pos >> 3] |= 1 << (pos & 7)
+            self.count += 1
+
+    def __contains__(self, item):
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def estimated_false_positive_rate(self):
+        """Expected false-positive rate at the current fill level"""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+    def memory_bytes(self):
+        return len(self._bits)
+
+
+class UserIndex:
+    """Bloom filters over users.username and users.email for answering 'definitely absent' without a query.
+
+    Built by a background streaming scan; until the first build finishes every
+    name counts as possibly present. Before a lookup answers 'absent', rows
+    added by other processes are picked up by an indexed `id > last_seen`
+    catch-up query, run at most once per `sync_interval` for all callers (the
+    rest wait for an in-flight one or reuse the last). If that query fails the
+    answer is 'maybe'. So a name registered through another process can be
+    reported absent for at most `sync_interval` seconds; names added through
+    this index (add()) are seen at once. The whole index is rebuilt every
+    `rebuild_interval` seconds.
+    """
+
+    def __init__(self, repository, capacity=100000, error_rate=0.01, rebuild_interval=3600, sync_interval=1.0,
+                 scan_batch=10000):
+        self.repository = repository
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.rebuild_interval = rebuild_interval
+        self.sync_interval = sync_interval
+        self.scan_batch = scan_batch
+        self._usernames = None
+        self._emails = None
+        self._max_id = 0
+        self._next_rebuild = 0.0
+        self._last_sync = 0.0
+        self._rebuilding = False
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._stats = {"lookups": 0, "negatives": 0, "syncs": 0, "rebuilds": 0}
+
+    def might_have_username(self, username, catch_up=True):
+        """False only if the username is definitely not registered (catch_up=False: as of the last sync)"""
+        return self._lookup("_usernames", username, catch_up)
+
+    def might_have_email(self, email, catch_up=True):
+        """False only if the email is definitely not registered (catch_up=False: as of the last sync)"""
+        return self._lookup("_emails", email, catch_up)
+
+    def sync(self):
+        """Pick up every row committed before this call (e.g. once per bulk batch); False if the query failed"""
+        return self._sync(max_age=0.0)
+
+    def add(self, username, email):
+        """Record a newly registered user (the row's id is picked up by the next sync)"""
+        usernames, emails = self._usernames, self._emails
+        if usernames is not None:
+            usernames.add(normalize(username))
+            emails.add(normalize(email))
+
+    def stats(self):
+        """Lookup counters plus size, memory and estimated false-positive rate"""
+        stats = dict(self._stats)
+        usernames, emails = self._usernames, self._emails
+        if usernames is not None:
+            stats.update(
+                entries=usernames.count,
+                memory_bytes=usernames.memory_bytes() + emails.memory_bytes(),
+                username_fpr=usernames.estimated_false_positive_rate(),
+                email_fpr=emails.estimated_false_positive_rate(),
+            )
+        return stats
+
+    def start_rebuild(self):
+        """Rebuild the filters on a background thread (no-op if one is already running)"""
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+            self._next_rebuild = time.monotonic() + self.rebuild_interval
+        threading.Thread(target=self.rebuild, name="user-index-rebuild", daemon=True).start()
+
+    def _lookup(self, attr, value, catch_up=True):
+        self._stats["lookups"] += 1
+        if time.monotonic() >= self._next_rebuild:
+            self.start_rebuild()
+        current = getattr(self, attr)
+        if current is None:
+            return True
+        key = normalize(value)
+        if key in current:
+            return True
+        # Before answering 'absent', include rows added elsewhere up to sync_interval ago
+        if catch_up and not self._sync(self.sync_interval):
+            return True
+        if key in getattr(self, attr):
+            return True
+        self._stats["negatives"] += 1
+        return False
+
+    def rebuild(self):
+        """Rebuild both filters from a streaming scan of the users table (blocking)"""
+        try:
+            rows, max_id = self.repository.count_and_max_id()
+            # Leave headroom for growth until the next rebuild
+            size = max(self.capacity, rows * 2)
+            usernames = BloomFilter(size, self.error_rate)
+            emails = BloomFilter(size, self.error_rate)
+            for username, email in self.repository.iter_usernames_emails(max_id, self.scan_batch):
+                usernames.add(normalize(username))
+                emails.add(normalize(email))
+            with self._sync_lock:
+                self._usernames, self._emails, self._max_id = usernames, emails, max_id
+                self._last_sync = 0.0
+            self._next_rebuild = time.monotonic() + self.rebuild_interval
+            self._stats["rebuilds"] += 1
+            # Catch rows inserted while the scan ran
+            self._sync(max_age=0.0)
+        except Exception:
+            # Keep serving from the previous filters (or 'maybe' for everything); retry soon
+            with self._lock:
+                self._next_rebuild = time.monotonic() + min(60, self.rebuild_interval)
+        finally:
+            with self._lock:
+                self._rebuilding = False
+
+    def _sync(self, max_age):
+        """Add rows inserted since the last sync unless one started under `max_age` seconds before this call"""
+        requested = time.monotonic()
+        # Single flight: callers queue on the lock, and a sync that started recently enough
+        # (after this call, for max_age=0) already saw the rows they care about
+        with self._sync_lock:
+            if self._last_sync > requested - max_age:
+                return True
+            started = time.monotonic()
+            try:
+                for user_id, username, email in self.repository.users_after(self._max_id):
+                    self._usernames.add(normalize(username))
+                    self._emails.add(normalize(email))
+                    self._max_id = max(self._max_id, user_id)
+            except Exception:
+                return False
+            self._last_sync = started
+            self._stats["syncs"] += 1
+            return True
@@ -0,0 +1,201 @@
+"""Bulk user registration from a CSV file.
+
+Streams the CSV through the same rules as the Register form and inserts
+valid rows with batched multi-row INSERTs, reporting every row's outcome.
+
+    python bulk_register.py students.csv --batch-size 1000 --report report.csv
+
+The CSV needs `username`, `email` and `password` columns. Note that each
+password still goes through the configured scrypt cost, which bounds rows/sec
+on small machines; --workers sets the number of hashing processes.
+"""
+import argparse
+import csv
+import sys
+import time
+from itertools import islice
+
+import config
+from auth_core import AuthCore
+from bloom import UserIndex
+from passwords import HashingPool
+from storage import DuplicateUserError, StorageError
+from validation import validate_batch
+
+CREATED = "created"
+DUPLICATE_USERNAME = "duplicate username"
+DUPLICATE_EMAIL = "duplicate email"
+
+
+def register_users_bulk(rows, repository, hashing_pool, batch_size=1000, index=None):
+    """Register an iterable of {'username', 'email', 'password'} dicts.
+
+    Yields (row_number, username, status) for every input row, where status is
+    CREATED, DUPLICATE_USERNAME, DUPLICATE_EMAIL or a validation message. With a
+    bloom.UserIndex, rows whose username and email are definitely free skip
+    the existing-user query.
+    """
+    numbered = enumerate(rows, start=1)
+    while True:
+        batch = list(islice(numbered, batch_size))
+        if not batch:
+            return
+        yield from _register_batch(batch, repository, hashing_pool, index)
+
+
+def _register_batch(batch, repository, hashing_pool, index):
+    results = {}
+    candidates = []
+    seen_usernames = set()
+    seen_emails = set()
+
+    # Validation (column-wise over the whole batch) and duplicates within the batch itself
+    records = [
+        {
+            "username": (row.get("username") or "").strip(),
+            "email": (row.get("email") or "").strip(),
+            "password": row.get("password") or "",
+        }
+        for _, row in batch
+    ]
+    for record in records:
+        record["confirm_password"] = record["password"]
+    for (number, _), record, error in zip(batch, records, validate_batch(records)):
+        username, email = record["username"], record["email"]
+        if error is not None:
+            results[number] = error.message
+        elif username.casefold() in seen_usernames:
+            results[number] = DUPLICATE_USERNAME
+        elif email.casefold() in seen_emails:
+            results[number] = DUPLICATE_EMAIL
+        else:
+            seen_usernames.add(username.casefold())
+            seen_emails.add(email.casefold())
+            candidates.append((number, username, email, record["password"]))
+
+    if candidates:
+        candidates = _drop_existing(candidates, results, repository, index)
+    if candidates:
+        hashes = _hash_all([password for _, _, _, password in candidates], hashing_pool)
+        _insert(
+            [(number, username, email, password_hash)
+             for (number, username, email, _), password_hash in zip(candidates, hashes)],
+            results, repository
+        )
+        if index is not None:
+            for number, username, email, _ in candidates:
+                if results[number] == CREATED:
+                    index.add(username, email)
+
+    for number, row in batch:
+        yield number, row.get("username"), results[number]
+
+
+def _drop_existing(candidates, results, repository, index=None):
+    """One query per batch to find usernames/emails that are already taken"""
+    # One catch-up per batch, then plain filter membership tests (a failed catch-up checks every row)
+    if index is not None and index.sync():
+        maybe_taken = [
+            candidate for candidate in candidates
+            if index.might_have_username(candidate[1], catch_up=False)
+            or index.might_have_email(candidate[2], catch_up=False)
+        ]
+    else:
+        maybe_taken = candidates
+    if not maybe_taken:
+        return candidates
+    usernames = [username for _, username, _, _ in maybe_taken]
+    emails = [email for _, _, email, _ in maybe_taken]
+    taken = repository.find_taken(usernames, emails)
+
+    taken_usernames = {username.casefold() for username, _ in taken}
+    taken_emails = {email.casefold() for _, email in taken}
+    remaining = []
+    for candidate in candidates:
+        number, username, email, _ = candidate
+        if username.casefold() in taken_usernames:
+            results[number] = DUPLICATE_USERNAME
+        elif email.casefold() in taken_emails:
+            results[number] = DUPLICATE_EMAIL
+        else:
+            remaining.append(candidate)
+    return remaining
+
+
+def _hash_all(passwords, hashing_pool):
+    """Hash in chunks that fit the pool's queue-depth limit"""
+    hashes = []
+    step = hashing_pool.max_pending
+    for start in range(0, len(passwords), step):
+        futures = [hashing_pool.submit_hash(password) for password in passwords[start:start + step]]
+        hashes.extend(future.result() for future in futures)
+    return hashes
+
+
+def _insert(rows, results, repository):
+    try:
+        repository.insert_users([(username, email, password_hash) for _, username, email, password_hash in rows])
+        for number, _, _, _ in rows:
+            results[number] = CREATED
+    except DuplicateUserError:
+        # Someone registered one of these names since _drop_existing; fall back to row-by-row
+        for number, username, email, password_hash in rows:
+            try:
+                repository.insert_user(username, email, password_hash)
+                results[number] = CREATED
+            except DuplicateUserError as e:
+                results[number] = DUPLICATE_EMAIL if e.field == "email" else DUPLICATE_USERNAME
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Register users in bulk from a CSV file")
+    parser.add_argument("csv_file")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None, help="hashing processes (default: CPU count)")
+    parser.add_argument("--report", help="write per-row results to this CSV file (default: stdout)")
+    args = parser.parse_args()
+
+    # Same backend selection (DB_BACKEND) as the app
+    core = AuthCore()
+    repository = core.repository
+    core.ensure_schema()
+    hashing_pool = HashingPool(
+        workers=args.workers,
+        max_pending=args.batch_size,
+        n=config.PASSWORD_HASH_N,
+        r=config.PASSWORD_HASH_R,
+        p=config.PASSWORD_HASH_P
+    )
+    # Lets rows with clearly unused names/emails skip the existing-user query
+    index = UserIndex(repository, capacity=config.USER_INDEX_CAPACITY, error_rate=config.USER_INDEX_ERROR_RATE)
+    index.rebuild()
+    report_file = open(args.report, "w", newline="") if args.report else sys.stdout
+    counts = {}
+    started = time.perf_counter()
+    try:
+        writer = csv.writer(report_file)
+        writer.writerow(["row", "username", "status"])
+        with open(args.csv_file, newline="") as source:
+            for number, username, status in register_users_bulk(
+                csv.DictReader(source), repository, hashing_pool, batch_size=args.batch_size, index=index
+            ):
+                writer.writerow([number, username, status])
+                counts[status] = counts.get(status, 0) + 1
+    except StorageError as e:
+        print(f"Database error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if report_file is not sys.stdout:
+            report_file.close()
+        hashing_pool.shutdown()
+
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    print(f"{total} rows in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.0f} rows/sec)", file=sys.stderr)
+    for status, count in sorted(counts.items()):
+        print(f"  {status}: {count}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
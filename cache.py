@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class CachedCounter:
+    """Process-wide counter loaded at most once per TTL, with a single in-flight refresh"""
+
+    def __init__(self, loader, ttl=60.0):
+        self.loader = loader
+        self.ttl = ttl
+        self._cond = threading.Condition()
+        self._value = None
+        self._expires = 0.0
+        self._refreshing = False
+
+    def get(self):
+        """Return the cached value, refreshing it from the loader once it is older than `ttl`"""
+        with self._cond:
+            while True:
+                if self._value is not None and time.monotonic() < self._expires:
+                    return self._value
+                if not self._refreshing:
+                    self._refreshing = True
+                    break
+                # Someone else is refreshing: serve the stale value, or wait if there is none yet
+                if self._value is not None:
+                    return self._value
+                self._cond.wait()
+
+        try:
+            value = self.loader()
+        except BaseException:
+            with self._cond:
+                self._refreshing = False
+                self._cond.notify_all()
+            raise
+
+        with self._cond:
+            # Increments that raced with the load may be lost; the TTL bounds that drift
+            self._value = value
+            self._expires = time.monotonic() + self.ttl
+            self._refreshing = False
+            self._cond.notify_all()
+            return value
+
+    def incr(self, amount=1):
+        """Adjust the cached value in place (e.g. after a successful insert)"""
+        with self._cond:
+            if self._value is not None:
+                self._value += amount
+
+    def invalidate(self):
+        """Force the next get() to reload"""
+        with self._cond:
+            self._expires = 0.0
+
+
+class LRUCache:
+    """Read-through per-key cache: entries expire after `ttl`, least recently used evicted past `max_entries`"""
+
+    def __init__(self, loader, ttl=300.0, max_entries=10000):
+        self.loader = loader
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # key -> (value, expires_at), least recently used first
+        self._entries = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def get(self, key):
+        """Return the cached value for `key`, loading it on a miss or once expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() < entry[1]:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[0]
+            self._stats["misses"] += 1
+        # Load outside the lock so one slow key doesn't stall every other reader
+        value = self.loader(key)
+        self.put(key, value)
+        return value
+
+    def peek(self, key):
+        """The cached value for `key` if present and fresh, else None (never loads)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() >= entry[1]:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value):
+        """Store `value` for `key` directly (for caches filled by their callers)"""
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """Drop `key` so the next get() reloads it (call after writing the underlying row)"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
@@ -0,0 +1,108 @@
+import os
+
+from passwords import SCRYPT_N, SCRYPT_P, SCRYPT_R
+
+# Database configuration
+DB_BACKEND = os.environ.get("DB_BACKEND", "mysql")   # "mysql" or "sqlite"
+SQLITE_PATH = os.environ.get("SQLITE_PATH", "student_db.sqlite3")
+DB_HOST = os.environ.get("DB_HOST", "localhost")
+DB_PORT = int(os.environ.get("DB_PORT", 3306))
+DB_USER = "root"
+DB_PASSWORD = "root"
+DB_NAME = "student_db"
+DB_TABLE = "users"
+
+# Connection pool configuration (shared by everything in this process)
+DB_POOL_SIZE = 10             # max open connections
+DB_POOL_TIMEOUT = 5           # seconds to wait for a free connection
+DB_POOL_IDLE_TIMEOUT = 300    # close connections idle longer than this
+DB_POOL_PING_INTERVAL = 30    # health-check connections idle longer than this
+
+# Read replicas: writes go to the primary above, reads to a healthy replica at most
+# DB_REPLICA_MAX_LAG seconds behind (else the primary). Same user/password/database.
+DB_REPLICAS = [h for h in os.environ.get("DB_REPLICAS", "").split(",") if h]   # "host[:port],..."
+SQLITE_REPLICA_PATHS = [p for p in os.environ.get("SQLITE_REPLICA_PATHS", "").split(",") if p]   # sqlite backend
+DB_REPLICA_MAX_LAG = 5           # seconds behind the primary before a replica is skipped
+DB_REPLICA_CHECK_INTERVAL = 5    # seconds between replica health/lag probes
+DB_READ_YOUR_WRITES = 10         # seconds a user's reads stay on the primary after their writes
+
+# Seconds the sidebar "Total Users" count may be served from cache
+USER_COUNT_TTL = 60
+
+# Profiles of recently active users, shared by every entry point in the process
+PROFILE_CACHE_TTL = 300           # seconds before a cached profile is re-read
+PROFILE_CACHE_MAX_ENTRIES = 10000 # profiles kept (least recently used evicted)
+
+# Recently authenticated users: repeating a successful login within RECENT_LOGIN_TTL seconds is
+# checked against an in-memory keyed hash of the password, skipping the lookup and scrypt (0 disables).
+# A password changed through another process keeps working here until the entry expires.
+RECENT_LOGIN_TTL = 300
+RECENT_LOGIN_MAX_ENTRIES = 10000
+
+# User settings (debounced write-back)
+SETTINGS_WRITE_DEBOUNCE = 2.0     # seconds without changes before a user's edits are written
+SETTINGS_WRITE_MAX_DELAY = 10.0   # ...but never later than this after the first edit
+
+# "Download My Data": with EXPORT_URL set to api.py's public base URL (e.g. https://example.com/api)
+# the Settings page links to its streaming GET /export with a short-lived signed ticket instead of
+# building the file in the Streamlit process. The app and the API then need the same SESSION_SECRET.
+EXPORT_URL = os.environ.get("EXPORT_URL")
+EXPORT_TICKET_TTL = 300           # seconds a download link stays valid
+
+# Activity (events table + hourly/daily rollups)
+ACTIVITY_SUMMARY_TTL = 30      # seconds the site-wide dashboard numbers are cached
+ACTIVITY_HISTORY_TTL = 3600    # seconds a user's totals from before the Home summary window are cached
+ACTIVITY_WINDOW_DAYS = 30      # dashboard KPI window (compared with the one before it)
+ACTIVITY_BATCH_SIZE = 200      # events per multi-row insert
+ACTIVITY_FLUSH_INTERVAL = 1.0  # max seconds an event waits in memory before being written
+ACTIVITY_MAX_QUEUE = 10000     # events buffered in memory before record() pushes back
+ACTIVITY_PUT_TIMEOUT = 0.05    # seconds record() waits on a full buffer before spilling
+ACTIVITY_SPILL_PATH = os.environ.get("ACTIVITY_SPILL_PATH", "activity_spill.jsonl")   # "" disables spilling
+
+# Password hashing (scrypt cost parameters and the worker process pool)
+PASSWORD_HASH_N = int(os.environ.get("PASSWORD_HASH_N", SCRYPT_N))
+PASSWORD_HASH_R = int(os.environ.get("PASSWORD_HASH_R", SCRYPT_R))
+PASSWORD_HASH_P = int(os.environ.get("PASSWORD_HASH_P", SCRYPT_P))
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 0)) or None   # None = one per CPU core
+PASSWORD_HASH_MAX_PENDING = 64   # reject logins beyond this many queued hashes
+
+# Async auth service: lookups arriving within the window share one IN (...) query
+AUTH_BATCH_WINDOW = 0.005   # seconds
+AUTH_MAX_BATCH = 200        # flush early once this many usernames are pending
+AUTH_TIMEOUT = 30           # seconds a caller thread waits for the service
+
+# Bloom filter index of existing usernames/emails ("definitely not registered" without a
+# credential lookup or password hash; at most one indexed catch-up query per sync interval)
+USER_INDEX_CAPACITY = 100000        # minimum sized-for entries (grows to 2x rows on rebuild)
+USER_INDEX_ERROR_RATE = 0.01        # target false-positive rate
+USER_INDEX_REBUILD_INTERVAL = 3600  # seconds between full rebuilds
+# Min seconds between catch-up queries for rows added by other processes. A user registered
+# through another process can be refused at login ("invalid credentials") for up to this long.
+USER_INDEX_SYNC_INTERVAL = 1.0
+
+# Rate limits as (attempts per minute, burst), checked before any DB work.
+# Set RATE_LIMIT_STORE_URL=redis://... to share buckets between replicas.
+RATE_LIMITS = {
+    "login_user": (5, 5),         # per username
+    "login_client": (20, 20),     # per client address
+    "register_client": (5, 5),    # per client address
+}
+RATE_LIMIT_MAX_KEYS = 100000      # buckets kept per limit in memory
+RATE_LIMIT_STORE_URL = os.environ.get("RATE_LIMIT_STORE_URL")
+RATE_LIMITS_ENABLED = os.environ.get("RATE_LIMITS_ENABLED", "1") != "0"   # e.g. off for load tests
+# Reverse proxies in front of the app that append to X-Forwarded-For. 0 ignores the header, so
+# per-client limits key on the socket peer; set it only when every request passes through them.
+TRUSTED_PROXIES = int(os.environ.get("TRUSTED_PROXIES", 0))
+
+# Login sessions (signed tokens). Set SESSION_SECRET (and SESSION_STORE_URL=redis://...
+# to share sessions) when running several replicas or API workers.
+SESSION_TTL = 1800              # seconds of inactivity before a session expires
+SESSION_MAX_ENTRIES = 10000     # in-memory store capacity (least recently used evicted)
+SESSION_STORE_URL = os.environ.get("SESSION_STORE_URL")
+SESSION_SECRET = os.environ.get("SESSION_SECRET")
+
+# JSON API (api.py): `python api.py` runs API_WORKERS processes, each with its own shared_core().
+# More than one needs SESSION_SECRET and SESSION_STORE_URL, or tokens only work on the issuing worker.
+API_HOST = os.environ.get("API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("API_PORT", 8000))
+API_WORKERS = int(os.environ.get("API_WORKERS", 1))
@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import deque
+
+import mysql.connector
+from mysql.connector import Error
+
+
+class PoolTimeout(Error):
+    """Raised when no pooled connection frees up within the wait timeout"""
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of MySQL connections shared by all sessions"""
+
+    def __init__(self, size=5, timeout=5.0, idle_timeout=300.0, ping_interval=30.0, on_open=None, **connect_args):
+        self.size = size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+        self.connect_args = connect_args
+        # Optional callback(conn) run whenever a new server connection is opened
+        self.on_open = on_open
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        # Idle connections as (connection, last_used) pairs, most recent on the right
+        self._idle = deque()
+        self._stats = {
+            "opened": 0,
+            "closed": 0,
+            "evicted": 0,
+            "reconnects": 0,
+            "checkouts": 0,
+            "timeouts": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+
+    def acquire(self):
+        """Check out a live connection, waiting up to `timeout` seconds for a free slot"""
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise PoolTimeout(msg=f"No free database connection after {self.timeout}s (pool size {self.size})")
+        waited = time.monotonic() - started
+
+        try:
+            conn = self._checkout_idle()
+            if conn is None:
+                conn = self._open()
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["wait_time_total"] += waited
+            self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited)
+        return conn
+
+    def release(self, conn, discard=False):
+        """Return a connection to the pool, closing it instead if `discard` is set"""
+        try:
+            if discard:
+                self._close(conn)
+                return
+            if conn.in_transaction:
+                conn.rollback()
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        except Error:
+            self._close(conn)
+        finally:
+            self._slots.release()
+
+    def stats(self):
+        """Snapshot of pool size, usage and wait-time metrics"""
+        with self._lock:
+            stats = dict(self._stats)
+            idle = len(self._idle)
+        open_conns = stats["opened"] - stats["closed"]
+        stats.update(
+            size=self.size,
+            open=open_conns,
+            idle=idle,
+            in_use=open_conns - idle,
+            wait_time_avg=stats["wait_time_total"] / stats["checkouts"] if stats["checkouts"] else 0.0,
+        )
+        return stats
+
+    def close_all(self):
+        """Close every idle connection (connections in use are closed on release)"""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn, _ in idle:
+            self._close(conn)
+
+    def _checkout_idle(self):
+        now = time.monotonic()
+        stale = []
+        conn = None
+        with self._lock:
+            # Evict connections that sat idle too long; they are likely dropped server-side
+            while self._idle and now - self._idle[0][1] > self.idle_timeout:
+                stale.append(self._idle.popleft()[0])
+                self._stats["evicted"] += 1
+            if self._idle:
+                conn, last_used = self._idle.pop()
+        for old in stale:
+            self._close(old)
+        if conn is None:
+            return None
+
+        # Only pay for a health-check round-trip when the connection has been quiet for a while
+        if now - last_used > self.ping_interval:
+            try:
+                conn.ping()
+            except Error:
+                self._close(conn)
+                with self._lock:
+                    self._stats["reconnects"] += 1
+                return self._open()
+        return conn
+
+    def _open(self):
+        conn = mysql.connector.connect(**self.connect_args)
+        with self._lock:
+            self._stats["opened"] += 1
+        if self.on_open is not None:
+            self.on_open(conn)
+        return conn
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Error:
+            pass
+        with self._lock:
+            self._stats["closed"] += 1
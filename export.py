@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+
+FORMATS = {
+    # format -> (file extension, MIME type)
+    "ndjson": ("ndjson", "application/x-ndjson"),
+    "csv": ("csv", "text/csv"),
+}
+
+CSV_COLUMNS = ("section", "key", "value", "created_at")
+
+
+def iter_records(user_id, profiles, settings_store, repository, batch_size=1000):
+    """Yield the user's account row, settings and every activity event as flat dicts, one at a time"""
+    profile = profiles.get(user_id)
+    if profile is not None:
+        username, email, created_at, first_name, last_name = profile
+        yield {
+            "type": "user",
+            "id": user_id,
+            "username": username,
+            "email": email,
+            "first_name": first_name,
+            "last_name": last_name,
+            "created_at": created_at,
+        }
+    yield {"type": "settings", **settings_store.load(user_id)}
+    for kind, detail, created_at in repository.iter_events(user_id, batch_size):
+        yield {"type": "event", "kind": kind, "detail": detail, "created_at": created_at}
+
+
+def iter_ndjson(records):
+    """One JSON document per line"""
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def iter_csv(records):
+    """section,key,value,created_at rows: one per account/settings field and one per event"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def take():
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    writer.writerow(CSV_COLUMNS)
+    yield take()
+    for record in records:
+        kind = record["type"]
+        if kind == "event":
+            writer.writerow(("event", record["kind"], record["detail"], record["created_at"]))
+        else:
+            for key, value in record.items():
+                if key != "type":
+                    writer.writerow((kind, key, value, ""))
+        yield take()
+
+
+def iter_chunks(lines, chunk_size=64 * 1024):
+    """Re-block text lines into UTF-8 byte chunks of about `chunk_size`"""
+    parts, size = [], 0
+    for line in lines:
+        data = line.encode("utf-8")
+        parts.append(data)
+        size += len(data)
+        if size >= chunk_size:
+            yield b"".join(parts)
+            parts, size = [], 0
+    if parts:
+        yield b"".join(parts)
+
+
+def iter_export(fmt, user_id, profiles, settings_store, repository, chunk_size=64 * 1024):
+    """The user's export in `fmt` ("ndjson" or "csv") as a stream of byte chunks"""
+    records = iter_records(user_id, profiles, settings_store, repository)
+    lines = iter_ndjson(records) if fmt == "ndjson" else iter_csv(records)
+    return iter_chunks(lines, chunk_size)
+
+
+def export_bytes(chunks):
+    """Drain byte chunks into one bytes object (for consumers that can't take a stream).
+
+    The whole export is held in memory: st.download_button needs str, bytes or a
+    file-like object and reads it fully either way. Only the API's /export streams.
+    """
+    return b"".join(chunks)
@@ -1,9 +1,17 @@
 import streamlit as st
-import mysql.connector
-from mysql.connector import Error
-import re
+import storage
+from auth_core import AuthError, shared_core
+from auth_ui import get_client_address, show_auth_error
+from metrics import METRICS, profile_call
+from activity import PAGE_VIEW
+import templating
+import os
 import time
-from datetime import datetime
+import importlib
+from types import SimpleNamespace
+
+# Instrumentation (spans, gauges, profiling) is off unless METRICS_ENABLED=1
+METRICS.enabled = os.environ.get("METRICS_ENABLED") == "1"
 
 # Page configuration
 st.set_page_config(
@@ -13,215 +21,330 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Custom CSS for styling and animations
-st.markdown("""
-    <style>
-    @keyframes fadeIn {
-        from {
-            opacity: 0;
-            transform: translateY(20px);
-        }
-        to {
-            opacity: 1;
-            transform: translateY(0px);
-        }
-    }
-    
-    @keyframes slideIn {
-        from {
-            transform: translateX(-20px);
-            opacity: 0;
-        }
-        to {
-            transform: translateX(0px);
-            opacity: 1;
-        }
-    }
-    
-    .main-container {
-        animation: fadeIn 0.8s ease-in-out;
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 40px;
-        border-radius: 15px;
-        box-shadow: 0 8px 32px 0 rgba(31, 38, 135, 0.37);
-    }
-    
-    .success-message {
-        animation: slideIn 0.6s ease-in-out;
-    }
-    
-    .form-container {
-        animation: fadeIn 1s ease-in-out;
-    }
-    </style>
-    """, unsafe_allow_html=True)
-
-# Database configuration
-DB_HOST = "localhost"
-DB_USER = "root"
-DB_PASSWORD = "root"
-DB_NAME = "student_db"
-DB_TABLE = "users"
+# Custom CSS for styling and animations (read and minified once per process)
+with METRICS.span("css"):
+    st.markdown(templating.stylesheet("style.css"), unsafe_allow_html=True)
+
+# Metrics export (only when METRICS_ENABLED=1)
+METRICS_PORT = os.environ.get("METRICS_PORT")        # serve Prometheus text on :PORT/metrics
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")   # interface to bind; 0.0.0.0 exposes it to the network
+METRICS_FILE = os.environ.get("METRICS_FILE")        # and/or rewrite this file periodically
+METRICS_FILE_INTERVAL = 15                           # seconds between file rewrites
+PROFILING_ALLOWED = os.environ.get("PROFILING_ALLOWED") == "1"   # allow ?profile=cprofile|pyinstrument
+
+# Login sessions: the token rides in the ?session= query param so refreshes and
+# reconnects resume without re-authenticating (backend settings live in config.py).
+# Known limitation: Streamlit can't set cookies, so the URL carries a bearer token;
+# anyone holding it (history, a shared link, proxy logs) is logged in until logout
+# or SESSION_TTL. SESSION_IN_URL=0 keeps it in session state: refresh = log in again.
+SESSION_QUERY_PARAM = "session"
+SESSION_IN_URL = os.environ.get("SESSION_IN_URL", "1") != "0"
+
+# Minimum seconds between auth attempts from one session (0 disables).
+# Enforced by rejecting early submits, never by sleeping on the script thread.
+AUTH_MIN_RESPONSE_TIME = float(os.environ.get("AUTH_MIN_RESPONSE_TIME", 1.0))
 
 # Initialize session state
 if 'logged_in' not in st.session_state:
     st.session_state.logged_in = False
 if 'username' not in st.session_state:
     st.session_state.username = None
+if 'user_id' not in st.session_state:
+    st.session_state.user_id = None
 if 'auth_mode' not in st.session_state:
     st.session_state.auth_mode = 'login'
+if 'flash' not in st.session_state:
+    st.session_state.flash = []
+if 'auth_next_attempt_at' not in st.session_state:
+    st.session_state.auth_next_attempt_at = 0.0
+
+# Feedback Functions
+def flash(message, icon=None, balloons=False):
+    """Queue a toast to show after the next st.rerun()"""
+    st.session_state.flash.append((message, icon, balloons))
+
+def show_flashed_messages():
+    """Show toasts queued before the last rerun (rendered client-side, no waiting)"""
+    while st.session_state.flash:
+        message, icon, balloons = st.session_state.flash.pop(0)
+        st.toast(message, icon=icon)
+        if balloons:
+            st.balloons()
+
+# Session Functions
+def start_session(username, user_id):
+    """Mark this browser session as logged in and hand it a session token"""
+    st.session_state.logged_in = True
+    st.session_state.username = username
+    st.session_state.user_id = user_id
+    st.session_state.session_token = get_core().start_session(username, user_id)
+    if SESSION_IN_URL:
+        st.query_params[SESSION_QUERY_PARAM] = st.session_state.session_token
+
+def restore_session():
+    """Sync login state with the session token (no users table access)"""
+    if SESSION_IN_URL:
+        token = st.query_params.get(SESSION_QUERY_PARAM, st.session_state.get("session_token"))
+    else:
+        # Never honour a token from a link: that would log the visitor into someone else's session
+        st.query_params.pop(SESSION_QUERY_PARAM, None)
+        token = st.session_state.get("session_token")
+    if token is None:
+        return
+    session = get_core().resolve_session(token)
+    if session is None:
+        # Expired or revoked elsewhere
+        st.query_params.pop(SESSION_QUERY_PARAM, None)
+        st.session_state.pop("session_token", None)
+        st.session_state.logged_in = False
+        st.session_state.username = None
+        st.session_state.user_id = None
+    else:
+        st.session_state.logged_in = True
+        st.session_state.username = session["username"]
+        st.session_state.user_id = session.get("user_id")
+        st.session_state.session_token = token
+
+def end_session():
+    """Log out and revoke the session token"""
+    get_core().end_session(st.session_state.pop("session_token", None), st.session_state.user_id)
+    if SESSION_QUERY_PARAM in st.query_params:
+        del st.query_params[SESSION_QUERY_PARAM]
+    st.session_state.logged_in = False
+    st.session_state.username = None
+    st.session_state.user_id = None
+    st.session_state.pop("viewed_page", None)
+    st.session_state.pop("settings", None)
+
+def auth_attempt_allowed():
+    """Apply the minimum response time policy to an auth submit"""
+    now = time.monotonic()
+    if now < st.session_state.auth_next_attempt_at:
+        st.warning("⚠️ Please wait a moment before trying again")
+        return False
+    st.session_state.auth_next_attempt_at = now + AUTH_MIN_RESPONSE_TIME
+    return True
 
 # Database Functions
-def get_db_connection():
-    """Create database connection"""
-    try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_NAME
-        )
-        return conn
-    except Error as e:
-        st.error(f"❌ Database Connection Error: {e}")
-        return None
+def get_core():
+    """The process-wide auth core (repository, pools, caches and the auth flows)"""
+    return shared_core()
 
+def get_repository():
+    """The users repository for the configured DB_BACKEND"""
+    return get_core().repository
+
+def get_activity_log():
+    """The process-wide activity event log"""
+    return get_core().activity
+
+def get_profile_cache():
+    """The process-wide per-user profile cache (invalidate a user after editing their row)"""
+    return get_core().profiles
+
+def get_settings_store():
+    """The process-wide user settings store (with its debounced writer)"""
+    return get_core().settings
+
+@st.cache_resource
+def get_page_services():
+    """Process-wide objects handed to the page modules (they can't import this script)"""
+    return SimpleNamespace(
+        repository=get_repository(),
+        activity=get_activity_log(),
+        profiles=get_profile_cache(),
+        settings=get_settings_store(),
+        export_ticket=get_core().export_ticket
+    )
+
+@st.cache_resource
+def start_metrics_export():
+    """Register metric gauges and start the configured exporters (once per process)"""
+    METRICS.register_gauges("db_queries", lambda: dict(storage.COUNTERS))
+    METRICS.register_gauges("db_pool", get_pool_stats)
+    for name in ("user_index", "auth_service", "activity"):
+        METRICS.register_gauges(name, lambda name=name: get_core().stats().get(name, {}))
+    METRICS.register_gauges("profile_cache", lambda: get_profile_cache().stats())
+    METRICS.register_gauges("settings", lambda: get_settings_store().stats())
+    METRICS.register_gauges("templates", templating.stats)
+    if METRICS_PORT:
+        METRICS.serve(int(METRICS_PORT), METRICS_HOST)
+    if METRICS_FILE:
+        METRICS.start_file_export(METRICS_FILE, interval=METRICS_FILE_INTERVAL)
+    return True
+
+def get_pool_stats():
+    """Get connection pool size and wait-time metrics"""
+    return get_repository().stats()
+
+def init_database():
+    """Bring the schema up to date once per process (not on every rerun)"""
+    return get_core().ensure_schema()
+
+@METRICS.timed("db.create_users_table")
 def create_users_table():
     """Create users table if it doesn't exist"""
     try:
-        conn = get_db_connection()
-        if conn is None:
-            return False
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                username VARCHAR(255) UNIQUE NOT NULL,
-                email VARCHAR(255) UNIQUE NOT NULL,
-                password VARCHAR(255) NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        conn.commit()
-        cursor.close()
-        conn.close()
+        init_database()
         return True
-    except Error as e:
+    except storage.StorageError as e:
         st.error(f"❌ Error creating table: {e}")
         return False
 
-def register_user(username, email, password, confirm_password):
+@METRICS.timed("db.register_user")
+def register_user(username, email, password, confirm_password, first_name="", last_name=""):
     """Register a new user"""
-    # Validation
-    if not username or not email or not password:
-        st.warning("⚠️ Please fill all fields")
-        return False
-    
-    if len(username) < 3:
-        st.warning("⚠️ Username must be at least 3 characters long")
-        return False
-    
-    if len(password) < 6:
-        st.warning("⚠️ Password must be at least 6 characters long")
-        return False
-    
-    if password != confirm_password:
-        st.warning("⚠️ Passwords do not match")
-        return False
-    
-    # Email validation
-    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    if not re.match(email_pattern, email):
-        st.warning("⚠️ Please enter a valid email address")
-        return False
-    
     try:
-        conn = get_db_connection()
-        if conn is None:
-            return False
-        
-        cursor = conn.cursor()
-        insert_query = "INSERT INTO users (username, email, password) VALUES (%s, %s, %s)"
-        cursor.execute(insert_query, (username, email, password))
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
-        # Success animation
-        with st.spinner(''):
-            time.sleep(1)
-        
+        get_core().register(
+            username, email, password, confirm_password, get_client_address(), first_name, last_name
+        )
         return True
-    except mysql.connector.errors.IntegrityError as e:
-        if "username" in str(e).lower():
-            st.error("❌ Username already exists")
-        elif "email" in str(e).lower():
-            st.error("❌ Email already registered")
-        else:
-            st.error(f"❌ Registration error: {e}")
-        return False
-    except Error as e:
-        st.error(f"❌ Database error: {e}")
+    except AuthError as e:
+        show_auth_error(e)
         return False
 
+@METRICS.timed("db.login_user")
 def login_user(username, password):
-    """Authenticate user login"""
-    if not username or not password:
-        st.warning("⚠️ Please enter username and password")
-        return False
-    
+    """Authenticate user login; returns the user id, or False"""
     try:
-        conn = get_db_connection()
-        if conn is None:
-            return False
-        
-        cursor = conn.cursor()
-        query = "SELECT id, username FROM users WHERE username = %s AND password = %s"
-        cursor.execute(query, (username, password))
-        result = cursor.fetchone()
-        
-        cursor.close()
-        conn.close()
-        
-        if result:
-            return True
-        else:
-            st.error("❌ Invalid username or password")
-            return False
-    except Error as e:
-        st.error(f"❌ Login error: {e}")
+        return get_core().login(username, password, get_client_address())
+    except AuthError as e:
+        show_auth_error(e)
         return False
 
+@METRICS.timed("db.get_user_count")
 def get_user_count():
     """Get total number of registered users"""
-    try:
-        conn = get_db_connection()
-        if conn is None:
-            return 0
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM users")
-        count = cursor.fetchone()[0]
-        cursor.close()
-        conn.close()
-        return count
-    except Error:
-        return 0
+    return get_core().user_count()
+
+# Page Rendering
+def render_auth_forms(mode):
+    """Login or Register form for logged-out visitors"""
+    if "🔑 Login" in mode:
+        st.subheader("🔑 User Login")
+        with st.form("login_form", clear_on_submit=True):
+            username = st.text_input("👤 Username", placeholder="Enter your username")
+            password = st.text_input("🔒 Password", type="password", placeholder="Enter your password")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                submit_btn = st.form_submit_button("🔓 Login", use_container_width=True)
+            with col2:
+                st.form_submit_button("Clear", use_container_width=True)
+        
+        if submit_btn and auth_attempt_allowed():
+            with st.spinner('🔍 Verifying credentials...'):
+                user_id = login_user(username, password)
+            if user_id:
+                start_session(username, user_id)
+                flash("✅ Login Successful!")
+                st.rerun()
+    
+    else:  # Register mode
+        st.subheader("📝 Create New Account")
+        with st.form("register_form", clear_on_submit=True):
+            username = st.text_input("👤 Username", placeholder="Choose a username (min 3 chars)")
+            email = st.text_input("📧 Email", placeholder="Enter your email address")
+            password = st.text_input("🔒 Password", type="password", placeholder="Enter password (min 6 chars)")
+            confirm_password = st.text_input("🔐 Confirm Password", type="password", placeholder="Confirm your password")
+            col1, col2 = st.columns(2)
+            with col1:
+                first_name = st.text_input("🪪 First Name", placeholder="Optional")
+            with col2:
+                last_name = st.text_input("🪪 Last Name", placeholder="Optional")
+            
+            # Password strength indicator
+            if password:
+                strength = len(password)
+                if strength < 6:
+                    st.warning("⚠️ Password is too weak")
+                elif strength < 10:
+                    st.info("ℹ️ Password strength: Medium")
+                else:
+                    st.success("✅ Password strength: Strong")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                submit_btn = st.form_submit_button("✍️ Register", use_container_width=True)
+            with col2:
+                st.form_submit_button("Clear", use_container_width=True)
+        
+        if submit_btn and auth_attempt_allowed():
+            with st.spinner('📝 Creating account...'):
+                registered = register_user(username, email, password, confirm_password, first_name, last_name)
+            if registered:
+                flash("✅ Registration Successful!", balloons=True)
+                flash("You can now login with your credentials", icon="💡")
+                st.rerun()
+
+def render_footer():
+    """Footer shown on every page"""
+    st.markdown("---")
+    st.markdown(templating.render("footer.html"), unsafe_allow_html=True)
+
+# Logged-in pages: (nav label, module in views/ exposing a render() fragment)
+PAGES = {
+    "home": ("🏠 Home", "views.home"),
+    "profile": ("👤 Profile", "views.profile"),
+    "dashboard": ("📊 Dashboard", "views.dashboard"),
+    "settings": ("⚙️ Settings", "views.settings"),
+}
+
+def load_page(page):
+    """Import a page's module on its first visit (later visits hit sys.modules)"""
+    return importlib.import_module(PAGES[page][1])
+
+def go_to(page):
+    st.session_state.page = page
+
+@st.fragment
+def render_app_area():
+    """Navigation bar and the current page; clicks in here rerun only this fragment"""
+    # Header Navigation
+    columns = st.columns(len(PAGES) + 1)
+    for column, (page, (label, _)) in zip(columns, PAGES.items()):
+        with column:
+            st.button(label, use_container_width=True, key=f"nav_{page}", on_click=go_to, args=(page,))
+    with columns[-1]:
+        if st.button("🚪 Logout", use_container_width=True, key="logout_btn"):
+            end_session()
+            flash("✅ Logged out successfully!")
+            st.rerun()  # whole app: the sidebar and forms change too
+    
+    st.markdown("---")
+    
+    # Initialize page state
+    if 'page' not in st.session_state:
+        st.session_state.page = "home"
+    
+    page = st.session_state.page
+    if st.session_state.get("viewed_page") != page:
+        # Count arrivals on a page, not reruns triggered by its widgets
+        st.session_state.viewed_page = page
+        get_activity_log().record(st.session_state.user_id, PAGE_VIEW, page)
+    with METRICS.span(f"page.{page}"):
+        load_page(page).render(get_page_services())
 
 # Main Application
 def main():
-    # Create users table on app startup
+    # Create users table on app startup (cached: no DDL on regular reruns)
     create_users_table()
     
+    # Resume a login from the session token after a refresh/reconnect
+    restore_session()
+    
+    # Feedback queued by the previous run (login/logout/registration)
+    show_flashed_messages()
+    
     # Header
     col1, col2, col3 = st.columns([1, 2, 1])
-    with col2:
-        st.markdown("<h1 style='text-align: center; color: #667eea;'>🔐 Secure Auth</h1>", unsafe_allow_html=True)
-        st.markdown("<p style='text-align: center; color: #666;'>Login or Register to Continue</p>", unsafe_allow_html=True)
+    with METRICS.span("header"), col2:
+        st.markdown(templating.render("header.html"), unsafe_allow_html=True)
     
     st.markdown("---")
     
     # Sidebar for switching modes
-    with st.sidebar:
+    with METRICS.span("sidebar"), st.sidebar:
         st.markdown("### 📋 Navigation")
         mode = st.radio("Choose an option:", ["🔑 Login", "📝 Register"], key="auth_mode_radio")
         
@@ -237,374 +360,32 @@ def main():
     
     # Main content area
     if st.session_state.logged_in:
-        # Header Navigation
-        col1, col2, col3, col4, col5 = st.columns([1, 1, 1, 1, 1])
-        with col1:
-            if st.button("🏠 Home", use_container_width=True, key="nav_home"):
-                st.session_state.page = "home"
-        with col2:
-            if st.button("👤 Profile", use_container_width=True, key="nav_profile"):
-                st.session_state.page = "profile"
-        with col3:
-            if st.button("📊 Dashboard", use_container_width=True, key="nav_dashboard"):
-                st.session_state.page = "dashboard"
-        with col4:
-            if st.button("⚙️ Settings", use_container_width=True, key="nav_settings"):
-                st.session_state.page = "settings"
-        with col5:
-            if st.button("🚪 Logout", use_container_width=True, key="logout_btn"):
-                st.session_state.logged_in = False
-                st.session_state.username = None
-                st.success("✅ Logged out successfully!")
-                time.sleep(1)
-                st.rerun()
-        
-        st.markdown("---")
-        
-        # Initialize page state
-        if 'page' not in st.session_state:
-            st.session_state.page = "home"
-        
-        # HOME PAGE
-        if st.session_state.page == "home":
-            st.markdown(f"""
-            <div style='text-align: center; padding: 30px;'>
-                <h1 style='color: #667eea; font-size: 48px;'>Welcome Back! 👋</h1>
-                <h2 style='color: #764ba2;'>{st.session_state.username}</h2>
-                <p style='font-size: 18px; color: #666;'>You are now authenticated and can access all features</p>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            st.balloons()
-            
-            # Feature Cards
-            st.markdown("### 🌟 Featured Services")
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                st.markdown("""
-                <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                            padding: 20px; border-radius: 10px; text-align: center; color: white;'>
-                    <h3>📚 Learning Hub</h3>
-                    <p>Access educational resources and tutorials</p>
-                    <button style='background-color: white; color: #667eea; padding: 10px 20px; 
-                                   border: none; border-radius: 5px; cursor: pointer; font-weight: bold;'>
-                        Explore
-                    </button>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            with col2:
-                st.markdown("""
-                <div style='background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
-                            padding: 20px; border-radius: 10px; text-align: center; color: white;'>
-                    <h3>🎯 Tasks & Projects</h3>
-                    <p>Manage your daily tasks and projects efficiently</p>
-                    <button style='background-color: white; color: #f5576c; padding: 10px 20px; 
-                                   border: none; border-radius: 5px; cursor: pointer; font-weight: bold;'>
-                        View Tasks
-                    </button>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            with col3:
-                st.markdown("""
-                <div style='background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%);
-                            padding: 20px; border-radius: 10px; text-align: center; color: white;'>
-                    <h3>🔔 Notifications</h3>
-                    <p>Stay updated with real-time notifications</p>
-                    <button style='background-color: white; color: #00f2fe; padding: 10px 20px; 
-                                   border: none; border-radius: 5px; cursor: pointer; font-weight: bold;'>
-                        Check Now
-                    </button>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            st.markdown("---")
-            
-            # Quick Stats
-            st.markdown("### 📈 Your Activity")
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                st.metric("Total Sessions", "24", "+3 this week")
-            with col2:
-                st.metric("Tasks Completed", "156", "+12 this month")
-            with col3:
-                st.metric("Learning Hours", "48", "+5 this week")
-            with col4:
-                st.metric("Achievements", "12", "+2 new")
-            
-            st.markdown("---")
-            
-            # Recent Activity
-            st.markdown("### 📝 Recent Activity")
-            activities = [
-                {"emoji": "✅", "activity": "Completed Python Basics Course", "time": "2 hours ago"},
-                {"emoji": "📝", "activity": "Submitted Project Assignment", "time": "5 hours ago"},
-                {"emoji": "🏆", "activity": "Earned 'Expert Developer' Badge", "time": "1 day ago"},
-                {"emoji": "💬", "activity": "Commented on Discussion Forum", "time": "2 days ago"},
-            ]
-            
-            for activity in activities:
-                st.info(f"{activity['emoji']} {activity['activity']} • {activity['time']}")
-        
-        # PROFILE PAGE
-        elif st.session_state.page == "profile":
-            st.markdown(f"""
-            <div style='text-align: center; padding: 20px;'>
-                <h1 style='color: #667eea;'>👤 User Profile</h1>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            col1, col2 = st.columns([1, 2])
-            
-            with col1:
-                st.markdown("""
-                <div style='text-align: center;'>
-                    <div style='width: 150px; height: 150px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                                border-radius: 50%; margin: auto; display: flex; align-items: center; justify-content: center;
-                                font-size: 60px;'>
-                        👤
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            with col2:
-                st.markdown(f"""
-                <div style='padding: 20px;'>
-                    <h2>Username</h2>
-                    <p style='font-size: 18px; color: #667eea;'><strong>{st.session_state.username}</strong></p>
-                    <h2>Account Status</h2>
-                    <p style='font-size: 18px; color: green;'>✅ <strong>Active</strong></p>
-                    <h2>Member Since</h2>
-                    <p style='font-size: 18px;'><strong>{datetime.now().strftime('%B %d, %Y')}</strong></p>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            st.markdown("---")
-            
-            st.markdown("### 📋 Profile Information")
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                email_display = st.text_input("📧 Email", value="user@example.com", disabled=True)
-            with col2:
-                phone_display = st.text_input("📱 Phone", value="+1 (555) 123-4567", disabled=True)
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                country = st.text_input("🌍 Country", value="United States", disabled=True)
-            with col2:
-                city = st.text_input("🏙️ City", value="New York", disabled=True)
-            
-            st.markdown("---")
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.button("✏️ Edit Profile", use_container_width=True):
-                    st.info("Edit profile feature coming soon!")
-            with col2:
-                if st.button("🔐 Change Password", use_container_width=True):
-                    st.warning("Password change feature coming soon!")
-        
-        # DASHBOARD PAGE
-        elif st.session_state.page == "dashboard":
-            st.markdown(f"""
-            <div style='text-align: center; padding: 20px;'>
-                <h1 style='color: #667eea;'>📊 Dashboard</h1>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Dashboard stats
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                st.markdown("""
-                <div style='background: #E8EAF6; padding: 20px; border-radius: 10px; text-align: center;'>
-                    <h3 style='color: #667eea;'>📊 Total Views</h3>
-                    <h1 style='color: #667eea; font-size: 36px;'>2,547</h1>
-                    <p style='color: green;'>↑ 12% from last month</p>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            with col2:
-                st.markdown("""
-                <div style='background: #FCE4EC; padding: 20px; border-radius: 10px; text-align: center;'>
-                    <h3 style='color: #f5576c;'>👥 New Users</h3>
-                    <h1 style='color: #f5576c; font-size: 36px;'>384</h1>
-                    <p style='color: green;'>↑ 8% from last month</p>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            with col3:
-                st.markdown("""
-                <div style='background: #E0F2F1; padding: 20px; border-radius: 10px; text-align: center;'>
-                    <h3 style='color: #00f2fe;'>💰 Revenue</h3>
-                    <h1 style='color: #00f2fe; font-size: 36px;'>$12.5K</h1>
-                    <p style='color: green;'>↑ 23% from last month</p>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            with col4:
-                st.markdown("""
-                <div style='background: #FFF3E0; padding: 20px; border-radius: 10px; text-align: center;'>
-                    <h3 style='color: #FF9800;'>⭐ Rating</h3>
-                    <h1 style='color: #FF9800; font-size: 36px;'>4.8</h1>
-                    <p style='color: green;'>↑ 0.3 from last month</p>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            st.markdown("---")
-            
-            # Chart data
-            st.markdown("### 📈 Performance Overview")
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.markdown("#### Weekly Activity")
-                activity_data = {
-                    "Day": ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"],
-                    "Users": [120, 150, 180, 160, 200, 140, 100]
-                }
-                st.line_chart(data=activity_data, x="Day", y="Users")
-            
-            with col2:
-                st.markdown("#### Category Distribution")
-                category_data = {
-                    "Category": ["Product A", "Product B", "Product C", "Product D"],
-                    "Sales": [45, 30, 20, 5]
-                }
-                st.bar_chart(data=category_data, x="Category", y="Sales")
-        
-        # SETTINGS PAGE
-        elif st.session_state.page == "settings":
-            st.markdown(f"""
-            <div style='text-align: center; padding: 20px;'>
-                <h1 style='color: #667eea;'>⚙️ Settings</h1>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            st.markdown("### 🔔 Notifications")
-            col1, col2 = st.columns([3, 1])
-            with col1:
-                st.write("Email Notifications")
-            with col2:
-                st.toggle("Enable", value=True, key="email_notif")
-            
-            col1, col2 = st.columns([3, 1])
-            with col1:
-                st.write("Push Notifications")
-            with col2:
-                st.toggle("Enable", value=True, key="push_notif")
-            
-            col1, col2 = st.columns([3, 1])
-            with col1:
-                st.write("SMS Alerts")
-            with col2:
-                st.toggle("Enable", value=False, key="sms_notif")
-            
-            st.markdown("---")
-            
-            st.markdown("### 🎨 Appearance")
-            theme = st.selectbox("Theme", ["Light", "Dark", "Auto"], key="theme_select")
-            st.info(f"Selected theme: {theme}")
-            
-            st.markdown("---")
-            
-            st.markdown("### 🔐 Privacy & Security")
-            col1, col2 = st.columns([3, 1])
-            with col1:
-                st.write("Two-Factor Authentication")
-            with col2:
-                st.toggle("Enable", value=False, key="2fa_toggle")
-            
-            st.markdown("---")
-            
-            st.markdown("### 💾 Data Management")
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.button("📥 Download My Data", use_container_width=True):
-                    st.success("✅ Download started!")
-            with col2:
-                if st.button("🗑️ Delete Account", use_container_width=True):
-                    st.error("❌ Account deletion requires confirmation")
-            
-            st.markdown("---")
-            
-            if st.button("💾 Save Settings", use_container_width=True):
-                st.success("✅ Settings saved successfully!")
+        render_app_area()
     
     else:
-        # Login/Register forms
-        if "🔑 Login" in mode:
-            st.subheader("🔑 User Login")
-            with st.form("login_form", clear_on_submit=True):
-                username = st.text_input("👤 Username", placeholder="Enter your username")
-                password = st.text_input("🔒 Password", type="password", placeholder="Enter your password")
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    submit_btn = st.form_submit_button("🔓 Login", use_container_width=True)
-                with col2:
-                    st.form_submit_button("Clear", use_container_width=True)
-            
-            if submit_btn:
-                with st.spinner('🔍 Verifying credentials...'):
-                    time.sleep(1)
-                    if login_user(username, password):
-                        st.session_state.logged_in = True
-                        st.session_state.username = username
-                        st.success("✅ Login Successful!")
-                        st.balloons()
-                        time.sleep(1)
-                        st.rerun()
-        
-        else:  # Register mode
-            st.subheader("📝 Create New Account")
-            with st.form("register_form", clear_on_submit=True):
-                username = st.text_input("👤 Username", placeholder="Choose a username (min 3 chars)")
-                email = st.text_input("📧 Email", placeholder="Enter your email address")
-                password = st.text_input("🔒 Password", type="password", placeholder="Enter password (min 6 chars)")
-                confirm_password = st.text_input("🔐 Confirm Password", type="password", placeholder="Confirm your password")
-                
-                # Password strength indicator
-                if password:
-                    strength = len(password)
-                    if strength < 6:
-                        st.warning("⚠️ Password is too weak")
-                    elif strength < 10:
-                        st.info("ℹ️ Password strength: Medium")
-                    else:
-                        st.success("✅ Password strength: Strong")
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    submit_btn = st.form_submit_button("✍️ Register", use_container_width=True)
-                with col2:
-                    st.form_submit_button("Clear", use_container_width=True)
-            
-            if submit_btn:
-                with st.spinner('📝 Creating account...'):
-                    time.sleep(1)
-                    if register_user(username, email, password, confirm_password):
-                        col1, col2, col3 = st.columns([1, 1, 1])
-                        with col2:
-                            st.success("✅ Registration Successful!")
-                            st.balloons()
-                        st.info("💡 You can now login with your credentials")
-                        time.sleep(2)
-                        st.rerun()
+        with METRICS.span("auth_forms"):
+            render_auth_forms(mode)
     
-    # Footer
-    st.markdown("---")
-    st.markdown("""
-    <div style='text-align: center; color: #999; font-size: 12px;'>
-        <p>🔐 Secure Authentication System | Built with Streamlit & MySQL</p>
-        <p>© 2026 All Rights Reserved</p>
-    </div>
-    """, unsafe_allow_html=True)
+    with METRICS.span("footer"):
+        render_footer()
+
+def run():
+    """Entry point: main() inside the per-rerun span, optionally under a profiler"""
+    if METRICS.enabled:
+        start_metrics_export()
+    engine = st.query_params.get("profile") if PROFILING_ALLOWED else None
+    with METRICS.span("rerun"):
+        if engine in ("cprofile", "pyinstrument"):
+            report = profile_call(main, engine)
+            with st.expander(f"⏱️ Profile ({engine})"):
+                st.code(report)
+        else:
+            main()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # task.py is a second page of this server rather than its own `streamlit run`, so both
+    # use this process's shared_core(): one connection pool and one set of caches
+    st.navigation([
+        st.Page(run, title="Account", icon="🔐", default=True),
+        st.Page("task.py", title="Task", icon="📝"),
+    ]).run()
\ No newline at end of file
@@ -0,0 +1,169 @@
+import functools
+import http.server
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_NOOP = nullcontext()
+
+
+class Metrics:
+    """Process-wide timing spans and sampled gauges with Prometheus text export.
+
+    Disabled by default; while disabled span() hands back a shared no-op
+    context manager and timed() costs one attribute check per call.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        # span name -> [count, total seconds, max seconds, bucket counts...]
+        self._spans = {}
+        # Extra name -> callable returning {label: value}, sampled at export time
+        self._gauges = {}
+
+    def span(self, name):
+        """Context manager timing the enclosed block under `name`"""
+        if not self.enabled:
+            return _NOOP
+        return self._timed_block(name)
+
+    @contextmanager
+    def _timed_block(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def timed(self, name):
+        """Decorator form of span()"""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with self._timed_block(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe(self, name, seconds):
+        with self._lock:
+            entry = self._spans.get(name)
+            if entry is None:
+                entry = self._spans[name] = [0, 0.0, 0.0] + [0] * len(BUCKETS)
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    entry[3 + i] += 1
+
+    def register_gauges(self, name, sample):
+        """Export the numeric values of sample() (a dict) under `name` at scrape time"""
+        self._gauges[name] = sample
+
+    def prometheus_text(self):
+        """Render everything in the Prometheus text exposition format"""
+        with self._lock:
+            spans = {name: list(entry) for name, entry in self._spans.items()}
+        lines = [
+            "# HELP app_span_seconds Time spent in instrumented sections",
+            "# TYPE app_span_seconds histogram",
+        ]
+        for name, entry in sorted(spans.items()):
+            for bound, count in zip(BUCKETS, entry[3:]):
+                lines.append(f'app_span_seconds_bucket{{span="{name}",le="{bound}"}} {count}')
+            lines.append(f'app_span_seconds_bucket{{span="{name}",le="+Inf"}} {entry[0]}')
+            lines.append(f'app_span_seconds_sum{{span="{name}"}} {entry[1]:.6f}')
+            lines.append(f'app_span_seconds_count{{span="{name}"}} {entry[0]}')
+        lines += ["# HELP app_span_max_seconds Slowest observation per section", "# TYPE app_span_max_seconds gauge"]
+        for name, entry in sorted(spans.items()):
+            lines.append(f'app_span_max_seconds{{span="{name}"}} {entry[2]:.6f}')
+        for group, sample in sorted(self._gauges.items()):
+            lines.append(f"# TYPE app_{group} gauge")
+            try:
+                values = sample()
+            except Exception:
+                continue
+            for key, value in sorted(values.items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f'app_{group}{{key="{key}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path):
+        """Atomically write the Prometheus text to `path` (e.g. for node_exporter's textfile collector)"""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serve GET /metrics on a background thread (loopback only unless `host` says otherwise); returns the server"""
+        metrics = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+    def start_file_export(self, path, interval=15.0):
+        """Rewrite `path` every `interval` seconds on a background thread"""
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write_file(path)
+                except OSError:
+                    pass
+
+        threading.Thread(target=loop, name="metrics-file", daemon=True).start()
+
+
+# Shared by every module and session in the process
+METRICS = Metrics()
+
+
+def profile_call(fn, engine="cprofile"):
+    """Run fn() under cProfile or pyinstrument; returns a text report"""
+    if engine == "pyinstrument":
+        from pyinstrument import Profiler  # optional dependency
+
+        profiler = Profiler()
+        profiler.start()
+        try:
+            fn()
+        finally:
+            profiler.stop()
+        return profiler.output_text(unicode=True)
+
+    import cProfile
+    import io
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(fn)
+    finally:
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(30)
+    return out.getvalue()
@@ -0,0 +1,141 @@
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Default scrypt cost; raising these makes existing hashes rehash on next login
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+HASH_SCHEME = "scrypt"
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full"""
+
+
+def _b64encode(raw):
+    return base64.b64encode(raw).decode("ascii")
+
+
+def _scrypt(password, salt, n, r, p):
+    return hashlib.scrypt(
+        password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+        maxmem=256 * n * r, dklen=KEY_BYTES
+    )
+
+
+def hash_password(password, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P):
+    """Hash a password with a fresh salt, e.g. 'scrypt$n=16384,r=8,p=1$<salt>$<key>'"""
+    salt = os.urandom(SALT_BYTES)
+    key = _scrypt(password, salt, n, r, p)
+    return f"{HASH_SCHEME}$n={n},r={r},p={p}${_b64encode(salt)}${_b64encode(key)}"
+
+
+def parse_hash(stored):
+    """Split a stored hash into (params, salt, key), or None for legacy plaintext values"""
+    parts = stored.split("$")
+    if len(parts) != 4 or parts[0] != HASH_SCHEME:
+        return None
+    params = {name: int(value) for name, value in (item.split("=") for item in parts[1].split(","))}
+    return params, base64.b64decode(parts[2]), base64.b64decode(parts[3])
+
+
+def verify_password(password, stored):
+    """Check a password against a stored hash (legacy plaintext rows are compared directly)"""
+    parsed = parse_hash(stored)
+    if parsed is None:
+        return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8"))
+    params, salt, key = parsed
+    candidate = _scrypt(password, salt, params["n"], params["r"], params["p"])
+    return hmac.compare_digest(candidate, key)
+
+
+def needs_rehash(stored, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P):
+    """True if a stored hash is plaintext or was made with different cost parameters"""
+    parsed = parse_hash(stored)
+    if parsed is None:
+        return True
+    return parsed[0] != {"n": n, "r": r, "p": p}
+
+
+class HashingPool:
+    """Runs hashing/verification in worker processes so the script thread is never CPU-bound"""
+
+    def __init__(self, workers=None, max_pending=64, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.n, self.r, self.p = n, r, p
+        self._executor = self._new_executor()
+        self._executor_lock = threading.Lock()
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self.restarts = 0
+
+    def hash(self, password):
+        """Hash a password with the pool's cost parameters"""
+        return self.submit_hash(password).result()
+
+    def verify(self, password, stored):
+        """Verify a password against a stored hash"""
+        return self.submit_verify(password, stored).result()
+
+    def submit_hash(self, password):
+        """Queue a hash job and return its concurrent.futures.Future"""
+        return self._submit(hash_password, password, self.n, self.r, self.p)
+
+    def submit_verify(self, password, stored):
+        """Queue a verification job and return its concurrent.futures.Future"""
+        return self._submit(verify_password, password, stored)
+
+    def needs_rehash(self, stored):
+        """True if a stored hash doesn't match the pool's cost parameters"""
+        return needs_rehash(stored, self.n, self.r, self.p)
+
+    def stats(self):
+        return {"workers": self.workers, "restarts": self.restarts}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def _new_executor(self):
+        # spawn, not fork: the Streamlit server process is multi-threaded
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _replace(self, broken):
+        """Swap in a fresh executor if `broken` is still the current one; returns the current executor"""
+        with self._executor_lock:
+            if self._executor is broken:
+                self._executor = self._new_executor()
+                self.restarts += 1
+                broken.shutdown(wait=False)
+            return self._executor
+
+    def _submit(self, fn, *args):
+        if not self._pending.acquire(blocking=False):
+            raise HashingBusy(f"More than {self.max_pending} password hashes queued")
+        executor = self._executor
+        try:
+            try:
+                future = executor.submit(fn, *args)
+            except BrokenProcessPool:
+                # A worker died since the last job: the old executor refuses all work
+                executor = self._replace(executor)
+                future = executor.submit(fn, *args)
+        except BaseException:
+            self._pending.release()
+            raise
+        future.add_done_callback(lambda done: self._finished(done, executor))
+        return future
+
+    def _finished(self, future, executor):
+        self._pending.release()
+        # Jobs in flight when a worker dies fail with BrokenProcessPool; the next job gets a new pool
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._replace(executor)
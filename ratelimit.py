@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets kept in-process with bounded memory.
+
+    Each bucket is a (tokens, last_refill) pair. Buckets idle long enough to
+    have refilled completely are indistinguishable from new ones, so they are
+    dropped; past `max_keys` the least recently used bucket is evicted.
+    """
+
+    def __init__(self, rate, burst, max_keys=100000):
+        self.rate = rate          # tokens added per second
+        self.burst = burst        # bucket capacity
+        self.max_keys = max_keys
+        self._full_after = burst / rate
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+
+    def allow(self, key, cost=1):
+        """Take `cost` tokens from the key's bucket; False if it doesn't have enough"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            self._evict(now)
+            return allowed
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def _evict(self, now):
+        # Least recently used first, so stop at the first bucket that is still refilling
+        while self._buckets:
+            key, (_, last) = next(iter(self._buckets.items()))
+            if now - last < self._full_after and len(self._buckets) <= self.max_keys:
+                break
+            del self._buckets[key]
+
+
+# Refill and take atomically on the server: KEYS[1] = bucket, ARGV = rate, burst, now, cost
+_REDIS_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return allowed
+"""
+
+
+class RedisTokenBucketLimiter:
+    """Token buckets shared by several app replicas through Redis"""
+
+    def __init__(self, url, rate, burst, prefix="ratelimit:"):
+        import redis  # optional dependency, only needed for multi-node deployments
+
+        self.rate = rate
+        self.burst = burst
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url)
+        self._script = self.client.register_script(_REDIS_TOKEN_BUCKET)
+
+    def allow(self, key, cost=1):
+        """Take `cost` tokens from the key's bucket; False if it doesn't have enough"""
+        return bool(self._script(keys=[self.prefix + key], args=[self.rate, self.burst, time.time(), cost]))
@@ -0,0 +1,218 @@
+import itertools
+import threading
+import time
+
+from storage import ALL_USERS, StorageError
+
+
+class ReplicaRouter:
+    """Repository that writes to the primary and spreads reads over read replicas.
+
+    Takes the same calls as the repositories in storage.py. A monitor thread
+    probes each replica every `check_interval` seconds; reads go round-robin to
+    those that answered and are at most `max_lag` seconds behind, and to the
+    primary when none are. A replica that fails a read is skipped until its next
+    good probe and the read is retried on the primary (for streamed reads, only
+    if it failed before the first row).
+
+    Read-your-writes: for `sticky_for` seconds after a write, reads keyed by the
+    same user (id or username) stay on the primary. Writes made by other
+    processes aren't tracked, so credential and profile lookups that come back
+    empty from a replica are re-checked on the primary.
+    """
+
+    def __init__(self, primary, replicas, max_lag=5.0, check_interval=5.0, sticky_for=10.0):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.sticky_for = sticky_for
+        self.max_concurrency = primary.max_concurrency
+        self._lock = threading.Lock()
+        # Replica index -> last probed lag in seconds (None = down or not yet probed)
+        self._lag = [None] * len(self.replicas)
+        self._next = itertools.count()
+        # ("user", id) / ("username", casefolded name) -> monotonic time the stickiness ends
+        self._sticky = {}
+        self._stats = {"primary_reads": 0, "replica_reads": 0, "sticky_reads": 0, "rechecks": 0, "failovers": 0}
+        self._stop = threading.Event()
+        self._monitor = threading.Thread(target=self._run, name="replica-monitor", daemon=True)
+        self._monitor.start()
+
+    # Writes
+
+    def migrate(self):
+        """Migrate the primary (replicas receive the DDL through replication)"""
+        return self.primary.migrate()
+
+    def insert_user(self, username, email, password_hash, first_name="", last_name=""):
+        user_id = self.primary.insert_user(username, email, password_hash, first_name, last_name)
+        self._stick(("user", user_id), ("username", username.casefold()))
+        return user_id
+
+    def insert_users(self, rows):
+        self.primary.insert_users(rows)
+        self._stick(*[("username", username.casefold()) for username, _, _ in rows])
+
+    def update_password(self, user_id, password_hash):
+        self.primary.update_password(user_id, password_hash)
+        self._stick(("user", user_id))
+
+    def upsert_settings(self, user_id, fields):
+        self.primary.upsert_settings(user_id, fields)
+        self._stick(("user", user_id))
+
+    def record_events(self, events):
+        self.primary.record_events(events)
+        # Site-wide rows change on every write; their readers are cached and lag-tolerant anyway
+        self._stick(*{("user", event[0]) for event in events if event[0] != ALL_USERS})
+
+    # Reads that must see every committed row
+
+    def find_taken(self, usernames, emails):
+        return self.primary.find_taken(usernames, emails)
+
+    def users_after(self, after_id):
+        return self.primary.users_after(after_id)
+
+    # UserIndex.rebuild() scans every row up to the max id it read first: both halves must come
+    # from one source, or rows a lagging replica hasn't got yet would never enter the index
+    def count_and_max_id(self):
+        return self.primary.count_and_max_id()
+
+    def iter_usernames_emails(self, upto_id, batch_size=10000):
+        return self.primary.iter_usernames_emails(upto_id, batch_size)
+
+    # Reads served by replicas
+
+    def count_users(self):
+        return self._read("count_users")
+
+    def count_active_users(self, kind, since_day):
+        return self._read("count_active_users", kind, since_day)
+
+    def find_credentials(self, usernames):
+        keys = [("username", username.casefold()) for username in usernames]
+        rows, on_replica = self._route("find_credentials", usernames, keys=keys)
+        missing = [username for username in usernames if username.casefold() not in rows]
+        if missing and on_replica:
+            # Possibly registered moments ago through another process
+            self._count("rechecks")
+            rows.update(self.primary.find_credentials(missing))
+        return rows
+
+    def get_profile(self, user_id):
+        profile, on_replica = self._route("get_profile", user_id, keys=[("user", user_id)])
+        if profile is None and on_replica:
+            self._count("rechecks")
+            profile = self.primary.get_profile(user_id)
+        return profile
+
+    def get_settings(self, user_id):
+        return self._read("get_settings", user_id, keys=[("user", user_id)])
+
+    def recent_events(self, user_id, limit):
+        return self._read("recent_events", user_id, limit, keys=[("user", user_id)])
+
+    def iter_events(self, user_id, batch_size=1000):
+        return self._read("iter_events", user_id, batch_size, keys=[("user", user_id)])
+
+    def daily_rollups(self, user_id, since_day, before_day="9999-12-31"):
+        return self._read("daily_rollups", user_id, since_day, before_day, keys=[("user", user_id)])
+
+    def hourly_rollups(self, user_id, since_hour):
+        return self._read("hourly_rollups", user_id, since_hour, keys=[("user", user_id)])
+
+    def stats(self):
+        """Primary pool stats plus routing counters and replica health"""
+        stats = dict(self.primary.stats())
+        with self._lock:
+            stats.update(self._stats)
+            lags = [lag for lag in self._lag if lag is not None]
+        stats.update(
+            replicas=len(self.replicas),
+            healthy_replicas=sum(1 for lag in lags if lag <= self.max_lag),
+            replica_lag_max=max(lags, default=0.0),
+        )
+        return stats
+
+    def close(self):
+        self._stop.set()
+
+    def _read(self, method, *args, keys=()):
+        return self._route(method, *args, keys=keys)[0]
+
+    def _route(self, method, *args, keys=()):
+        """(result, served by a replica?) of a read"""
+        if keys and self._is_sticky(keys):
+            self._count("sticky_reads")
+            return getattr(self.primary, method)(*args), False
+        index = self._pick()
+        if index is None:
+            self._count("primary_reads")
+            return getattr(self.primary, method)(*args), False
+        self._count("replica_reads")
+        if method.startswith("iter_"):
+            return self._scan(index, method, args), True
+        try:
+            return getattr(self.replicas[index], method)(*args), True
+        except StorageError:
+            self._failed(index)
+            return getattr(self.primary, method)(*args), False
+
+    def _scan(self, index, method, args):
+        """Stream rows from a replica, switching to the primary if it fails before the first row"""
+        rows = getattr(self.replicas[index], method)(*args)
+        try:
+            first = next(rows)
+        except StopIteration:
+            return
+        except StorageError:
+            self._failed(index)
+            yield from getattr(self.primary, method)(*args)
+            return
+        yield first
+        yield from rows
+
+    def _failed(self, index):
+        # Out of rotation until the monitor's next successful probe
+        with self._lock:
+            self._lag[index] = None
+            self._stats["failovers"] += 1
+
+    def _pick(self):
+        with self._lock:
+            healthy = [i for i, lag in enumerate(self._lag) if lag is not None and lag <= self.max_lag]
+        if not healthy:
+            return None
+        return healthy[next(self._next) % len(healthy)]
+
+    def _stick(self, *keys):
+        until = time.monotonic() + self.sticky_for
+        with self._lock:
+            for key in keys:
+                self._sticky[key] = until
+
+    def _is_sticky(self, keys):
+        now = time.monotonic()
+        with self._lock:
+            return any(self._sticky.get(key, 0.0) > now for key in keys)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _run(self):
+        while True:
+            for index, replica in enumerate(self.replicas):
+                try:
+                    lag = replica.replication_lag()
+                except Exception:
+                    lag = None
+                with self._lock:
+                    self._lag[index] = lag
+            now = time.monotonic()
+            with self._lock:
+                self._sticky = {key: until for key, until in self._sticky.items() if until > now}
+            if self._stop.wait(self.check_interval):
+                return
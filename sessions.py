@@ -0,0 +1,132 @@
+import hashlib
+import hmac
+import json
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemorySessionStore:
+    """In-process LRU of sessions with sliding TTL (single node)"""
+
+    def __init__(self, ttl=1800, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # session id -> (data, expires_at), least recently used first
+        self._entries = OrderedDict()
+
+    def get(self, session_id):
+        """Return session data and push its expiry out, or None if missing/expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            data, expires_at = entry
+            if now >= expires_at:
+                del self._entries[session_id]
+                return None
+            self._entries[session_id] = (data, now + self.ttl)
+            self._entries.move_to_end(session_id)
+            return data
+
+    def put(self, session_id, data):
+        with self._lock:
+            self._entries[session_id] = (data, time.monotonic() + self.ttl)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisSessionStore:
+    """Sessions in Redis (or any server speaking its protocol) so replicas share logins"""
+
+    def __init__(self, url, ttl=1800, prefix="session:"):
+        import redis  # optional dependency, only needed for multi-node deployments
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, session_id):
+        # GETEX reads and slides the expiry in one round-trip
+        raw = self.client.getex(self.prefix + session_id, ex=self.ttl)
+        return None if raw is None else json.loads(raw)
+
+    def put(self, session_id, data):
+        self.client.set(self.prefix + session_id, json.dumps(data), ex=self.ttl)
+
+    def delete(self, session_id):
+        self.client.delete(self.prefix + session_id)
+
+
+class SessionManager:
+    """Issues signed session tokens ('<id>.<signature>') backed by a session store"""
+
+    def __init__(self, store, secret):
+        self.store = store
+        self._secret = secret.encode("utf-8") if isinstance(secret, str) else secret
+
+    def create(self, username, user_id=None):
+        """Start a session and return its token"""
+        session_id = secrets.token_urlsafe(24)
+        self.store.put(session_id, {"username": username, "user_id": user_id, "created_at": time.time()})
+        return f"{session_id}.{self._sign(session_id)}"
+
+    def resolve(self, token):
+        """Return the session data for a valid token (sliding its expiry), else None"""
+        session_id = self._verified_id(token)
+        return None if session_id is None else self.store.get(session_id)
+
+    def refresh(self, token):
+        """Swap a valid token for a new one carrying the same session; returns (token, data) or None"""
+        session_id = self._verified_id(token)
+        data = None if session_id is None else self.store.get(session_id)
+        if data is None:
+            return None
+        self.store.delete(session_id)
+        new_id = secrets.token_urlsafe(24)
+        self.store.put(new_id, data)
+        return f"{new_id}.{self._sign(new_id)}", data
+
+    def revoke(self, token):
+        session_id = self._verified_id(token)
+        if session_id is not None:
+            self.store.delete(session_id)
+
+    def issue_ticket(self, user_id, purpose, ttl):
+        """Signed '<user id>.<expiry>.<signature>' letting its bearer do only `purpose` for `ttl` seconds.
+
+        Stateless: any process with the same secret can verify it.
+        """
+        payload = f"{user_id}.{int(time.time()) + ttl}"
+        return f"{payload}.{self._sign(f'{purpose}:{payload}')}"
+
+    def verify_ticket(self, ticket, purpose):
+        """The user id of a valid, unexpired ticket for `purpose`, else None"""
+        payload, _, signature = (ticket or "").rpartition(".")
+        user_id, _, expires = payload.partition(".")
+        if not (user_id.isdigit() and expires.isdigit()):
+            return None
+        if not hmac.compare_digest(signature.encode("utf-8"), self._sign(f"{purpose}:{payload}").encode("ascii")):
+            return None
+        return int(user_id) if int(expires) >= time.time() else None
+
+    def _sign(self, session_id):
+        return hmac.new(self._secret, session_id.encode("utf-8"), hashlib.sha256).hexdigest()[:32]
+
+    def _verified_id(self, token):
+        # Forged or mangled tokens are rejected without touching the store
+        session_id, _, signature = (token or "").partition(".")
+        if not session_id or not hmac.compare_digest(signature.encode("utf-8"), self._sign(session_id).encode("ascii")):
+            return None
+        return session_id
@@ -0,0 +1,844 @@
+import re
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+
+# Process-wide totals across all repositories, read by benchmarks and metrics.
+# "queries" counts repository calls (one logical round-trip each).
+COUNTERS = {"queries": 0, "connections": 0}
+
+
+def _count(name):
+    COUNTERS[name] += 1
+
+
+class StorageError(Exception):
+    """Raised for any database failure, whatever the backend"""
+
+
+class DuplicateUserError(StorageError):
+    """Raised when an insert hits the unique username or email constraint"""
+
+    def __init__(self, field, message=""):
+        super().__init__(message or f"Duplicate {field}")
+        self.field = field  # "username", "email" or None if the backend didn't say
+
+
+def _placeholders(marker, count):
+    return ", ".join([marker] * count)
+
+
+# user_id of the rollup rows holding site-wide totals (real ids start at 1)
+ALL_USERS = 0
+
+
+def _rollups(events):
+    """Fold (user_id, kind, detail, created_at) events into hourly and daily rollup increments"""
+    hourly, daily = Counter(), Counter()
+    for user_id, kind, detail, created_at in events:
+        # created_at is "YYYY-MM-DD HH:MM:SS" (UTC)
+        hour, day = created_at[:13] + ":00:00", created_at[:10]
+        if user_id == ALL_USERS:
+            # Events with no account (e.g. failed logins) keep their detail in the events table only
+            hourly[ALL_USERS, hour, kind, ""] += 1
+            daily[ALL_USERS, day, kind, ""] += 1
+            continue
+        for owner in (user_id, ALL_USERS):
+            hourly[owner, hour, kind, detail] += 1
+            daily[owner, day, kind, detail] += 1
+    return [key + (n,) for key, n in hourly.items()], [key + (n,) for key, n in daily.items()]
+
+
+# ALL_USERS daily rollups of kind "<kind>:latest" count each user once, on the latest day they had
+# a `kind` event, so "distinct users since D" is a sum over a window's worth of rows
+LATEST_SUFFIX = ":latest"
+
+
+def _latest_days(events):
+    """(user_id, kind) -> the newest day among the events, for real users"""
+    latest = {}
+    for user_id, kind, _, created_at in events:
+        if user_id != ALL_USERS and created_at[:10] > latest.get((user_id, kind), ""):
+            latest[user_id, kind] = created_at[:10]
+    return latest
+
+
+def _advance_latest(latest, known):
+    """Rollup increments moving users' ":latest" marks forward, and the (user_id, kind, day) rows to store"""
+    daily, moved = Counter(), []
+    for (user_id, kind), day in latest.items():
+        previous = known.get((user_id, kind))
+        if previous is not None and previous >= day:
+            continue
+        if previous is not None:
+            daily[ALL_USERS, previous, kind + LATEST_SUFFIX, ""] -= 1
+        daily[ALL_USERS, day, kind + LATEST_SUFFIX, ""] += 1
+        moved.append((user_id, kind, day))
+    return [key + (n,) for key, n in daily.items()], moved
+
+
+# Columns of user_settings that callers may write (their defaults mirror settings.DEFAULT_SETTINGS)
+SETTINGS_COLUMNS = ("email_notifications", "push_notifications", "sms_alerts", "theme", "two_factor")
+
+
+def _settings_columns(fields):
+    unknown = set(fields) - set(SETTINGS_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown settings: {sorted(unknown)}")
+    return list(fields)
+
+
+def _statements(ddl):
+    return [ddl] if isinstance(ddl, str) else ddl
+
+
+class MySQLUserRepository:
+    """Users table in MySQL, accessed through a db.ConnectionPool"""
+
+    MIGRATIONS = [
+        (1, """
+            CREATE TABLE IF NOT EXISTS users (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                username VARCHAR(255) UNIQUE NOT NULL,
+                email VARCHAR(255) UNIQUE NOT NULL,
+                password VARCHAR(255) NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """),
+        (2, (
+            """
+            CREATE TABLE IF NOT EXISTS events (
+                id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                user_id INT NOT NULL,
+                kind VARCHAR(32) NOT NULL,
+                detail VARCHAR(64) NOT NULL DEFAULT '',
+                created_at DATETIME NOT NULL,
+                INDEX events_by_user (user_id, id)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS event_rollups_hourly (
+                user_id INT NOT NULL,
+                hour DATETIME NOT NULL,
+                kind VARCHAR(32) NOT NULL,
+                detail VARCHAR(64) NOT NULL DEFAULT '',
+                count INT NOT NULL,
+                PRIMARY KEY (user_id, hour, kind, detail)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS event_rollups_daily (
+                user_id INT NOT NULL,
+                day DATE NOT NULL,
+                kind VARCHAR(32) NOT NULL,
+                detail VARCHAR(64) NOT NULL DEFAULT '',
+                count INT NOT NULL,
+                PRIMARY KEY (user_id, day, kind, detail)
+            )
+            """,
+        )),
+        (3, """
+            CREATE TABLE IF NOT EXISTS user_settings (
+                user_id INT PRIMARY KEY,
+                email_notifications BOOLEAN NOT NULL DEFAULT TRUE,
+                push_notifications BOOLEAN NOT NULL DEFAULT TRUE,
+                sms_alerts BOOLEAN NOT NULL DEFAULT FALSE,
+                theme VARCHAR(16) NOT NULL DEFAULT 'Light',
+                two_factor BOOLEAN NOT NULL DEFAULT FALSE,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            )
+        """),
+        (4, """
+            ALTER TABLE users
+                ADD COLUMN first_name VARCHAR(50) NOT NULL DEFAULT '',
+                ADD COLUMN last_name VARCHAR(50) NOT NULL DEFAULT ''
+        """),
+        (5, (
+            """
+            CREATE TABLE IF NOT EXISTS user_last_seen (
+                user_id INT NOT NULL,
+                kind VARCHAR(32) NOT NULL,
+                day DATE NOT NULL,
+                PRIMARY KEY (user_id, kind)
+            )
+            """,
+            # Backfill from the existing rollups (one scan, at upgrade time)
+            """
+            INSERT INTO user_last_seen (user_id, kind, day)
+            SELECT user_id, kind, MAX(day) FROM event_rollups_daily WHERE user_id <> 0 GROUP BY user_id, kind
+            """,
+            """
+            INSERT INTO event_rollups_daily (user_id, day, kind, detail, count)
+            SELECT 0, day, CONCAT(kind, ':latest'), '', COUNT(*) FROM user_last_seen GROUP BY day, kind
+            """,
+        )),
+    ]
+    DUPLICATE_KEY_PATTERN = re.compile(r"for key '(?:\w+\.)?(\w+)'")
+
+    def __init__(self, pool, lock_name="student_db_schema_migration", lock_timeout=30):
+        self.pool = pool
+        self.lock_name = lock_name
+        self.lock_timeout = lock_timeout
+        self.max_concurrency = pool.size
+        if pool.on_open is None:
+            pool.on_open = lambda conn: _count("connections")
+
+    @contextmanager
+    def _connection(self):
+        from mysql.connector import Error, errorcode, errors
+
+        _count("queries")
+        try:
+            conn = self.pool.acquire()
+        except Error as e:
+            raise StorageError(str(e)) from e
+        try:
+            yield conn
+        except errors.IntegrityError as e:
+            if e.errno == errorcode.ER_DUP_ENTRY:
+                match = self.DUPLICATE_KEY_PATTERN.search(e.msg or "")
+                raise DuplicateUserError(match.group(1) if match else None, str(e)) from e
+            raise StorageError(str(e)) from e
+        except Error as e:
+            raise StorageError(str(e)) from e
+        finally:
+            self.pool.release(conn)
+
+    def migrate(self):
+        """Apply pending migrations and return the schema version"""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            # Serialize first runs across processes/replicas; the loser sees the migrations already applied
+            cursor.execute("SELECT GET_LOCK(%s, %s)", (self.lock_name, self.lock_timeout))
+            if cursor.fetchone()[0] != 1:
+                cursor.close()
+                raise StorageError("Timed out waiting for the schema migration lock")
+            try:
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS schema_version (
+                        version INT PRIMARY KEY,
+                        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+                version = cursor.fetchone()[0]
+                for migration_version, ddl in self.MIGRATIONS:
+                    if migration_version <= version:
+                        continue
+                    for statement in _statements(ddl):
+                        cursor.execute(statement)
+                    cursor.execute("INSERT INTO schema_version (version) VALUES (%s)", (migration_version,))
+                    conn.commit()
+                    version = migration_version
+                return version
+            finally:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (self.lock_name,))
+                cursor.fetchone()
+                cursor.close()
+
+    def count_users(self):
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM users")
+            count = cursor.fetchone()[0]
+            cursor.close()
+            return count
+
+    def find_credentials(self, usernames):
+        """Map casefolded username -> (id, password_hash) for the given usernames"""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT id, username, password FROM users WHERE username IN ({_placeholders('%s', len(usernames))})",
+                list(usernames)
+            )
+            rows = {username.casefold(): (user_id, password) for user_id, username, password in cursor.fetchall()}
+            cursor.close()
+            return rows
+
+    def find_taken(self, usernames, emails):
+        """(username, email) of existing rows matching any of the given usernames or emails"""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT username, email FROM users WHERE username IN ({}) OR email IN ({})".format(
+                    _placeholders("%s", len(usernames)), _placeholders("%s", len(emails))
+                ),
+                list(usernames) + list(emails)
+            )
+            taken = cursor.fetchall()
+            cursor.close()
+            return taken
+
+    def insert_user(self, username, email, password_hash, first_name="", last_name=""):
+        """Insert one user and return its id"""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO users (username, email, password, first_name, last_name) VALUES (%s, %s, %s, %s, %s)",
+                (username, email, password_hash, first_name, last_name)
+            )
+            conn.commit()
+            user_id = cursor.lastrowid
+            cursor.close()
+            return user_id
+
+    def get_profile(self, user_id):
+        """(username, email, created_at, first_name, last_name) for a user id, or None"""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT username, email, created_at, first_name, last_name FROM users WHERE id = %s", (user_id,)
+            )
+            row = cursor.fetchone()
+            cursor.close()
+            return None if row is None else (row[0], row[1], str(row[2]), row[3], row[4])
+
+    def insert_users(self, rows):
+        """Insert (username, email, password_hash) rows in one statement; all or nothing"""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            # mysql-connector rewrites executemany on INSERT ... VALUES into one multi-row statement
+            cursor.executemany("INSERT INTO users (username, email, password) VALUES (%s, %s, %s)", rows)
+            conn.commit()
+            cursor.close()
+
+    def update_password(self, user_id, password_hash):
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE users SET password = %s WHERE id = %s", (password_hash, user_id))
+            conn.commit()
+            cursor.close()
+
+    def count_and_max_id(self):
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM users")
+            result = cursor.fetchone()
+            cursor.close()
+            return result
+
+    def iter_usernames_emails(self, upto_id, batch_size=10000):
+        """Stream (username, email) for rows with id <= upto_id without loading them all"""
+        with self._connection() as conn:
+            # Unbuffered cursor: rows stream from the server in chunks
+            cursor = conn.cursor()
+            cursor.execute("SELECT username, email FROM users WHERE id <= %s", (upto_id,))
+            while True:
+                chunk = cursor.fetchmany(batch_size)
+                if not chunk:
+                    break
+                yield from chunk
+            cursor.close()
+
+    def users_after(self, after_id):
+        """(id, username, email) of rows with id > after_id"""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, username, email FROM users WHERE id > %s", (after_id,))
+            rows = cursor.fetchall()
+            cursor.close()
+            return rows
+
+    def get_settings(self, user_id):
+        """{column: value} of the user's saved settings, or None if they never saved any"""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT {', '.join(SETTINGS_COLUMNS)} FROM user_settings WHERE user_id = %s", (user_id,))
+            row = cursor.fetchone()
+            cursor.close()
+            return None if row is None else dict(zip(SETTINGS_COLUMNS, row))
+
+    def upsert_settings(self, user_id, fields):
+        """Write only the given {column: value} settings for the user in one statement"""
+        columns = _settings_columns(fields)
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO user_settings (user_id, {}) VALUES (%s, {}) ON DUPLICATE KEY UPDATE {}".format(
+                    ", ".join(columns),
+                    _placeholders("%s", len(columns)),
+                    ", ".join(f"{column} = VALUES({column})" for column in columns)
+                ),
+                [user_id] + [fields[column] for column in columns]
+            )
+            conn.commit()
+            cursor.close()
+
+    def record_events(self, events):
+        """Insert (user_id, kind, detail, created_at) events and bump their rollups in one transaction"""
+        hourly, daily = _rollups(events)
+        latest = _latest_days(events)
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            known = {}
+            if latest:
+                users = sorted({user_id for user_id, _ in latest})
+                # Locks the users' rows so concurrent writers move each mark once
+                cursor.execute(
+                    f"SELECT user_id, kind, day FROM user_last_seen WHERE user_id IN ({_placeholders('%s', len(users))}) "
+                    "FOR UPDATE", users
+                )
+                known = {(user_id, kind): str(day) for user_id, kind, day in cursor.fetchall()}
+            marks, moved = _advance_latest(latest, known)
+            cursor.executemany(
+                "INSERT INTO events (user_id, kind, detail, created_at) VALUES (%s, %s, %s, %s)", events
+            )
+            cursor.executemany(
+                "INSERT INTO event_rollups_hourly (user_id, hour, kind, detail, count) VALUES (%s, %s, %s, %s, %s) "
+                "ON DUPLICATE KEY UPDATE count = count + VALUES(count)", hourly
+            )
+            cursor.executemany(
+                "INSERT INTO event_rollups_daily (user_id, day, kind, detail, count) VALUES (%s, %s, %s, %s, %s) "
+                "ON DUPLICATE KEY UPDATE count = count + VALUES(count)", daily + marks
+            )
+            cursor.executemany(
+                "INSERT INTO user_last_seen (user_id, kind, day) VALUES (%s, %s, %s) "
+                "ON DUPLICATE KEY UPDATE day = VALUES(day)", moved
+            )
+            conn.commit()
+            cursor.close()
+
+    def recent_events(self, user_id, limit):
+        """(kind, detail, created_at) of the user's latest events, newest first"""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT kind, detail, created_at FROM events WHERE user_id = %s ORDER BY id DESC LIMIT %s",
+                (user_id, limit)
+            )
+            rows = [(kind, detail, str(created_at)) for kind, detail, created_at in cursor.fetchall()]
+            cursor.close()
+            return rows
+
+    def iter_events(self, user_id, batch_size=1000):
+        """Stream (kind, detail, created_at) of all the user's events, oldest first, without loading them all"""
+        with self._connection() as conn:
+            # Unbuffered cursor: rows stream from the server in chunks
+            cursor = conn.cursor()
+            cursor.execute("SELECT kind, detail, created_at FROM events WHERE user_id = %s ORDER BY id", (user_id,))
+            while True:
+                chunk = cursor.fetchmany(batch_size)
+                if not chunk:
+                    break
+                for kind, detail, created_at in chunk:
+                    yield kind, detail, str(created_at)
+            cursor.close()
+
+    def daily_rollups(self, user_id, since_day, before_day="9999-12-31"):
+        """(day, kind, detail, count) rollup rows for the user (ALL_USERS for totals) from since_day until before_day"""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT day, kind, detail, count FROM event_rollups_daily WHERE user_id = %s AND day >= %s AND day < %s",
+                (user_id, since_day, before_day)
+            )
+            rows = [(str(day), kind, detail, count) for day, kind, detail, count in cursor.fetchall()]
+            cursor.close()
+            return rows
+
+    def hourly_rollups(self, user_id, since_hour):
+        """(hour, kind, detail, count) rollup rows for the user (ALL_USERS for totals) from since_hour on"""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT hour, kind, detail, count FROM event_rollups_hourly WHERE user_id = %s AND hour >= %s",
+                (user_id, since_hour)
+            )
+            rows = [(str(hour), kind, detail, count) for hour, kind, detail, count in cursor.fetchall()]
+            cursor.close()
+            return rows
+
+    def count_active_users(self, kind, since_day):
+        """Distinct users with at least one `kind` event from since_day on (sums the ":latest" rollups)"""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT COALESCE(SUM(count), 0) FROM event_rollups_daily WHERE user_id = %s AND day >= %s AND kind = %s",
+                (ALL_USERS, since_day, kind + LATEST_SUFFIX)
+            )
+            count = int(cursor.fetchone()[0])
+            cursor.close()
+            return count
+
+    def replication_lag(self):
+        """Seconds this server is behind its source: 0.0 if it isn't a replica, None if replication is stopped"""
+        with self._connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("SHOW REPLICA STATUS")
+            row = cursor.fetchone()
+            cursor.close()
+        if row is None:
+            return 0.0
+        lag = row["Seconds_Behind_Source"]
+        return None if lag is None else float(lag)
+
+    def stats(self):
+        return self.pool.stats()
+
+
+class SQLiteUserRepository:
+    """Users table in an embedded SQLite file (WAL mode, a bounded pool of connections shared by all threads)"""
+
+    MIGRATIONS = [
+        (1, """
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL COLLATE NOCASE,
+                email TEXT UNIQUE NOT NULL COLLATE NOCASE,
+                password TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """),
+        (2, (
+            """
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                detail TEXT NOT NULL DEFAULT '',
+                created_at TEXT NOT NULL
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS events_by_user ON events (user_id, id)",
+            """
+            CREATE TABLE IF NOT EXISTS event_rollups_hourly (
+                user_id INTEGER NOT NULL,
+                hour TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                detail TEXT NOT NULL DEFAULT '',
+                count INTEGER NOT NULL,
+                PRIMARY KEY (user_id, hour, kind, detail)
+            ) WITHOUT ROWID
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS event_rollups_daily (
+                user_id INTEGER NOT NULL,
+                day TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                detail TEXT NOT NULL DEFAULT '',
+                count INTEGER NOT NULL,
+                PRIMARY KEY (user_id, day, kind, detail)
+            ) WITHOUT ROWID
+            """,
+        )),
+        (3, """
+            CREATE TABLE IF NOT EXISTS user_settings (
+                user_id INTEGER PRIMARY KEY,
+                email_notifications INTEGER NOT NULL DEFAULT 1,
+                push_notifications INTEGER NOT NULL DEFAULT 1,
+                sms_alerts INTEGER NOT NULL DEFAULT 0,
+                theme TEXT NOT NULL DEFAULT 'Light',
+                two_factor INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """),
+        (4, (
+            "ALTER TABLE users ADD COLUMN first_name TEXT NOT NULL DEFAULT ''",
+            "ALTER TABLE users ADD COLUMN last_name TEXT NOT NULL DEFAULT ''",
+        )),
+        (5, (
+            """
+            CREATE TABLE IF NOT EXISTS user_last_seen (
+                user_id INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                day TEXT NOT NULL,
+                PRIMARY KEY (user_id, kind)
+            ) WITHOUT ROWID
+            """,
+            # Backfill from the existing rollups (one scan, at upgrade time)
+            """
+            INSERT INTO user_last_seen (user_id, kind, day)
+            SELECT user_id, kind, MAX(day) FROM event_rollups_daily WHERE user_id <> 0 GROUP BY user_id, kind
+            """,
+            """
+            INSERT INTO event_rollups_daily (user_id, day, kind, detail, count)
+            SELECT 0, day, kind || ':latest', '', COUNT(*) FROM user_last_seen GROUP BY day, kind
+            """,
+        )),
+    ]
+    DUPLICATE_COLUMN_PATTERN = re.compile(r"UNIQUE constraint failed: \w+\.(\w+)")
+
+    def __init__(self, path, busy_timeout=5.0, max_concurrency=4, pool_size=10, pool_timeout=5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        # Readers never block in WAL mode; this only sizes callers' worker pools
+        self.max_concurrency = max_concurrency
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+        # Shared rather than per thread: Streamlit runs every rerun on a new thread, which
+        # would otherwise open (and re-PRAGMA) a fresh connection each time
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._idle = []
+        self._lock = threading.Lock()
+        self._stats = {"opened": 0, "closed": 0, "checkouts": 0, "timeouts": 0}
+
+    def _open(self):
+        # cached_statements keeps each distinct query compiled (prepared) for reuse;
+        # a connection is only ever used by one thread at a time (the one that checked it out)
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, cached_statements=256, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock:
+            self._stats["opened"] += 1
+        _count("connections")
+        return conn
+
+    def _acquire(self):
+        """Check out an idle connection (or open one), waiting up to `pool_timeout` for a free slot"""
+        if not self._slots.acquire(timeout=self.pool_timeout):
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise StorageError(f"No free database connection after {self.pool_timeout}s (pool size {self.pool_size})")
+        try:
+            with self._lock:
+                self._stats["checkouts"] += 1
+                if self._idle:
+                    return self._idle.pop()
+            return self._open()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            with self._lock:
+                self._stats["closed"] += 1
+        else:
+            with self._lock:
+                self._idle.append(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def _connection(self):
+        _count("queries")
+        conn = self._acquire()
+        try:
+            yield conn
+        except sqlite3.IntegrityError as e:
+            conn.rollback()
+            match = self.DUPLICATE_COLUMN_PATTERN.search(str(e))
+            if match is None:
+                raise StorageError(str(e)) from e
+            raise DuplicateUserError(match.group(1), str(e)) from e
+        except sqlite3.Error as e:
+            conn.rollback()
+            raise StorageError(str(e)) from e
+        finally:
+            self._release(conn)
+
+    def migrate(self):
+        """Apply pending migrations and return the schema version"""
+        with self._connection() as conn:
+            # BEGIN IMMEDIATE takes the write lock, serializing concurrent first runs
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS schema_version (
+                        version INTEGER PRIMARY KEY,
+                        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                version = conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+                for migration_version, ddl in self.MIGRATIONS:
+                    if migration_version <= version:
+                        continue
+                    for statement in _statements(ddl):
+                        conn.execute(statement)
+                    conn.execute("INSERT INTO schema_version (version) VALUES (?)", (migration_version,))
+                    version = migration_version
+                conn.commit()
+                return version
+            except BaseException:
+                conn.rollback()
+                raise
+
+    def count_users(self):
+        with self._connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def find_credentials(self, usernames):
+        """Map casefolded username -> (id, password_hash) for the given usernames"""
+        with self._connection() as conn:
+            rows = conn.execute(
+                f"SELECT id, username, password FROM users WHERE username IN ({_placeholders('?', len(usernames))})",
+                list(usernames)
+            ).fetchall()
+            return {username.casefold(): (user_id, password) for user_id, username, password in rows}
+
+    def find_taken(self, usernames, emails):
+        """(username, email) of existing rows matching any of the given usernames or emails"""
+        with self._connection() as conn:
+            return conn.execute(
+                "SELECT username, email FROM users WHERE username IN ({}) OR email IN ({})".format(
+                    _placeholders("?", len(usernames)), _placeholders("?", len(emails))
+                ),
+                list(usernames) + list(emails)
+            ).fetchall()
+
+    def insert_user(self, username, email, password_hash, first_name="", last_name=""):
+        """Insert one user and return its id"""
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "INSERT INTO users (username, email, password, first_name, last_name) VALUES (?, ?, ?, ?, ?)",
+                (username, email, password_hash, first_name, last_name)
+            )
+            conn.commit()
+            return cursor.lastrowid
+
+    def get_profile(self, user_id):
+        """(username, email, created_at, first_name, last_name) for a user id, or None"""
+        with self._connection() as conn:
+            return conn.execute(
+                "SELECT username, email, created_at, first_name, last_name FROM users WHERE id = ?", (user_id,)
+            ).fetchone()
+
+    def insert_users(self, rows):
+        """Insert (username, email, password_hash) rows in one transaction; all or nothing"""
+        with self._connection() as conn:
+            conn.executemany("INSERT INTO users (username, email, password) VALUES (?, ?, ?)", rows)
+            conn.commit()
+
+    def update_password(self, user_id, password_hash):
+        with self._connection() as conn:
+            conn.execute("UPDATE users SET password = ? WHERE id = ?", (password_hash, user_id))
+            conn.commit()
+
+    def count_and_max_id(self):
+        with self._connection() as conn:
+            return conn.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM users").fetchone()
+
+    def iter_usernames_emails(self, upto_id, batch_size=10000):
+        """Stream (username, email) for rows with id <= upto_id without loading them all"""
+        with self._connection() as conn:
+            cursor = conn.execute("SELECT username, email FROM users WHERE id <= ?", (upto_id,))
+            while True:
+                chunk = cursor.fetchmany(batch_size)
+                if not chunk:
+                    break
+                yield from chunk
+            cursor.close()
+
+    def users_after(self, after_id):
+        """(id, username, email) of rows with id > after_id"""
+        with self._connection() as conn:
+            return conn.execute("SELECT id, username, email FROM users WHERE id > ?", (after_id,)).fetchall()
+
+    def get_settings(self, user_id):
+        """{column: value} of the user's saved settings, or None if they never saved any"""
+        with self._connection() as conn:
+            row = conn.execute(
+                f"SELECT {', '.join(SETTINGS_COLUMNS)} FROM user_settings WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            return None if row is None else dict(zip(SETTINGS_COLUMNS, row))
+
+    def upsert_settings(self, user_id, fields):
+        """Write only the given {column: value} settings for the user in one statement"""
+        columns = _settings_columns(fields)
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO user_settings (user_id, {}) VALUES (?, {}) "
+                "ON CONFLICT (user_id) DO UPDATE SET {}, updated_at = CURRENT_TIMESTAMP".format(
+                    ", ".join(columns),
+                    _placeholders("?", len(columns)),
+                    ", ".join(f"{column} = excluded.{column}" for column in columns)
+                ),
+                [user_id] + [fields[column] for column in columns]
+            )
+            conn.commit()
+
+    def record_events(self, events):
+        """Insert (user_id, kind, detail, created_at) events and bump their rollups in one transaction"""
+        hourly, daily = _rollups(events)
+        latest = _latest_days(events)
+        with self._connection() as conn:
+            # Write lock up front, so the marks read below can't be moved by another writer meanwhile
+            conn.execute("BEGIN IMMEDIATE")
+            known = {}
+            if latest:
+                users = sorted({user_id for user_id, _ in latest})
+                rows = conn.execute(
+                    f"SELECT user_id, kind, day FROM user_last_seen WHERE user_id IN ({_placeholders('?', len(users))})",
+                    users
+                ).fetchall()
+                known = {(user_id, kind): day for user_id, kind, day in rows}
+            marks, moved = _advance_latest(latest, known)
+            conn.executemany("INSERT INTO events (user_id, kind, detail, created_at) VALUES (?, ?, ?, ?)", events)
+            conn.executemany(
+                "INSERT INTO event_rollups_hourly (user_id, hour, kind, detail, count) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (user_id, hour, kind, detail) DO UPDATE SET count = count + excluded.count", hourly
+            )
+            conn.executemany(
+                "INSERT INTO event_rollups_daily (user_id, day, kind, detail, count) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (user_id, day, kind, detail) DO UPDATE SET count = count + excluded.count", daily + marks
+            )
+            conn.executemany(
+                "INSERT INTO user_last_seen (user_id, kind, day) VALUES (?, ?, ?) "
+                "ON CONFLICT (user_id, kind) DO UPDATE SET day = excluded.day", moved
+            )
+            conn.commit()
+
+    def recent_events(self, user_id, limit):
+        """(kind, detail, created_at) of the user's latest events, newest first"""
+        with self._connection() as conn:
+            return conn.execute(
+                "SELECT kind, detail, created_at FROM events WHERE user_id = ? ORDER BY id DESC LIMIT ?", (user_id, limit)
+            ).fetchall()
+
+    def iter_events(self, user_id, batch_size=1000):
+        """Stream (kind, detail, created_at) of all the user's events, oldest first, without loading them all"""
+        with self._connection() as conn:
+            cursor = conn.execute("SELECT kind, detail, created_at FROM events WHERE user_id = ? ORDER BY id", (user_id,))
+            while True:
+                chunk = cursor.fetchmany(batch_size)
+                if not chunk:
+                    break
+                yield from chunk
+            cursor.close()
+
+    def daily_rollups(self, user_id, since_day, before_day="9999-12-31"):
+        """(day, kind, detail, count) rollup rows for the user (ALL_USERS for totals) from since_day until before_day"""
+        with self._connection() as conn:
+            return conn.execute(
+                "SELECT day, kind, detail, count FROM event_rollups_daily WHERE user_id = ? AND day >= ? AND day < ?",
+                (user_id, since_day, before_day)
+            ).fetchall()
+
+    def hourly_rollups(self, user_id, since_hour):
+        """(hour, kind, detail, count) rollup rows for the user (ALL_USERS for totals) from since_hour on"""
+        with self._connection() as conn:
+            return conn.execute(
+                "SELECT hour, kind, detail, count FROM event_rollups_hourly WHERE user_id = ? AND hour >= ?",
+                (user_id, since_hour)
+            ).fetchall()
+
+    def count_active_users(self, kind, since_day):
+        """Distinct users with at least one `kind` event from since_day on (sums the ":latest" rollups)"""
+        with self._connection() as conn:
+            return conn.execute(
+                "SELECT COALESCE(SUM(count), 0) FROM event_rollups_daily WHERE user_id = ? AND day >= ? AND kind = ?",
+                (ALL_USERS, since_day, kind + LATEST_SUFFIX)
+            ).fetchone()[0]
+
+    def replication_lag(self):
+        """Always 0.0: a local copy has no replication status (and must be readable)"""
+        with self._connection() as conn:
+            conn.execute("SELECT 1 FROM users LIMIT 1").fetchall()
+        return 0.0
+
+    def stats(self):
+        """Pool size and usage"""
+        with self._lock:
+            stats = dict(self._stats)
+            idle = len(self._idle)
+        open_conns = stats["opened"] - stats["closed"]
+        stats.update(backend="sqlite", path=self.path, size=self.pool_size, open=open_conns, idle=idle,
+                     in_use=open_conns - idle)
+        return stats
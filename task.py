@@ -1,5 +1,33 @@
 import streamlit as st
+from auth_core import AuthError, shared_core
+from auth_ui import get_client_address, show_auth_error
+from storage import StorageError
+
+# Served as the "Task" page of login.py (so it shares that server's AuthCore: pool and caches);
+# `streamlit run task.py` on its own still works but opens its own
+core = shared_core()
+
+try:
+    core.ensure_schema()
+except StorageError as e:
+    st.error(f"❌ Database error: {e}")
+    st.stop()
+
 st.sidebar.title("Menu")
+if st.session_state.get("task_user_id"):
+    try:
+        profile = core.profile(st.session_state.task_user_id)
+    except StorageError as e:
+        st.warning(f"⚠️ Profile is unavailable right now: {e}")
+        profile = None
+    name = f"{profile[3]} {profile[4]}".strip() if profile else ""
+    st.header(f"Welcome, {name or st.session_state.task_username}! 👋")
+    if st.sidebar.button("Logout"):
+        core.end_session(st.session_state.pop("task_token"), st.session_state.pop("task_user_id"))
+        st.session_state.pop("task_username")
+        st.rerun()
+    st.stop()
+
 st.write("Choose an option:")
 option = st.sidebar.radio(
 "Choose page",
@@ -11,11 +39,17 @@ if option == "Register":
         fname = st.text_input("First Name")
         lname = st.text_input("Last Name")
         uname = st.text_input("User Name")
+        email = st.text_input("Email")
         pwd = st.text_input("Password",type= "password")
+        confirm = st.text_input("Confirm Password",type= "password")
         register = st.form_submit_button("register")
         if register:
-            st.success("Registration Successful")
-            st.write(fname, lname, uname)
+            try:
+                core.register(uname, email, pwd, confirm, get_client_address(), fname, lname)
+                st.success("Registration Successful")
+                st.write(fname, lname, uname)
+            except AuthError as e:
+                show_auth_error(e)
 elif option == "Login":
     st.header("login")
     with st.form("login_from"):
@@ -23,5 +57,12 @@ elif option == "Login":
         pwd = st.text_input("Password",type="password")
         login = st.form_submit_button("login")
         if login:
-            st.success("Login Successful")
-            st.write(uname)
\ No newline at end of file
+            try:
+                user_id = core.login(uname, pwd, get_client_address())
+            except AuthError as e:
+                show_auth_error(e)
+            else:
+                st.session_state.task_token = core.start_session(uname, user_id)
+                st.session_state.task_user_id = user_id
+                st.session_state.task_username = uname
+                st.rerun()
@@ -0,0 +1,78 @@
+import functools
+import html
+import os
+from string import Formatter
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+RENDER_CACHE_SIZE = 1024   # distinct (template, values) renders kept
+
+
+class Template:
+    """A template compiled once into literal text and {field[:spec]} slots.
+
+    Uses str.format syntax (`{{`/`}}` for literal braces); every value filled
+    in is formatted with its spec and then HTML-escaped.
+    """
+
+    def __init__(self, text):
+        self.parts = []
+        for literal, field, spec, conversion in Formatter().parse(text):
+            if literal:
+                self.parts.append(literal)
+            if field is None:
+                continue
+            if not field.isidentifier() or conversion:
+                raise ValueError(f"Unsupported template field {{{field}}}: only plain names with a format spec")
+            self.parts.append((field, spec))
+        self.fields = frozenset(part[0] for part in self.parts if isinstance(part, tuple))
+
+    def render(self, values):
+        return "".join(
+            part if isinstance(part, str) else html.escape(format(values[part[0]], part[1]))
+            for part in self.parts
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def load(name):
+    """Contents of templates/<name>, read from disk once per process"""
+    with open(os.path.join(TEMPLATE_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+@functools.lru_cache(maxsize=None)
+def compile_template(name):
+    """templates/<name> parsed once per process"""
+    return Template(load(name))
+
+
+@functools.lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _render(name, items):
+    return compile_template(name).render({field: value for field, _, value in items})
+
+
+def render(name, **values):
+    """Fill a template from templates/ with HTML-escaped values; identical calls return the memoized HTML"""
+    # The type is part of the key: 1, 1.0 and True are equal and hash alike but format differently
+    key = tuple(sorted((field, type(value), value) for field, value in values.items()))
+    try:
+        return _render(name, key)
+    except TypeError:
+        # Unhashable value: render without memoizing
+        return compile_template(name).render(values)
+
+
+def stats():
+    info = _render.cache_info()
+    return {
+        "templates": compile_template.cache_info().currsize,
+        "render_hits": info.hits,
+        "render_misses": info.misses,
+        "render_cached": info.currsize,
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def stylesheet(name):
+    """templates/<name> as one whitespace-collapsed <style> block, built once per process"""
+    return f"<style>{' '.join(load(name).split())}</style>"
@@ -0,0 +1,53 @@
+import os
+import sys
+
+# config.py reads the environment at import: point everything at throwaway SQLite files
+os.environ.update(
+    DB_BACKEND="sqlite",
+    ACTIVITY_SPILL_PATH="",
+    RATE_LIMITS_ENABLED="0",
+    PASSWORD_HASH_N=str(2 ** 10),
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import config
+from auth_core import AuthCore
+from storage import SQLiteUserRepository
+
+
+def add_users(repository, *usernames):
+    """Insert users named after `usernames` (email <name>@example.com); returns their ids"""
+    return [repository.insert_user(name, f"{name}@example.com", "hash") for name in usernames]
+
+
+@pytest.fixture
+def repository(tmp_path):
+    """A migrated SQLite users repository in a temporary file"""
+    repo = SQLiteUserRepository(str(tmp_path / "users.sqlite3"))
+    repo.migrate()
+    return repo
+
+
+@pytest.fixture
+def core_factory(tmp_path, monkeypatch):
+    """Builds AuthCores sharing one temporary SQLite database, closed after the test"""
+    monkeypatch.setattr(config, "SQLITE_PATH", str(tmp_path / "shared.sqlite3"))
+    monkeypatch.setattr(config, "PASSWORD_HASH_WORKERS", 1)
+    cores = []
+
+    def create():
+        core = AuthCore()
+        core.ensure_schema()
+        cores.append(core)
+        return core
+
+    yield create
+    for core in cores:
+        core.close()
+
+
+@pytest.fixture
+def core(core_factory):
+    return core_factory()
@@ -0,0 +1,116 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+from datetime import timedelta
+
+import pytest
+
+from activity import LOGIN, PAGE_VIEW, ActivityLog, utc_now
+
+
+def exited_pid():
+    """The pid of a process that has already exited"""
+    child = subprocess.Popen([sys.executable, "-c", "pass"])
+    child.wait()
+    return child.pid
+
+
+def flush(log, timeout=10):
+    # flush() blocks forever if the writer thread has died; fail instead of hanging
+    worker = threading.Thread(target=log.flush, daemon=True)
+    worker.start()
+    worker.join(timeout)
+    assert not worker.is_alive(), "activity writer stopped draining the queue"
+
+
+def write_spill(path, events, torn=False):
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(event) + "\n" for event in events)
+        if torn:
+            f.write('[7, "page_view", "Ho')
+
+
+def spilled_event(user_id, detail):
+    return [user_id, PAGE_VIEW, detail, "2026-01-01 00:00:00"]
+
+
+@pytest.fixture
+def spill_path(tmp_path):
+    return str(tmp_path / "activity_spill.jsonl")
+
+
+def test_torn_spill_line_is_skipped(repository, spill_path):
+    write_spill(f"{spill_path}.{exited_pid()}", [spilled_event(7, "Home"), spilled_event(7, "Profile")], torn=True)
+    log = ActivityLog(repository, flush_interval=0.01, spill_path=spill_path)
+    log.record(7, LOGIN)
+    flush(log)
+    assert log.stats()["replayed"] == 2
+    assert log.stats()["corrupt"] == 1
+    assert len(repository.recent_events(7, 10)) == 3
+    assert not [name for name in os.listdir(os.path.dirname(spill_path)) if name.startswith("activity_spill")]
+
+
+def test_writer_survives_a_failing_replay(repository, spill_path, monkeypatch):
+    log = ActivityLog(repository, flush_interval=0.01, spill_path=spill_path)
+
+    def broken():
+        raise OSError("disk gone")
+
+    monkeypatch.setattr(log, "_replay_spill", broken)
+    log._spill_pending = True
+    log.record(8, LOGIN)
+    flush(log)
+    assert log.stats()["errors"] == 1
+    log.record(8, PAGE_VIEW, "Home")
+    flush(log)
+    assert len(repository.recent_events(8, 10)) == 2
+
+
+def test_leftovers_are_replayed_by_one_process_only(repository, spill_path):
+    pid = exited_pid()
+    write_spill(f"{spill_path}.{pid}", [spilled_event(9, "Home")])
+    # Half-replayed when its process crashed
+    write_spill(f"{spill_path}.{pid}.replaying", [spilled_event(9, "Dashboard")])
+    first = ActivityLog(repository, flush_interval=0.01, spill_path=spill_path)
+    second = ActivityLog(repository, flush_interval=0.01, spill_path=spill_path)
+    for log in (first, second):
+        log.record(10, LOGIN)
+        flush(log)
+    assert first.stats()["replayed"] + second.stats()["replayed"] == 2
+    assert sorted(detail for _, detail, _ in repository.recent_events(9, 10)) == ["Dashboard", "Home"]
+
+
+def test_running_process_keeps_its_spill_file(repository, spill_path):
+    live = f"{spill_path}.{os.getppid()}"
+    write_spill(live, [spilled_event(11, "Home")])
+    log = ActivityLog(repository, flush_interval=0.01, spill_path=spill_path)
+    log.record(12, LOGIN)
+    flush(log)
+    assert os.path.exists(live)
+    assert repository.recent_events(11, 10) == []
+
+
+def days_ago(days):
+    return (utc_now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def test_user_summary_reads_old_rollups_once(repository, monkeypatch):
+    repository.record_events([
+        (13, LOGIN, "", days_ago(40)), (13, PAGE_VIEW, "Home", days_ago(40)),
+        (13, PAGE_VIEW, "Profile", days_ago(20)), (13, LOGIN, "", days_ago(1)),
+    ])
+    log = ActivityLog(repository, flush_interval=0.01)
+    log.record(13, PAGE_VIEW, "Home")
+    reads = []
+    daily_rollups = repository.daily_rollups
+    monkeypatch.setattr(repository, "daily_rollups", lambda *args: reads.append(args) or daily_rollups(*args))
+    first = log.user_summary(13)
+    flush(log)
+    assert log.user_summary(13) == first == {
+        "sessions": 2, "page_views": 3, "active_days": 4, "pages": 2,
+        "sessions_recent": 1, "page_views_recent": 1, "active_days_recent": 2,
+    }
+    since = (utc_now() - timedelta(days=6)).strftime("%Y-%m-%d")
+    assert reads == [(13, "1970-01-01", since), (13, since), (13, since)]
@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+import pytest
+
+import api
+import config
+from activity import PAGE_VIEW
+from conftest import add_users
+
+
+def call(method, path, query=b"", headers=()):
+    """Drive the ASGI app once; returns (status, headers, body chunks)"""
+    scope = {"type": "http", "method": method, "path": path, "query_string": query, "headers": list(headers),
+             "client": ("127.0.0.1", 5000)}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(api.app(scope, receive, send))
+    start = sent[0]
+    return start["status"], dict(start["headers"]), [m["body"] for m in sent[1:] if m["body"]]
+
+
+@pytest.fixture(autouse=True)
+def api_core(core, monkeypatch):
+    monkeypatch.setattr(api, "core", core)
+
+
+def test_several_workers_need_a_shared_session_store(monkeypatch):
+    monkeypatch.setattr(config, "API_WORKERS", 4)
+    monkeypatch.setattr(config, "SESSION_SECRET", "secret")
+    monkeypatch.setattr(config, "SESSION_STORE_URL", None)
+    with pytest.raises(SystemExit, match="SESSION_STORE_URL"):
+        api.main()
+
+
+def test_export_streams_with_a_ticket(core):
+    (user_id,) = add_users(core.repository, "alice")
+    core.repository.record_events([(user_id, PAGE_VIEW, "Home", "2026-01-01 00:00:00")] * 3)
+    ticket = core.export_ticket(user_id)
+    status, headers, chunks = call("GET", "/export", f"format=ndjson&ticket={ticket}".encode())
+    assert status == 200
+    assert headers[b"content-type"] == b"application/x-ndjson"
+    records = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    assert records[0]["username"] == "alice"
+    assert [record["type"] for record in records].count("event") == 3
+    assert core.repository.stats()["in_use"] == 0
+
+
+def test_export_accepts_a_session_token(core):
+    (user_id,) = add_users(core.repository, "bob")
+    token = core.start_session("bob", user_id)
+    status, _, chunks = call("GET", "/export", b"format=csv", [(b"authorization", f"Bearer {token}".encode())])
+    assert status == 200
+    assert b"username,bob" in b"".join(chunks)
+
+
+def test_export_rejects_forged_and_foreign_tickets(core):
+    (user_id,) = add_users(core.repository, "carol")
+    forged = core.export_ticket(user_id).replace(f"{user_id}.", f"{user_id + 1}.", 1)
+    assert call("GET", "/export", f"ticket={forged}".encode())[0] == 401
+    # A ticket for another purpose isn't an export ticket
+    other = core.sessions.issue_ticket(user_id, "other", 60)
+    assert call("GET", "/export", f"ticket={other}".encode())[0] == 401
+    expired = core.sessions.issue_ticket(user_id, "export", -1)
+    assert call("GET", "/export", f"ticket={expired}".encode())[0] == 401
+    assert call("GET", "/export")[0] == 401
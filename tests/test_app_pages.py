@@ -0,0 +1,72 @@
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import config
+from auth_core import reset_shared_core, shared_core
+from storage import StorageError
+
+LOGIN_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "login.py")
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "SQLITE_PATH", str(tmp_path / "app.sqlite3"))
+    monkeypatch.setattr(config, "PASSWORD_HASH_WORKERS", 1)
+    monkeypatch.setenv("AUTH_MIN_RESPONSE_TIME", "0")
+    reset_shared_core()
+    app = AppTest.from_file(LOGIN_SCRIPT, default_timeout=60)
+    app.run()
+    yield app
+    reset_shared_core()
+
+
+def submit(app, values):
+    for field, value in zip(app.text_input, values):
+        field.input(value)
+    app.button[0].click().run()
+
+
+def test_task_page_shares_the_account_pages_core(app):
+    core = shared_core()
+    app.switch_page("task.py").run()
+    submit(app, ["Ada", "Lovelace", "ada", "ada@example.com", "secret-pass", "secret-pass"])
+    assert [s.value for s in app.success] == ["Registration Successful"]
+    app.sidebar.radio[0].set_value("Login").run()
+    submit(app, ["ada", "secret-pass"])
+    assert app.header[0].value == "Welcome, Ada Lovelace! 👋"
+    # Another browser session on the Account page logs in the user registered on the Task page
+    account = AppTest.from_file(LOGIN_SCRIPT, default_timeout=60)
+    account.run()
+    submit(account, ["ada", "secret-pass"])
+    assert account.session_state.logged_in
+    assert shared_core() is core
+    assert core.repository.stats()["opened"] <= core.repository.pool_size
+
+
+def test_task_page_survives_a_profile_outage(app, monkeypatch):
+    app.switch_page("task.py").run()
+    submit(app, ["", "", "bob", "bob@example.com", "secret-pass", "secret-pass"])
+    app.sidebar.radio[0].set_value("Login").run()
+    submit(app, ["bob", "secret-pass"])
+
+    def unavailable(user_id):
+        raise StorageError("database down")
+
+    monkeypatch.setattr(shared_core(), "profile", unavailable)
+    app.run()
+    assert not app.exception
+    assert app.header[0].value == "Welcome, bob! 👋"
+    assert "database down" in app.warning[0].value
+
+
+@pytest.mark.parametrize("in_url", ["1", "0"])
+def test_session_link_is_only_honoured_with_session_in_url(app, monkeypatch, in_url):
+    monkeypatch.setenv("SESSION_IN_URL", in_url)
+    user_id = shared_core().register("carol", "carol@example.com", "secret-pass", "secret-pass", "test")
+    visitor = AppTest.from_file(LOGIN_SCRIPT, default_timeout=60)
+    visitor.query_params["session"] = shared_core().start_session("carol", user_id)
+    visitor.run()
+    assert visitor.session_state.logged_in == (in_url == "1")
+    assert ("session" in visitor.query_params) == (in_url == "1")
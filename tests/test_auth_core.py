@@ -0,0 +1,71 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import config
+from auth_core import AuthError, reset_shared_core, resolve_client, shared_core
+
+
+def test_forwarded_for_is_ignored_without_trusted_proxies(monkeypatch):
+    monkeypatch.setattr(config, "TRUSTED_PROXIES", 0)
+    assert resolve_client("203.0.113.9", "10.0.0.5") == "10.0.0.5"
+    assert resolve_client(None, None) == "unknown"
+
+
+def test_only_entries_appended_by_trusted_proxies_count(monkeypatch):
+    monkeypatch.setattr(config, "TRUSTED_PROXIES", 1)
+    # The client sent "1.1.1.1" itself; the proxy appended the real peer
+    assert resolve_client("1.1.1.1, 198.51.100.7", "10.0.0.5") == "198.51.100.7"
+    monkeypatch.setattr(config, "TRUSTED_PROXIES", 2)
+    assert resolve_client("1.1.1.1, 198.51.100.7, 10.0.0.2", "10.0.0.5") == "198.51.100.7"
+    assert resolve_client("", "10.0.0.5") == "10.0.0.5"
+
+
+def register(core, username, password="secret-pass"):
+    return core.register(username, f"{username}@example.com", password, password, "test")
+
+
+def test_repeat_login_skips_the_lookup_and_hash(core):
+    user_id = register(core, "alice")
+    assert core.login("alice", "secret-pass", "test") == user_id
+    lookups = core.auth_service.stats()["lookups"]
+    assert core.login("ALICE", "secret-pass", "test") == user_id
+    assert core.auth_service.stats()["lookups"] == lookups
+
+
+def test_wrong_password_is_never_answered_from_recent_logins(core):
+    register(core, "bob")
+    core.login("bob", "secret-pass", "test")
+    with pytest.raises(AuthError) as raised:
+        core.login("bob", "wrong-pass", "test")
+    assert raised.value.code == "invalid_credentials"
+
+
+def test_recent_logins_can_be_disabled(core, monkeypatch):
+    monkeypatch.setattr(config, "RECENT_LOGIN_TTL", 0)
+    register(core, "carol")
+    core.login("carol", "secret-pass", "test")
+    lookups = core.auth_service.stats()["lookups"]
+    core.login("carol", "secret-pass", "test")
+    assert core.auth_service.stats()["lookups"] == lookups + 1
+
+
+def test_reset_shared_core_starts_a_fresh_one():
+    first = shared_core()
+    reset_shared_core()
+    assert shared_core() is not first
+
+
+def test_dead_hashing_worker_is_reported_as_busy(core, monkeypatch):
+    register(core, "dave")
+
+    def broken(password, stored):
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+    monkeypatch.setattr(core.hashing_pool, "submit_verify", broken)
+    with pytest.raises(AuthError) as raised:
+        core.login("dave", "secret-pass", "test")
+    assert raised.value.code == "busy"
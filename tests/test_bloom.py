@@ -0,0 +1,80 @@
+import threading
+import time
+
+import config
+from bloom import BloomFilter, UserIndex
+from conftest import add_users
+
+
+def built_index(repository, sync_interval=0.0):
+    index = UserIndex(repository, sync_interval=sync_interval)
+    index.rebuild()
+    return index
+
+
+def test_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    names = [f"user{i}" for i in range(1000)]
+    for name in names:
+        bloom.add(name)
+    assert all(name in bloom for name in names)
+
+
+def test_unknown_name_is_absent(repository):
+    add_users(repository, "alice")
+    index = built_index(repository)
+    assert index.might_have_username("Alice")
+    assert not index.might_have_username("mallory")
+
+
+def test_rows_from_another_process_are_seen_after_the_sync_interval(repository):
+    index = built_index(repository, sync_interval=0.05)
+    assert not index.might_have_username("bob")
+    # Inserted behind the index's back, as another process would
+    add_users(repository, "bob")
+    time.sleep(0.06)
+    assert index.might_have_username("bob")
+    assert index.might_have_email("bob@example.com")
+
+
+def test_absent_answers_share_one_catch_up_per_interval(repository, monkeypatch):
+    index = built_index(repository, sync_interval=60)
+    queries = []
+    users_after = repository.users_after
+    monkeypatch.setattr(repository, "users_after", lambda after_id: queries.append(after_id) or users_after(after_id))
+    assert not any(index.might_have_username(f"nobody{i}") for i in range(100))
+    assert queries == []
+    assert index.sync()
+    assert len(queries) == 1
+
+
+def test_lookup_waits_for_a_sync_already_in_flight(repository):
+    index = built_index(repository)
+    add_users(repository, "carol")
+    answers = []
+    with index._sync_lock:
+        lookup = threading.Thread(target=lambda: answers.append(index.might_have_username("carol")))
+        lookup.start()
+        time.sleep(0.05)
+        assert answers == []
+    lookup.join()
+    assert answers == [True]
+
+
+def test_failed_catch_up_answers_maybe(repository, monkeypatch):
+    index = built_index(repository)
+
+    def unavailable(after_id):
+        raise RuntimeError("database down")
+
+    monkeypatch.setattr(repository, "users_after", unavailable)
+    assert index.might_have_username("dave")
+
+
+def test_login_through_another_core_right_after_registering(core_factory, monkeypatch):
+    # With a sync interval the other core may refuse the login for up to that long
+    monkeypatch.setattr(config, "USER_INDEX_SYNC_INTERVAL", 0.0)
+    first, second = core_factory(), core_factory()
+    second.user_index.rebuild()
+    user_id = first.register("erin", "erin@example.com", "secret-pass", "secret-pass", "test")
+    assert second.login("erin", "secret-pass", "test") == user_id
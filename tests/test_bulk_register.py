@@ -0,0 +1,39 @@
+import pytest
+
+from bloom import UserIndex
+from bulk_register import CREATED, DUPLICATE_EMAIL, DUPLICATE_USERNAME, register_users_bulk
+from conftest import add_users
+from passwords import HashingPool
+
+
+@pytest.fixture
+def hashing_pool():
+    pool = HashingPool(workers=1, max_pending=100, n=2 ** 10)
+    yield pool
+    pool.shutdown()
+
+
+def rows(count):
+    return [{"username": f"bulk{i}", "email": f"bulk{i}@example.com", "password": "secret-pass"} for i in range(count)]
+
+
+def test_index_reads_once_per_batch(repository, hashing_pool, monkeypatch):
+    index = UserIndex(repository)
+    index.rebuild()
+    calls = []
+    for name in ("users_after", "find_taken"):
+        method = getattr(repository, name)
+        monkeypatch.setattr(repository, name, lambda *args, name=name, method=method: calls.append(name) or method(*args))
+    results = list(register_users_bulk(rows(300), repository, hashing_pool, batch_size=100, index=index))
+    assert {status for _, _, status in results} == {CREATED}
+    # One catch-up per batch; every name is definitely free, so no existing-user query
+    assert calls == ["users_after"] * 3
+
+
+def test_taken_names_are_reported(repository, hashing_pool):
+    add_users(repository, "bulk1")
+    repository.insert_user("someone", "bulk2@example.com", "hash")
+    index = UserIndex(repository)
+    index.rebuild()
+    statuses = [status for _, _, status in register_users_bulk(rows(4), repository, hashing_pool, index=index)]
+    assert statuses == [CREATED, DUPLICATE_USERNAME, DUPLICATE_EMAIL, CREATED]
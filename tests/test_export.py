@@ -0,0 +1,24 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+from activity import PAGE_VIEW
+from views.settings import build_export
+
+
+@pytest.fixture
+def services(core):
+    return SimpleNamespace(repository=core.repository, profiles=core.profiles, settings=core.settings)
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+def test_download_button_accepts_the_export(core, services, fmt):
+    user_id = core.register("frank", "frank@example.com", "secret-pass", "secret-pass", "test")
+    core.repository.record_events([(user_id, PAGE_VIEW, "Home", "2026-01-01 00:00:00")])
+    data, _ = convert_data_to_bytes_and_infer_mime(build_export(services, user_id, fmt), RuntimeError("unsupported"))
+    assert b"frank@example.com" in data
+    assert b"Home" in data
+    if fmt == "ndjson":
+        assert json.loads(data.splitlines()[0])["username"] == "frank"
@@ -0,0 +1,20 @@
+import urllib.request
+
+from metrics import Metrics
+
+
+def test_metrics_server_binds_loopback_by_default():
+    metrics = Metrics(enabled=True)
+    metrics.observe("login", 0.02)
+    metrics.register_gauges("pool", lambda: {"idle": 3, "backend": "sqlite"})
+    server = metrics.serve(0)
+    try:
+        host, port = server.server_address
+        assert host == "127.0.0.1"
+        body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert 'app_span_seconds_count{span="login"} 1' in body
+    assert 'app_pool{key="idle"} 3' in body
+    assert "backend" not in body
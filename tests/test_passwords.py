@@ -0,0 +1,28 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from passwords import HashingPool
+
+
+@pytest.fixture
+def pool():
+    pool = HashingPool(workers=1, max_pending=4, n=2 ** 10)
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_recovers_after_a_worker_dies(pool):
+    stored = pool.hash("secret-pass")
+    with pytest.raises(BrokenProcessPool):
+        pool._submit(os._exit, 1).result()
+    assert pool.verify("secret-pass", stored)
+    assert pool.stats()["restarts"] == 1
+
+
+def test_queue_slots_are_released_when_jobs_fail(pool):
+    for _ in range(pool.max_pending + 1):
+        with pytest.raises(BrokenProcessPool):
+            pool._submit(os._exit, 1).result()
+    assert pool.verify("secret-pass", pool.hash("secret-pass"))
@@ -0,0 +1,39 @@
+import pytest
+
+import ratelimit
+from ratelimit import TokenBucketLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_burst_then_refill(clock):
+    limiter = TokenBucketLimiter(rate=1, burst=3)
+    assert [limiter.allow("ip") for _ in range(4)] == [True, True, True, False]
+    clock[0] += 1
+    assert limiter.allow("ip")
+    assert not limiter.allow("ip")
+
+
+def test_refilled_buckets_are_dropped(clock):
+    limiter = TokenBucketLimiter(rate=1, burst=2)
+    limiter.allow("idle")
+    clock[0] += 2
+    limiter.allow("busy")
+    assert len(limiter) == 1
+
+
+def test_least_recently_used_bucket_is_evicted_past_max_keys(clock):
+    limiter = TokenBucketLimiter(rate=0.01, burst=1, max_keys=2)
+    for key in ("a", "b"):
+        assert limiter.allow(key)
+    assert not limiter.allow("a")
+    assert limiter.allow("c")
+    assert len(limiter) == 2
+    # "b" was evicted, so it starts over with a full bucket; recently used "c" keeps its drained one
+    assert limiter.allow("b")
+    assert not limiter.allow("c")
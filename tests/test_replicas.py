@@ -0,0 +1,53 @@
+import sqlite3
+import time
+
+from bloom import UserIndex
+from conftest import add_users
+from replicas import ReplicaRouter
+from storage import SQLiteUserRepository
+
+
+def copy_database(source, target):
+    """Snapshot one SQLite file into another (stand-in for replication)"""
+    src, dst = sqlite3.connect(source.path), sqlite3.connect(target.path)
+    src.backup(dst)
+    dst.close()
+    src.close()
+
+
+def healthy_router(primary, replicas):
+    router = ReplicaRouter(primary, replicas, check_interval=0.05)
+    deadline = time.monotonic() + 5
+    while router.stats()["healthy_replicas"] < len(replicas):
+        assert time.monotonic() < deadline, "replicas never became healthy"
+        time.sleep(0.01)
+    return router
+
+
+def test_index_rebuild_with_replicas_at_different_positions(repository, tmp_path):
+    fresh = SQLiteUserRepository(str(tmp_path / "fresh.sqlite3"))
+    stale = SQLiteUserRepository(str(tmp_path / "stale.sqlite3"))
+    add_users(repository, "old0", "old1", "old2", "old3", "old4")
+    copy_database(repository, stale)
+    add_users(repository, "new0", "new1", "new2")
+    copy_database(repository, fresh)
+    router = healthy_router(repository, [fresh, stale])
+    try:
+        index = UserIndex(router)
+        index.rebuild()
+        for name in ("old0", "old4", "new0", "new1", "new2"):
+            assert index.might_have_username(name), name
+    finally:
+        router.close()
+
+
+def test_missing_profile_on_replica_is_rechecked_on_primary(repository, tmp_path):
+    replica = SQLiteUserRepository(str(tmp_path / "replica.sqlite3"))
+    copy_database(repository, replica)
+    (user_id,) = add_users(repository, "late")
+    router = healthy_router(repository, [replica])
+    try:
+        assert router.get_profile(user_id)[0] == "late"
+        assert router.stats()["rechecks"] == 1
+    finally:
+        router.close()
@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+from conftest import add_users
+from storage import DuplicateUserError, SQLiteUserRepository, StorageError
+
+
+def test_connections_are_reused_across_threads(repository):
+    opened = repository.stats()["opened"]
+    for _ in range(10):
+        # Like Streamlit, which runs every rerun on a fresh thread
+        reader = threading.Thread(target=repository.count_users)
+        reader.start()
+        reader.join()
+    assert repository.stats()["opened"] == opened
+
+
+def test_connection_is_released_after_an_error(repository):
+    add_users(repository, "alice")
+    with pytest.raises(DuplicateUserError):
+        add_users(repository, "alice")
+    assert repository.stats()["in_use"] == 0
+    assert repository.count_users() == 1
+
+
+def test_pool_is_bounded_and_streams_release_their_connection(tmp_path):
+    repository = SQLiteUserRepository(str(tmp_path / "small.sqlite3"), pool_size=2, pool_timeout=0.05)
+    repository.migrate()
+    add_users(repository, "a", "b", "c")
+    streams = [repository.iter_usernames_emails(3, batch_size=1) for _ in range(2)]
+    for stream in streams:
+        next(stream)
+    with pytest.raises(StorageError, match="No free database connection"):
+        repository.count_users()
+    for stream in streams:
+        stream.close()
+    assert repository.count_users() == 3
+    stats = repository.stats()
+    assert stats["opened"] == 2 and stats["in_use"] == 0 and stats["timeouts"] == 1
+
+
+def login(user_id, day):
+    return (user_id, "login", "", f"{day} 12:00:00")
+
+
+def test_active_users_are_counted_once_from_precomputed_rows(repository):
+    repository.record_events([login(1, "2026-03-01"), login(2, "2026-03-05"), login(1, "2026-03-10")])
+    repository.record_events([login(2, "2026-03-11"), login(3, "2026-02-01"), (4, "page_view", "Home", "2026-03-11 09:00:00")])
+    # Replayed late: an older login doesn't move the mark back
+    repository.record_events([login(1, "2026-03-02")])
+    assert repository.count_active_users("login", "2026-03-01") == 2
+    assert repository.count_active_users("login", "2026-03-11") == 1
+    assert repository.count_active_users("login", "2026-01-01") == 3
+    assert repository.count_active_users("page_view", "2026-03-01") == 1
+    with repository._connection() as conn:
+        plan = " ".join(row[-1] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT COALESCE(SUM(count), 0) FROM event_rollups_daily "
+            "WHERE user_id = 0 AND day >= '2026-03-01' AND kind = 'login:latest'"
+        ))
+    assert "SEARCH" in plan and "SCAN" not in plan
+
+
+def test_upgrade_backfills_active_user_marks(repository):
+    repository.record_events([login(1, "2026-03-01"), login(2, "2026-03-05"), login(1, "2026-03-10")])
+    with repository._connection() as conn:
+        # Back to schema 4: no marks yet
+        conn.execute("DROP TABLE user_last_seen")
+        conn.execute("DELETE FROM event_rollups_daily WHERE kind LIKE '%:latest'")
+        conn.execute("DELETE FROM schema_version WHERE version = 5")
+        conn.commit()
+    assert repository.migrate() == 5
+    assert repository.count_active_users("login", "2026-03-01") == 2
+    assert repository.count_active_users("login", "2026-03-06") == 1
@@ -0,0 +1,19 @@
+import templating
+
+
+def test_equal_values_of_different_types_render_separately():
+    rendered = [templating.render("page_title.html", title=value) for value in (1, 1.0, True)]
+    assert ["1" in rendered[0], "1.0" in rendered[1], "True" in rendered[2]] == [True, True, True]
+    assert len(set(rendered)) == 3
+
+
+def test_identical_calls_are_memoized():
+    templating.render("page_title.html", title="memo")
+    hits = templating.stats()["render_hits"]
+    templating.render("page_title.html", title="memo")
+    assert templating.stats()["render_hits"] == hits + 1
+
+
+def test_values_are_escaped_and_unhashable_values_still_render():
+    assert "&lt;b&gt;" in templating.render("page_title.html", title="<b>")
+    assert "[1]" in templating.render("page_title.html", title=[1])
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+from conftest import add_users
+from storage import StorageError
+from user_settings import SettingsStore
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def upserts(repository, monkeypatch):
+    """Records every upsert_settings call the repository receives"""
+    calls = []
+    upsert = repository.upsert_settings
+    monkeypatch.setattr(repository, "upsert_settings", lambda user_id, fields: calls.append(dict(fields)) or upsert(user_id, fields))
+    return calls
+
+
+def test_changes_wait_for_the_debounce_and_coalesce(repository, upserts):
+    user_id, = add_users(repository, "alice")
+    store = SettingsStore(repository, debounce=0.2, max_delay=5.0)
+    store.update(user_id, {"theme": "Dark"})
+    store.update(user_id, {"sms_alerts": True})
+    time.sleep(0.05)
+    assert upserts == []
+    assert store.load(user_id)["theme"] == "Dark"
+    wait_for(lambda: store.stats()["writes"] == 1)
+    assert upserts == [{"theme": "Dark", "sms_alerts": True}]
+    assert repository.get_settings(user_id)["theme"] == "Dark"
+
+
+def test_max_delay_caps_a_busy_user(repository, upserts):
+    user_id, = add_users(repository, "alice")
+    store = SettingsStore(repository, debounce=0.1, max_delay=0.2)
+    started = time.monotonic()
+    while not upserts:
+        assert time.monotonic() - started < 1.0
+        store.update(user_id, {"sms_alerts": not store.load(user_id)["sms_alerts"]})
+        time.sleep(0.02)
+
+
+def test_failed_write_is_retried_and_newer_edits_win(repository, monkeypatch):
+    user_id, = add_users(repository, "alice")
+    upsert, attempts = repository.upsert_settings, []
+
+    def flaky(user_id, fields):
+        attempts.append(dict(fields))
+        if len(attempts) == 1:
+            raise StorageError("database is locked")
+        upsert(user_id, fields)
+
+    monkeypatch.setattr(repository, "upsert_settings", flaky)
+    store = SettingsStore(repository, debounce=0.05, max_delay=5.0)
+    store.update(user_id, {"theme": "Dark", "sms_alerts": True})
+    wait_for(lambda: store.stats()["failures"] == 1)
+    store.update(user_id, {"theme": "Light"})
+    wait_for(lambda: store.stats()["writes"] == 1)
+    assert attempts[-1] == {"theme": "Light", "sms_alerts": True}
+    assert store.stats()["dirty_users"] == 0
+
+
+def test_flush_raises_and_keeps_the_changes(repository, monkeypatch):
+    user_id, = add_users(repository, "alice")
+    store = SettingsStore(repository, debounce=60.0, max_delay=60.0)
+    upsert = repository.upsert_settings
+
+    def down(user_id, fields):
+        raise StorageError("database is down")
+
+    monkeypatch.setattr(repository, "upsert_settings", down)
+    store.update(user_id, {"theme": "Dark"})
+    with pytest.raises(StorageError):
+        store.flush(user_id)
+    assert store.load(user_id)["theme"] == "Dark"
+    monkeypatch.setattr(repository, "upsert_settings", upsert)
+    store.flush(user_id)
+    assert repository.get_settings(user_id)["theme"] == "Dark"
+
+
+def test_flush_waits_for_an_in_flight_write(repository, monkeypatch):
+    user_id, = add_users(repository, "alice")
+    upsert, started, release = repository.upsert_settings, threading.Event(), threading.Event()
+
+    def slow_first(user_id, fields):
+        if not started.is_set():
+            started.set()
+            release.wait(2.0)
+        upsert(user_id, fields)
+
+    monkeypatch.setattr(repository, "upsert_settings", slow_first)
+    store = SettingsStore(repository, debounce=0.01, max_delay=5.0)
+    store.update(user_id, {"theme": "Dark"})
+    assert started.wait(2.0)
+    # The writer is mid-upsert with "Dark"; the user switches back and saves
+    store.update(user_id, {"theme": "Light"})
+    flusher = threading.Thread(target=store.flush, args=(user_id,))
+    flusher.start()
+    time.sleep(0.05)
+    release.set()
+    flusher.join(2.0)
+    wait_for(lambda: store.stats()["dirty_users"] == 0 and store.stats()["writes"] == 2)
+    assert repository.get_settings(user_id)["theme"] == "Light"
@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+import validation
+from validation import ValidationError, validate, validate_batch, validate_frame
+
+GOOD = {"username": "student", "email": "student@school.edu", "password": "s3cret-pass", "confirm_password": "s3cret-pass"}
+
+RECORDS = [
+    GOOD,
+    {**GOOD, "username": ""},
+    {**GOOD, "email": None},
+    {key: value for key, value in GOOD.items() if key != "password"},
+    {**GOOD, "username": "ab"},
+    {**GOOD, "password": "short", "confirm_password": "short"},
+    {**GOOD, "confirm_password": "typo"},
+    {key: value for key, value in GOOD.items() if key != "confirm_password"},
+    {**GOOD, "email": "not-an-email"},
+    {**GOOD, "email": "student@school.edu\n"},
+    {**GOOD, "first_name": "x" * 51},
+    {**GOOD, "first_name": "x" * 50, "last_name": "y" * 51},
+    {**GOOD, "username": "ab", "email": "not-an-email", "last_name": "y" * 51},
+]
+
+
+def test_frame_agrees_with_validate():
+    result = validate_frame(pd.DataFrame.from_records(RECORDS))
+    for record, (code, field, message) in zip(RECORDS, result.itertuples(index=False, name=None)):
+        expected = next(iter(validate(record)), None)
+        if expected is None:
+            assert pd.isna(code), record
+        else:
+            assert ValidationError(code, field, message) == expected, record
+
+
+@pytest.mark.parametrize("frame_min", [0, len(RECORDS) + 1])
+def test_batch_matches_validate_either_way(monkeypatch, frame_min):
+    monkeypatch.setattr(validation, "FRAME_MIN_RECORDS", frame_min)
+    assert validate_batch(RECORDS) == [next(iter(validate(record)), None) for record in RECORDS]
+
+
+def test_empty_batch():
+    assert validate_batch([]) == []
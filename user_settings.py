@@ -0,0 +1,129 @@
+import atexit
+import threading
+import time
+
+# Settings a user gets until they change them (mirrors the user_settings column defaults)
+DEFAULT_SETTINGS = {
+    "email_notifications": True,
+    "push_notifications": True,
+    "sms_alerts": False,
+    "theme": "Light",
+    "two_factor": False,
+}
+
+
+class SettingsStore:
+    """Per-user settings with debounced, coalesced write-back.
+
+    update() only records the changed fields; a background writer upserts a
+    user's dirty fields once they have been left alone for `debounce` seconds
+    (or at most `max_delay` after the first change), so flipping several
+    switches costs one write. flush() writes a user's pending changes right away.
+    Writes for one user never overlap: each waits for the previous one to land,
+    so an older batch can't overwrite a newer value.
+    """
+
+    def __init__(self, repository, debounce=2.0, max_delay=10.0):
+        self.repository = repository
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._cond = threading.Condition()
+        # user_id -> [dirty fields, due at, first change at]
+        self._dirty = {}
+        # Users with a write in flight (popped from _dirty, not yet stored)
+        self._writing = set()
+        self._stats = {"updates": 0, "writes": 0, "failures": 0}
+        self._writer = threading.Thread(target=self._run, name="settings-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.flush_all)
+
+    def load(self, user_id):
+        """The user's settings: defaults, overlaid with the saved row, overlaid with unwritten changes"""
+        settings = dict(DEFAULT_SETTINGS)
+        saved = self.repository.get_settings(user_id)
+        if saved:
+            settings.update({field: type(DEFAULT_SETTINGS[field])(value) for field, value in saved.items()})
+        with self._cond:
+            pending = self._dirty.get(user_id)
+            if pending:
+                settings.update(pending[0])
+        return settings
+
+    def update(self, user_id, changes):
+        """Mark fields dirty; they are written together after the debounce delay"""
+        now = time.monotonic()
+        with self._cond:
+            self._stats["updates"] += 1
+            pending = self._dirty.get(user_id)
+            if pending is None:
+                pending = self._dirty[user_id] = [{}, 0.0, now]
+            pending[0].update(changes)
+            pending[1] = min(now + self.debounce, pending[2] + self.max_delay)
+            self._cond.notify_all()
+
+    def flush(self, user_id):
+        """Write the user's pending changes now (raises storage.StorageError on failure)"""
+        with self._cond:
+            pending = self._claim(user_id)
+        if pending:
+            self._write(user_id, pending, raise_errors=True)
+
+    def flush_all(self):
+        """Write every user's pending changes now, e.g. at shutdown (failures are left pending)"""
+        with self._cond:
+            user_ids = list(self._dirty)
+        for user_id in user_ids:
+            with self._cond:
+                pending = self._claim(user_id)
+            if pending:
+                self._write(user_id, pending)
+
+    def stats(self):
+        with self._cond:
+            return dict(self._stats, dirty_users=len(self._dirty))
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._dirty:
+                    self._cond.wait()
+                now = time.monotonic()
+                # Users being written by flush() wait for that write to finish
+                idle = {user_id: pending for user_id, pending in self._dirty.items() if user_id not in self._writing}
+                due = [user_id for user_id, pending in idle.items() if pending[1] <= now]
+                if not due:
+                    self._cond.wait(min(pending[1] for pending in idle.values()) - now if idle else None)
+                    continue
+                batch = [(user_id, self._claim(user_id)) for user_id in due]
+            for user_id, pending in batch:
+                self._write(user_id, pending)
+
+    def _claim(self, user_id):
+        """Wait out the user's in-flight write, then take their pending changes (caller holds _cond)"""
+        while user_id in self._writing:
+            self._cond.wait()
+        pending = self._dirty.pop(user_id, None)
+        if pending is not None:
+            self._writing.add(user_id)
+        return pending
+
+    def _write(self, user_id, pending, raise_errors=False):
+        try:
+            self.repository.upsert_settings(user_id, pending[0])
+            with self._cond:
+                self._stats["writes"] += 1
+        except Exception:
+            with self._cond:
+                self._stats["failures"] += 1
+                # Keep the changes (newer edits win) and retry after another debounce period
+                current = self._dirty.get(user_id)
+                if current is None:
+                    self._dirty[user_id] = [pending[0], time.monotonic() + self.debounce, pending[2]]
+                else:
+                    current[0] = {**pending[0], **current[0]}
+            if raise_errors:
+                raise
+        finally:
+            with self._cond:
+                self._writing.discard(user_id)
+                self._cond.notify_all()
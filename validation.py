@@ -0,0 +1,105 @@
+import re
+from collections import namedtuple
+
+# Compiled once at import; reused by every validation call
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+# Below this many records validating one at a time beats building a DataFrame
+# (benchmarks/validation_throughput.py: the pandas path only pulls ahead at ~8k records)
+FRAME_MIN_RECORDS = 10_000
+
+Rule = namedtuple("Rule", "code field kind arg message")
+ValidationError = namedtuple("ValidationError", "code field message")
+
+# Checked in order; with first_only the first failing rule wins (matching the Register form)
+REGISTRATION_RULES = (
+    Rule("required", ("username", "email", "password"), "required", None, "Please fill all fields"),
+    Rule("username_too_short", "username", "min_length", 3, "Username must be at least 3 characters long"),
+    Rule("password_too_short", "password", "min_length", 6, "Password must be at least 6 characters long"),
+    Rule("password_mismatch", "password", "equals", "confirm_password", "Passwords do not match"),
+    Rule("invalid_email", "email", "pattern", EMAIL_PATTERN, "Please enter a valid email address"),
+    Rule("first_name_too_long", "first_name", "max_length", 50, "First name must be at most 50 characters long"),
+    Rule("last_name_too_long", "last_name", "max_length", 50, "Last name must be at most 50 characters long"),
+)
+
+
+def _fields(rule):
+    return rule.field if isinstance(rule.field, tuple) else (rule.field,)
+
+
+def _passes(rule, record):
+    if rule.kind == "required":
+        return all(record.get(field) for field in rule.field)
+    value = record.get(rule.field) or ""
+    if rule.kind == "min_length":
+        return len(value) >= rule.arg
+    if rule.kind == "max_length":
+        return len(value) <= rule.arg
+    if rule.kind == "equals":
+        return value == (record.get(rule.arg) or "")
+    if rule.kind == "pattern":
+        return rule.arg.fullmatch(value) is not None
+    raise ValueError(f"Unknown rule kind: {rule.kind}")
+
+
+def validate(record, rules=REGISTRATION_RULES, first_only=True):
+    """Validate one record (a dict); returns a list of ValidationError, empty when valid"""
+    errors = []
+    for rule in rules:
+        if not _passes(rule, record):
+            errors.append(ValidationError(rule.code, _fields(rule)[0], rule.message))
+            if first_only:
+                break
+    return errors
+
+
+def validate_frame(frame, rules=REGISTRATION_RULES):
+    """Validate a whole pandas DataFrame column-wise.
+
+    Returns a DataFrame aligned with `frame` holding the first failing rule's
+    code, field and message per row (None where the row is valid).
+    """
+    import pandas as pd
+
+    def column(name):
+        if name not in frame:
+            return pd.Series("", index=frame.index)
+        return frame[name].fillna("").astype(str)
+
+    codes = pd.Series(None, index=frame.index, dtype=object)
+    fields = codes.copy()
+    messages = codes.copy()
+    for rule in rules:
+        if rule.kind == "required":
+            failed = pd.Series(False, index=frame.index)
+            for field in rule.field:
+                failed |= column(field).str.len() == 0
+        elif rule.kind == "min_length":
+            failed = column(rule.field).str.len() < rule.arg
+        elif rule.kind == "max_length":
+            failed = column(rule.field).str.len() > rule.arg
+        elif rule.kind == "equals":
+            failed = column(rule.field) != column(rule.arg)
+        elif rule.kind == "pattern":
+            failed = ~column(rule.field).str.fullmatch(rule.arg.pattern)
+        else:
+            raise ValueError(f"Unknown rule kind: {rule.kind}")
+        # Only the first failure per row is reported
+        failed &= codes.isna()
+        codes[failed] = rule.code
+        fields[failed] = _fields(rule)[0]
+        messages[failed] = rule.message
+    return pd.DataFrame({"code": codes, "field": fields, "message": messages})
+
+
+def validate_batch(records, rules=REGISTRATION_RULES):
+    """Validate a list of dicts at once; returns the first ValidationError (or None) per record"""
+    if len(records) < FRAME_MIN_RECORDS:
+        return [next(iter(validate(record, rules)), None) for record in records]
+    import pandas as pd
+
+    result = validate_frame(pd.DataFrame.from_records(records), rules)
+    return [
+        None if pd.isna(code) else ValidationError(code, field, message)
+        for code, field, message in result.itertuples(index=False, name=None)
+    ]
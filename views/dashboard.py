@@ -0,0 +1,76 @@
+import streamlit as st
+
+from activity import LOGIN, PAGE_VIEW, REGISTER
+from storage import StorageError
+import templating
+
+def kpi_card(title, value, previous, background, color, window_days):
+    """KPI card HTML with the change against the previous window"""
+    if previous is None:
+        trend, trend_color = f"last {window_days} days", "#666"
+    elif previous == 0:
+        trend, trend_color = f"new in the last {window_days} days" if value else "no activity yet", "#666"
+    else:
+        change = (value - previous) / previous * 100
+        arrow = "↑" if change >= 0 else "↓"
+        trend = f"{arrow} {abs(change):.0f}% from the previous {window_days} days"
+        trend_color = "green" if change >= 0 else "#f5576c"
+    return templating.render(
+        "kpi_card.html", background=background, color=color, title=title, value=value, trend=trend, trend_color=trend_color
+    )
+
+
+@st.fragment
+def render(services):
+    """Dashboard page: KPI cards and charts"""
+    st.markdown(templating.render("page_title.html", title="📊 Dashboard"), unsafe_allow_html=True)
+    
+    try:
+        summary = services.activity.site_summary()
+    except StorageError as e:
+        st.warning(f"⚠️ Dashboard data is unavailable right now: {e}")
+        return
+    totals = summary["totals"]
+    window = services.activity.window_days
+    
+    # Dashboard stats
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.markdown(kpi_card("📊 Page Views", *totals[PAGE_VIEW], "#E8EAF6", "#667eea", window), unsafe_allow_html=True)
+    
+    with col2:
+        st.markdown(kpi_card("👥 New Users", *totals[REGISTER], "#FCE4EC", "#f5576c", window), unsafe_allow_html=True)
+    
+    with col3:
+        st.markdown(kpi_card("🔓 Logins", *totals[LOGIN], "#E0F2F1", "#00b8d4", window), unsafe_allow_html=True)
+    
+    with col4:
+        st.markdown(
+            kpi_card("⭐ Active Users", summary["active_users"], None, "#FFF3E0", "#FF9800", window),
+            unsafe_allow_html=True
+        )
+    
+    st.markdown("---")
+    
+    # Charts (columns are NumPy arrays built from the rollup rows)
+    st.markdown("### 📈 Performance Overview")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("#### Weekly Activity")
+        days, views, logins = summary["week"]
+        st.line_chart(data={"Day": days, "Page views": views, "Logins": logins}, x="Day")
+    
+    with col2:
+        st.markdown("#### Page Popularity")
+        pages, page_views = summary["pages"]
+        if pages:
+            st.bar_chart(data={"Page": pages, "Views": page_views}, x="Page", y="Views")
+        else:
+            st.info("No page views yet")
+    
+    st.markdown("#### Last 24 Hours")
+    hours, views, logins = summary["hours"]
+    st.area_chart(data={"Hour": hours, "Page views": views, "Logins": logins}, x="Hour")
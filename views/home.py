@@ -0,0 +1,69 @@
+import streamlit as st
+
+from activity import LOGIN, LOGOUT, PAGE_VIEW, REGISTER, time_ago, utc_now
+from storage import StorageError
+import templating
+
+EVENT_LABELS = {
+    REGISTER: ("🎉", "Created your account"),
+    LOGIN: ("🔓", "Logged in"),
+    LOGOUT: ("🚪", "Logged out"),
+    PAGE_VIEW: ("👀", "Visited the {detail} page"),
+}
+
+FEATURE_CARDS = [
+    dict(title="📚 Learning Hub", text="Access educational resources and tutorials", button="Explore",
+         start="#667eea", end="#764ba2", accent="#667eea"),
+    dict(title="🎯 Tasks & Projects", text="Manage your daily tasks and projects efficiently", button="View Tasks",
+         start="#f093fb", end="#f5576c", accent="#f5576c"),
+    dict(title="🔔 Notifications", text="Stay updated with real-time notifications", button="Check Now",
+         start="#4facfe", end="#00f2fe", accent="#00f2fe"),
+]
+
+
+@st.fragment
+def render(services):
+    """Home page: welcome banner, feature cards and activity"""
+    st.markdown(templating.render("welcome.html", username=st.session_state.username), unsafe_allow_html=True)
+    
+    st.balloons()
+    
+    # Feature Cards
+    st.markdown("### 🌟 Featured Services")
+    for column, card in zip(st.columns(len(FEATURE_CARDS)), FEATURE_CARDS):
+        with column:
+            st.markdown(templating.render("feature_card.html", **card), unsafe_allow_html=True)
+    
+    st.markdown("---")
+    
+    # Quick Stats
+    st.markdown("### 📈 Your Activity")
+    user_id = st.session_state.user_id
+    try:
+        summary = services.activity.user_summary(user_id)
+        recent = services.activity.recent(user_id)
+    except StorageError as e:
+        st.warning(f"⚠️ Activity is unavailable right now: {e}")
+        return
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Total Sessions", summary["sessions"], f"+{summary['sessions_recent']} this week")
+    with col2:
+        st.metric("Page Views", summary["page_views"], f"+{summary['page_views_recent']} this week")
+    with col3:
+        st.metric("Active Days", summary["active_days"], f"+{summary['active_days_recent']} this week")
+    with col4:
+        st.metric("Pages Explored", summary["pages"])
+    
+    st.markdown("---")
+    
+    # Recent Activity
+    st.markdown("### 📝 Recent Activity")
+    if not recent:
+        st.info("No activity yet")
+    
+    now = utc_now()
+    for kind, detail, created_at in recent:
+        emoji, label = EVENT_LABELS.get(kind, ("•", kind))
+        st.info(f"{emoji} {label.format(detail=detail.title())} • {time_ago(created_at, now)}")
@@ -0,0 +1,54 @@
+import streamlit as st
+from datetime import datetime
+
+from storage import StorageError
+import templating
+
+
+@st.fragment
+def render(services):
+    """Profile page"""
+    st.markdown(templating.render("page_title.html", title="👤 User Profile"), unsafe_allow_html=True)
+    
+    try:
+        profile = services.profiles.get(st.session_state.user_id)
+    except StorageError as e:
+        st.warning(f"⚠️ Profile is unavailable right now: {e}")
+        return
+    if profile is None:
+        st.warning("⚠️ Profile not found")
+        return
+    username, email, created_at, first_name, last_name = profile
+    
+    col1, col2 = st.columns([1, 2])
+    
+    with col1:
+        st.markdown(templating.render("avatar.html"), unsafe_allow_html=True)
+    
+    with col2:
+        member_since = datetime.fromisoformat(created_at).strftime('%B %d, %Y')
+        st.markdown(
+            templating.render("profile_summary.html", username=username, member_since=member_since),
+            unsafe_allow_html=True
+        )
+    
+    st.markdown("---")
+    
+    st.markdown("### 📋 Profile Information")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.text_input("🪪 Name", value=f"{first_name} {last_name}".strip() or "—", disabled=True)
+        st.text_input("📧 Email", value=email, disabled=True)
+    with col2:
+        st.text_input("🆔 Account ID", value=str(st.session_state.user_id), disabled=True)
+    
+    st.markdown("---")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("✏️ Edit Profile", use_container_width=True):
+            st.info("Edit profile feature coming soon!")
+    with col2:
+        if st.button("🔐 Change Password", use_container_width=True):
+            st.warning("Password change feature coming soon!")
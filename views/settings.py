@@ -0,0 +1,132 @@
+import functools
+from urllib.parse import urlencode
+
+import streamlit as st
+
+import config
+from export import FORMATS, export_bytes, iter_export
+from storage import StorageError
+import templating
+
+THEMES = ["Light", "Dark", "Auto"]
+
+# Widget key -> settings field
+WIDGET_FIELDS = {
+    "email_notif": "email_notifications",
+    "push_notif": "push_notifications",
+    "sms_notif": "sms_alerts",
+    "theme_select": "theme",
+    "2fa_toggle": "two_factor",
+}
+
+
+def setting_changed(services, key):
+    """on_change callback: remember the new value and queue it for the debounced write"""
+    field, value = WIDGET_FIELDS[key], st.session_state[key]
+    st.session_state.settings[field] = value
+    services.settings.update(st.session_state.user_id, {field: value})
+
+
+def settings_toggle(services, key):
+    """Switch bound to a settings field"""
+    st.toggle(
+        "Enable", value=st.session_state.settings[WIDGET_FIELDS[key]], key=key,
+        on_change=setting_changed, args=(services, key)
+    )
+
+
+def build_export(services, user_id, fmt):
+    """Runs when the button is clicked, not during the rerun; the whole export is buffered in memory"""
+    return export_bytes(iter_export(fmt, user_id, services.profiles, services.settings, services.repository))
+
+
+def export_link(services, user_id, fmt):
+    """URL of the API's streaming export, authorized by a short-lived ticket"""
+    query = urlencode({"format": fmt, "ticket": services.export_ticket(user_id)})
+    return f"{config.EXPORT_URL.rstrip('/')}/export?{query}"
+
+
+@st.fragment
+def render(services):
+    """Settings page"""
+    st.markdown(templating.render("page_title.html", title="⚙️ Settings"), unsafe_allow_html=True)
+    
+    # Loaded once per session; later reruns use the copy in session state
+    if st.session_state.get("settings") is None:
+        try:
+            st.session_state.settings = services.settings.load(st.session_state.user_id)
+        except StorageError as e:
+            st.warning(f"⚠️ Settings are unavailable right now: {e}")
+            return
+    settings = st.session_state.settings
+    
+    st.markdown("### 🔔 Notifications")
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        st.write("Email Notifications")
+    with col2:
+        settings_toggle(services, "email_notif")
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        st.write("Push Notifications")
+    with col2:
+        settings_toggle(services, "push_notif")
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        st.write("SMS Alerts")
+    with col2:
+        settings_toggle(services, "sms_notif")
+    
+    st.markdown("---")
+    
+    st.markdown("### 🎨 Appearance")
+    theme = st.selectbox(
+        "Theme", THEMES, index=THEMES.index(settings["theme"]), key="theme_select",
+        on_change=setting_changed, args=(services, "theme_select")
+    )
+    st.info(f"Selected theme: {theme}")
+    
+    st.markdown("---")
+    
+    st.markdown("### 🔐 Privacy & Security")
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        st.write("Two-Factor Authentication")
+    with col2:
+        settings_toggle(services, "2fa_toggle")
+    
+    st.markdown("---")
+    
+    st.markdown("### 💾 Data Management")
+    col1, col2 = st.columns(2)
+    with col1:
+        fmt = st.radio("Export format", list(FORMATS), format_func=str.upper, horizontal=True, key="export_format")
+        extension, mime = FORMATS[fmt]
+        if config.EXPORT_URL:
+            # Streamed by the API straight from the database; nothing is buffered in this process
+            st.link_button(
+                "📥 Download My Data", export_link(services, st.session_state.user_id, fmt), use_container_width=True
+            )
+        else:
+            # Buffered: Streamlit holds the full file in memory (set EXPORT_URL to stream it instead)
+            st.download_button(
+                "📥 Download My Data",
+                data=functools.partial(build_export, services, st.session_state.user_id, fmt),
+                file_name=f"{st.session_state.username}-data.{extension}",
+                mime=mime,
+                use_container_width=True
+            )
+    with col2:
+        if st.button("🗑️ Delete Account", use_container_width=True):
+            st.error("❌ Account deletion requires confirmation")
+    
+    st.markdown("---")
+    
+    if st.button("💾 Save Settings", use_container_width=True):
+        try:
+            services.settings.flush(st.session_state.user_id)
+            st.success("✅ Settings saved successfully!")
+        except StorageError as e:
+            st.error(f"❌ Could not save settings: {e}")